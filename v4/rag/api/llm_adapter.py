@@ -1,14 +1,16 @@
-import requests
+from rag.llm.http_limits import pooled_session, requests_timeout
 
 OLLAMA_URL = "http://localhost:11434/api/generate"
 MODEL = "phi3:mini"
 
-def generate(prompt: str) -> str:
+_session = pooled_session()
+
+def generate(prompt: str, timeout: float | None = None) -> str:
     payload = {
         "model": MODEL,
         "prompt": prompt,
         "stream": False
     }
-    r = requests.post(OLLAMA_URL, json=payload)
+    r = _session.post(OLLAMA_URL, json=payload, timeout=requests_timeout(timeout))
     r.raise_for_status()
     return r.json()["response"]
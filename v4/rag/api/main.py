@@ -1,9 +1,32 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from rag.api import warmup
 from rag.api.schemas import WorkflowRequest, WorkflowResponse
-from rag.api.workflow_api import run_workflow
+from rag.api.workflow_api import run_workflow_async, stream_workflow
+from rag.llm.ollama_client import async_ollama_client
+from rag.llm.openai_client import async_openai_client
+from rag.llm.response_cache import llm_cache
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load + warm the engine before the worker accepts traffic
+    if warmup.WARMUP_ENABLED:
+        warmup.warm_up()
+    else:
+        warmup.mark_ready()
+    yield
+    # Close pooled LLM connections
+    await async_openai_client.aclose()
+    await async_ollama_client.aclose()
+    # Pending last_used updates of cache hits
+    llm_cache.flush()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,10 +37,13 @@ app.add_middleware(
 )
 
 @app.post("/chat", response_model=WorkflowResponse)
-def chat(req: WorkflowRequest):
-    reply, updated_memory, debug = run_workflow(
+async def chat(req: WorkflowRequest):
+    # LLM calls are awaited; many conversations share one worker
+    reply, updated_memory, debug = await run_workflow_async(
         req.user_message,
-        req.memory
+        req.memory,
+        req.session_id,
+        req.offset,
     )
 
     return {
@@ -25,3 +51,29 @@ def chat(req: WorkflowRequest):
         "memory": updated_memory,
         "debug": debug
     }
+
+
+@app.post("/chat/stream")
+async def chat_stream(req: WorkflowRequest):
+    # Server-sent events: stages, product cards, then the reply text
+    return StreamingResponse(
+        stream_workflow(req.user_message, req.memory, req.session_id, req.offset),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/healthz")
+def healthz():
+    # Liveness: the process is up (may still be warming)
+    return {"status": "ok", **warmup.status()}
+
+
+@app.get("/readyz")
+def readyz():
+    # Readiness: route traffic only to warm workers
+    state = warmup.status()
+    return JSONResponse(
+        status_code=200 if state["ready"] else 503,
+        content={"status": "ready" if state["ready"] else "not_ready", **state},
+    )
@@ -6,6 +6,10 @@ from rag.workflow.schemas import SearchMemory
 class WorkflowRequest(BaseModel):
     user_message: str
     memory: SearchMemory
+    # Defaults to memory.session_id, or a new id on the first turn
+    session_id: Optional[str] = None
+    # Result page offset ("show more" on the same search)
+    offset: int = 0
 
 class WorkflowResponse(BaseModel):
     reply: str
@@ -0,0 +1,128 @@
+# rag/api/warmup.py
+
+import os
+import threading
+import time
+import traceback
+from typing import Dict
+
+from rag.llm.response_cache import llm_cache
+from rag.retrieval.runtime import resident_memory_bytes, runtime
+from rag.retrieval.search_product import elapsed_ms
+
+
+# ==========================
+# Config
+# ==========================
+
+# Disable for fast local reloads: WARMUP=false uvicorn rag.api.main:app --reload
+WARMUP_ENABLED = os.getenv("WARMUP", "true").lower() == "true"
+
+WARMUP_QUERY = "piatto bianco"
+WARMUP_SESSION = "__warmup__"
+
+# Must load for the worker to take traffic; the rest is reported only
+REQUIRED_COMPONENTS = ("search_engine", "warm_encode", "warm_search")
+
+
+# ==========================
+# Worker state
+# ==========================
+
+_state: Dict = {
+    "started_at": time.time(),
+    "ready": False,
+    "warmed_up": False,
+    "components": {},
+}
+_lock = threading.Lock()
+
+
+def _run_component(name: str, load) -> bool:
+    started = time.perf_counter()
+    rss_before = resident_memory_bytes()
+
+    try:
+        details = load() or {}
+        status = {"status": "ok", **details}
+    except Exception as e:
+        traceback.print_exc()
+        status = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+
+    status["load_ms"] = elapsed_ms(started)
+    status["rss_delta_bytes"] = resident_memory_bytes() - rss_before
+
+    with _lock:
+        _state["components"][name] = status
+
+    print(f"[WARMUP] {name}: {status['status']} in {status['load_ms']} ms")
+    return status["status"] == "ok"
+
+
+def warm_up():
+    """
+    Load + exercise everything the first request would otherwise pay for.
+    Runs in the FastAPI lifespan, before the app accepts traffic.
+    """
+    from rag.workflow.search_step import get_search_engine
+
+    def load_engine():
+        engine = get_search_engine()
+        return {
+            "components": engine.load_stats,
+            "vector_storage": engine.memory_stats(),
+            "shards": engine.shard_stats(),
+        }
+
+    def warm_encode():
+        get_search_engine().model.encode([WARMUP_QUERY])
+
+    def warm_search():
+        engine = get_search_engine()
+        page = engine.search_page(WARMUP_QUERY, page_size=1, session_id=WARMUP_SESSION)
+        engine.candidate_pools.drop_session(WARMUP_SESSION)
+        return {"results": len(page["results"])}
+
+    def load_llm_client():
+        from rag.llm.openai_client import async_openai_client, openai_client
+        from rag.llm.response_cache import llm_cache
+        openai_client.client  # builds the HTTP clients, no request sent
+        async_openai_client.client
+        llm_cache.conn  # opens the SQLite response cache
+
+    if _run_component("search_engine", load_engine):
+        _run_component("warm_encode", warm_encode)
+        _run_component("warm_search", warm_search)
+
+    _run_component("llm_client", load_llm_client)
+
+    with _lock:
+        components = _state["components"]
+        _state["warmed_up"] = True
+        _state["ready"] = all(
+            components.get(name, {}).get("status") == "ok"
+            for name in REQUIRED_COMPONENTS
+        )
+
+    print("[WARMUP] ready:", _state["ready"])
+
+
+def mark_ready():
+    """
+    Warm-up disabled: components load lazily on the first request.
+    """
+    with _lock:
+        _state["ready"] = True
+
+
+def status() -> Dict:
+    with _lock:
+        return {
+            "ready": _state["ready"],
+            "warmed_up": _state["warmed_up"],
+            "uptime_s": round(time.time() - _state["started_at"], 1),
+            "rss_bytes": resident_memory_bytes(),
+            "components": dict(_state["components"]),
+            "runtime": runtime.stats(),
+            "llm_cache": llm_cache.stats(),
+        }
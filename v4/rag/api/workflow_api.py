@@ -1,16 +1,111 @@
-from rag.workflow.orchestrator import handle_user_message
+import asyncio
+import json
+from typing import AsyncIterator
+from uuid import uuid4
+
+from rag.workflow.events import event_sink
+from rag.workflow.orchestrator import handle_user_message, handle_user_message_async
 from rag.workflow.schemas import SearchMemory
 
 
-def run_workflow(user_message: str, memory: SearchMemory):
+ALLOWED_ATTRS = {"color", "material", "size", "shape"}
+
 
-    ALLOWED_ATTRS = {"color", "material", "size", "shape"}
+def prepare_memory(memory: SearchMemory, session_id: str | None = None) -> SearchMemory:
 
     memory.attributes = {
         k: v for k, v in (memory.attributes or {}).items()
         if k in ALLOWED_ATTRS
     }
 
-   
+    # Returned with the memory, so the client sends it back next turn
+    memory.session_id = session_id or memory.session_id or str(uuid4())
+
+    return memory
+
+
+def run_workflow(
+    user_message: str,
+    memory: SearchMemory,
+    session_id: str | None = None,
+    offset: int = 0,
+):
+
+    return handle_user_message(
+        user_message, prepare_memory(memory, session_id), offset=offset
+    )
+
+
+async def run_workflow_async(
+    user_message: str,
+    memory: SearchMemory,
+    session_id: str | None = None,
+    offset: int = 0,
+):
+
+    return await handle_user_message_async(
+        user_message, prepare_memory(memory, session_id), offset=offset
+    )
+
+
+# ===========================
+# Streaming (SSE)
+# ===========================
+
+def sse_event(event: str, data: dict) -> str:
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+async def stream_workflow(
+    user_message: str,
+    memory: SearchMemory,
+    session_id: str | None = None,
+    offset: int = 0,
+) -> AsyncIterator[str]:
+    """
+    One turn as server-sent events: stage / results / token events as
+    the pipeline produces them, then "done" with the final reply,
+    memory and debug (same fields as /chat).
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    # Stages run in worker threads; hand their events to the loop
+    def sink(event: str, data: dict):
+        loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+    async def run():
+        with event_sink(sink):
+            return await run_workflow_async(user_message, memory, session_id, offset)
+
+    task = asyncio.create_task(run())
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+
+    streamed_text = False
+    yield sse_event("stage", {"stage": "received"})
+
+    while True:
+        item = await queue.get()
+        if item is None:
+            break
+
+        event, data = item
+        streamed_text = streamed_text or event == "token"
+        yield sse_event(event, data)
+
+    try:
+        reply, updated_memory, debug = task.result()
+    except Exception as e:
+        yield sse_event("error", {"error": f"{type(e).__name__}: {e}"})
+        return
+
+    # Template replies are not produced token by token: send them whole
+    if not streamed_text:
+        yield sse_event("token", {"text": reply})
 
-    return handle_user_message(user_message, memory)
+    yield sse_event("done", {
+        "reply": reply,
+        "memory": updated_memory.dict(),
+        "debug": debug,
+    })
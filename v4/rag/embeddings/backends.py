@@ -0,0 +1,262 @@
+# rag/embeddings/backends.py
+
+import hashlib
+import os
+import re
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+
+# ==========================
+# Paths / config
+# ==========================
+
+BASE_DIR = Path(__file__).resolve().parents[1]  # rag/
+
+MODELS_DIR = BASE_DIR / "data" / "models"
+
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# sentence_transformers | onnx | fake
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "sentence_transformers")
+
+ONNX_MAX_SEQ_LENGTH = 256  # all-MiniLM-L6-v2 max_seq_length
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # 0 = onnxruntime default
+
+FAKE_DIM = 384
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype="float32")
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+# ==========================
+# Backends
+# ==========================
+#
+# Every backend exposes:
+#   name         identifies the vector space (cache / index key)
+#   load()       eager load (otherwise done on first encode)
+#   encode(texts, batch_size, show_progress_bar) -> (n, dim) float32,
+#                L2-normalized
+#   dim
+
+class SentenceTransformerBackend:
+    """
+    Reference path: sentence-transformers on PyTorch.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME):
+        self.model_name = model_name
+        self.name = model_name
+        self._model = None
+
+    def load(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name)
+        return self
+
+    @property
+    def dim(self) -> int:
+        return self.load()._model.get_sentence_embedding_dimension()
+
+    def encode(
+        self,
+        texts: List[str],
+        batch_size: int = 64,
+        show_progress_bar: bool = False,
+    ) -> np.ndarray:
+        self.load()
+        vectors = self._model.encode(
+            texts,
+            batch_size=batch_size,
+            show_progress_bar=show_progress_bar,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        )
+        return np.asarray(vectors, dtype="float32")
+
+
+class OnnxBackend:
+    """
+    Same model exported to ONNX and dynamically quantized to int8,
+    run on onnxruntime: no PyTorch at query time.
+
+    The export happens once, on first load, into data/models/.
+    Mean pooling + L2 normalization reproduce sentence-transformers.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, quantize: bool = True):
+        self.model_name = model_name
+        self.quantize = quantize
+        self.name = f"{model_name}@onnx-{'int8' if quantize else 'fp32'}"
+
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.model_dir = MODELS_DIR / f"{slug}-onnx"
+        self.model_path = self.model_dir / ("model.int8.onnx" if quantize else "model.onnx")
+
+        self._session = None
+        self._tokenizer = None
+
+    def export(self):
+        """
+        HF checkpoint → model.onnx (+ model.int8.onnx) and tokenizer files.
+        Needs torch + transformers, only at export time.
+        """
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        hf_name = self.model_name if "/" in self.model_name else f"sentence-transformers/{self.model_name}"
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+        fp32_path = self.model_dir / "model.onnx"
+
+        print(f"📦 Exporting {hf_name} to ONNX...")
+        tokenizer = AutoTokenizer.from_pretrained(hf_name)
+        model = AutoModel.from_pretrained(hf_name).eval()
+        tokenizer.save_pretrained(self.model_dir)
+
+        dummy = tokenizer(["export"], return_tensors="pt")
+        input_names = [k for k in ("input_ids", "attention_mask", "token_type_ids") if k in dummy]
+
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(dummy[k] for k in input_names),
+                str(fp32_path),
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes={
+                    name: {0: "batch", 1: "sequence"}
+                    for name in input_names + ["last_hidden_state"]
+                },
+                opset_version=14,
+            )
+
+        if self.quantize:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            print("⚙️ Quantizing (dynamic int8)...")
+            quantize_dynamic(str(fp32_path), str(self.model_path), weight_type=QuantType.QInt8)
+
+    def load(self):
+        if self._session is not None:
+            return self
+
+        try:
+            import onnxruntime as ort
+            from transformers import AutoTokenizer
+        except ImportError as e:
+            raise ImportError(
+                "EMBEDDING_BACKEND=onnx needs `onnxruntime` and `transformers`"
+            ) from e
+
+        if not self.model_path.exists():
+            self.export()
+
+        options = ort.SessionOptions()
+        if ONNX_THREADS:
+            options.intra_op_num_threads = ONNX_THREADS
+
+        self._tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+        self._session = ort.InferenceSession(
+            str(self.model_path),
+            options,
+            providers=["CPUExecutionProvider"],
+        )
+        self._input_names = {i.name for i in self._session.get_inputs()}
+        return self
+
+    @property
+    def dim(self) -> int:
+        return int(self.load()._session.get_outputs()[0].shape[-1])
+
+    def encode(
+        self,
+        texts: List[str],
+        batch_size: int = 64,
+        show_progress_bar: bool = False,
+    ) -> np.ndarray:
+        self.load()
+        out = []
+
+        for start in range(0, len(texts), batch_size):
+            batch = self._tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=ONNX_MAX_SEQ_LENGTH,
+                return_tensors="np",
+            )
+            feed = {
+                k: v.astype("int64") for k, v in batch.items()
+                if k in self._input_names
+            }
+            hidden = self._session.run(None, feed)[0]
+
+            # mean pooling over real tokens
+            mask = batch["attention_mask"][..., None].astype("float32")
+            pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            out.append(pooled)
+
+        if not out:
+            return np.empty((0, self.dim), dtype="float32")
+
+        return normalize_rows(np.vstack(out))
+
+
+class HashEmbeddingBackend:
+    """
+    Deterministic bag-of-tokens hashing: no model, no I/O.
+    For tests and pipeline dry runs, not for relevance.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, dim: int = FAKE_DIM):
+        self.model_name = model_name
+        self.dim = dim
+        self.name = f"hash-{dim}"
+
+    def load(self):
+        return self
+
+    def _vector(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype="float32")
+
+        for token in re.findall(r"\w+", (text or "").lower()):
+            h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vec[h % self.dim] += 1.0 if (h >> 32) & 1 else -1.0
+
+        return vec
+
+    def encode(
+        self,
+        texts: List[str],
+        batch_size: int = 64,
+        show_progress_bar: bool = False,
+    ) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.dim), dtype="float32")
+        return normalize_rows(np.vstack([self._vector(t) for t in texts]))
+
+
+EMBEDDING_BACKENDS = {
+    "sentence_transformers": SentenceTransformerBackend,
+    "onnx": OnnxBackend,
+    "fake": HashEmbeddingBackend,
+}
+
+
+def get_embedding_backend(name: str | None = None, model_name: str = DEFAULT_MODEL_NAME):
+    name = name or EMBEDDING_BACKEND
+
+    if name not in EMBEDDING_BACKENDS:
+        raise ValueError(
+            f"Unknown embedding backend '{name}'. "
+            f"Expected one of: {sorted(EMBEDDING_BACKENDS)}"
+        )
+
+    return EMBEDDING_BACKENDS[name](model_name)
@@ -0,0 +1,149 @@
+# rag/embeddings/benchmark.py
+#
+# Per-query latency and agreement with the PyTorch reference:
+#   python -m rag.embeddings.benchmark [backend ...]
+
+import json
+import sys
+import time
+
+import numpy as np
+
+from rag.embeddings.backends import (
+    BASE_DIR,
+    DEFAULT_MODEL_NAME,
+    EMBEDDING_BACKENDS,
+    get_embedding_backend,
+)
+
+
+# ==========================
+# Config
+# ==========================
+
+PRODUCTS_PATH = BASE_DIR / "data" / "vector_store" / "products_semantic_v4.jsonl"
+
+REFERENCE_BACKEND = "sentence_transformers"
+NUM_DOCS = 500
+NUM_RUNS = 3
+NEIGHBOURS = 10
+
+QUERIES = [
+    "piatti bianchi per ristorante",
+    "bicchieri da vino in cristallo",
+    "tazze colazione cc 280",
+    "set posate inox",
+    "calici vino",
+    "piatto fondo porcellana",
+    "vassoio rettangolare nero",
+    "caraffa acqua vetro",
+    "tazzine caffè espresso",
+    "ciotola insalata grande",
+]
+
+
+def load_docs(limit: int = NUM_DOCS):
+    docs = []
+    if PRODUCTS_PATH.exists():
+        with PRODUCTS_PATH.open("r", encoding="utf-8") as f:
+            for line in f:
+                text = json.loads(line).get("text", "").strip()
+                if text:
+                    docs.append(text)
+                if len(docs) >= limit:
+                    break
+    return docs
+
+
+def percentile_ms(samples, q) -> float:
+    return round(float(np.percentile(samples, q)) * 1000, 2)
+
+
+# ==========================
+# Benchmark
+# ==========================
+
+def bench_backend(backend, queries, docs) -> dict:
+    started = time.perf_counter()
+    backend.load()
+    load_s = round(time.perf_counter() - started, 2)
+
+    backend.encode(queries[:1])  # warm-up
+
+    # One query at a time, as in a chat turn
+    latencies = []
+    for _ in range(NUM_RUNS):
+        for query in queries:
+            started = time.perf_counter()
+            backend.encode([query], batch_size=1)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    doc_vecs = backend.encode(docs) if docs else None
+    docs_s = time.perf_counter() - started
+
+    return {
+        "load_s": load_s,
+        "query_p50_ms": percentile_ms(latencies, 50),
+        "query_p95_ms": percentile_ms(latencies, 95),
+        "docs_per_s": round(len(docs) / docs_s, 1) if docs else None,
+        "query_vecs": backend.encode(queries),
+        "doc_vecs": doc_vecs,
+    }
+
+
+def agreement(run: dict, reference: dict) -> dict:
+    """
+    Cosine between the two encodings of each text, and overlap of the
+    top-NEIGHBOURS documents per query.
+    """
+    cos = np.sum(run["query_vecs"] * reference["query_vecs"], axis=1)
+    report = {
+        "query_cos_mean": round(float(cos.mean()), 4),
+        "query_cos_min": round(float(cos.min()), 4),
+    }
+
+    if run["doc_vecs"] is not None:
+        doc_cos = np.sum(run["doc_vecs"] * reference["doc_vecs"], axis=1)
+        report["doc_cos_mean"] = round(float(doc_cos.mean()), 4)
+
+        k = min(NEIGHBOURS, len(run["doc_vecs"]))
+        top = np.argsort(-(run["query_vecs"] @ run["doc_vecs"].T), axis=1)[:, :k]
+        ref_top = np.argsort(-(reference["query_vecs"] @ reference["doc_vecs"].T), axis=1)[:, :k]
+        overlap = [len(set(a) & set(b)) / k for a, b in zip(top, ref_top)]
+        report[f"top{k}_overlap"] = round(float(np.mean(overlap)), 3)
+
+    return report
+
+
+def run(backend_names=None):
+    backend_names = backend_names or list(EMBEDDING_BACKENDS)
+    if REFERENCE_BACKEND not in backend_names:
+        backend_names = [REFERENCE_BACKEND] + backend_names
+
+    docs = load_docs()
+    print(f"📦 {len(QUERIES)} queries, {len(docs)} product texts")
+
+    runs = {}
+    for name in backend_names:
+        backend = get_embedding_backend(name, model_name=DEFAULT_MODEL_NAME)
+        try:
+            runs[name] = bench_backend(backend, QUERIES, docs)
+        except ImportError as e:
+            print(f"⚠️ {name}: skipped ({e})")
+
+    reference = runs.get(REFERENCE_BACKEND)
+
+    print("\n================ EMBEDDING BENCHMARK ================")
+    for name, result in runs.items():
+        row = {k: v for k, v in result.items() if not k.endswith("_vecs")}
+        if reference is not None and name != REFERENCE_BACKEND:
+            row.update(agreement(result, reference))
+        print(f"{name:>22}: {row}")
+    print("=====================================================\n")
+
+    return runs
+
+
+if __name__ == "__main__":
+    run(sys.argv[1:] or None)
@@ -1,9 +1,32 @@
+import hashlib
 import json
+import multiprocessing
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from rag.indexing.embedding_cache import EmbeddingCache
+from rag.indexing.index_factory import (
+    REMOVABLE_MODES,
+    build_index,
+    faiss_id,
+    load_index_config,
+    resolve_config,
+    save_index_config,
+)
+from rag.ingestion.product_semantic_v4 import FIELD_KINDS, build_field_texts
+from rag.retrieval.attribute_index import AttributeIndex
+from rag.retrieval.catalog_columns import build_columns, save_columns
+from rag.retrieval.lexical_index import LexicalIndex
+from rag.retrieval.metadata_store import write_metadata_store
+from rag.retrieval.product_neighbours import NEIGHBOURS, build_neighbours, update_neighbours
+from rag.retrieval.runtime import runtime
+from rag.retrieval.shard_router import shard_groups
+from rag.retrieval.variant_groups import build_variant_groups, regrouped_rows
 
 
 # ==========================
@@ -11,9 +34,27 @@ from sentence_transformers import SentenceTransformer
 # ==========================
 
 INPUT_PATH = Path("rag/data/vector_store/products_semantic_v4.jsonl")
+STRUCTURED_PATH = Path("rag/data/vector_store/structured_products_v4.json")
 
 INDEX_PATH = Path("rag/data/vector_store/faiss_products.index")
+INDEX_CONFIG_PATH = Path("rag/data/vector_store/faiss_products_index.json")
+VECTORS_PATH = Path("rag/data/vector_store/faiss_products_vectors.npy")
 META_PATH = Path("rag/data/vector_store/faiss_products_meta.json")
+META_STORE_PATH = Path("rag/data/vector_store/faiss_products_meta.bin")
+POSTINGS_PATH = Path("rag/data/vector_store/faiss_products_postings.json")
+LEXICAL_PATH = Path("rag/data/vector_store/faiss_products_lexical.npz")
+HASHES_PATH = Path("rag/data/vector_store/faiss_products_hashes.json")
+ROW_IDS_PATH = Path("rag/data/vector_store/faiss_products_ids.npy")
+COLUMNS_PATH = Path("rag/data/vector_store/faiss_products_columns.npz")
+FIELD_INDEX_PATH = Path("rag/data/vector_store/faiss_products_fields.index")
+FIELD_MAP_PATH = Path("rag/data/vector_store/faiss_products_fields.npz")
+SHARD_DIR = Path("rag/data/vector_store/shards")
+SHARD_MANIFEST_PATH = Path("rag/data/vector_store/faiss_products_shards.npz")
+VARIANTS_PATH = Path("rag/data/vector_store/faiss_products_variants.npy")
+NEIGHBOURS_PATH = Path("rag/data/vector_store/faiss_products_neighbours.npy")
+NEIGHBOUR_SCORES_PATH = Path("rag/data/vector_store/faiss_products_neighbour_scores.npy")
+
+EMBED_CACHE_DIR = Path("rag/data/embedding_cache")
 
 INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
 
@@ -24,24 +65,80 @@ INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
 MODEL_NAME = "all-MiniLM-L6-v2"
 BATCH_SIZE = 64
 
+# Content-addressed embedding cache: only unseen texts are encoded
+USE_EMBED_CACHE = os.getenv("EMBED_CACHE", "true").lower() == "true"
+
+# Full builds stream the catalog in chunks; chunks are encoded by
+# EMBED_WORKERS processes (0 = all cores, 1 = in-process).
+STREAM_CHUNK_SIZE = 4096
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "1"))
+
+# Multi-vector index: one vector per product field (see FIELD_KINDS)
+BUILD_FIELD_INDEX = os.getenv("FIELD_INDEX", "false").lower() == "true"
+
+# One index per product_type group (see shard_router)
+BUILD_SHARDS = os.getenv("SHARDS", "false").lower() == "true"
+
+# Near-duplicate variant groups (see variant_groups)
+BUILD_VARIANTS = os.getenv("VARIANTS", "true").lower() == "true"
+
+# Product → product kNN graph ("similar items", relaxation fallback)
+BUILD_NEIGHBOURS = os.getenv("NEIGHBOURS", "true").lower() == "true"
+
+# Index type: flat | ivf_flat | ivf_pq | hnsw | sq8 | fp16 | pq
+# (knobs in index_factory)
+INDEX_CONFIG = {
+    "mode": os.getenv("INDEX_MODE", "flat"),
+    "rerank": os.getenv("INDEX_RERANK", "false").lower() == "true",
+}
+
 
 # ==========================
-# Main
+# Helpers
 # ==========================
 
-def run():
-    if not INPUT_PATH.exists():
-        print("❌ Semantic products file not found.")
-        print(f"Expected at: {INPUT_PATH}")
-        return
+def load_structured_products() -> dict:
+    """
+    product_id -> structured product (for attribute posting lists).
+    """
+    if not STRUCTURED_PATH.exists():
+        print(f"⚠️ Structured products not found at {STRUCTURED_PATH}")
+        print("⚠️ Attribute index will be skipped (search runs unfiltered).")
+        return {}
 
-    print("🧠 Loading embedding model...")
-    model = SentenceTransformer(MODEL_NAME)
+    products = json.loads(STRUCTURED_PATH.read_text(encoding="utf-8"))
+    return {str(p.get("id")): p for p in products}
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def write_atomic(path: Path, write):
+    """
+    Write to a temp file and rename: processes that memory-map the old
+    file keep a valid view until they reload.
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+    write(tmp_path)
+    os.replace(tmp_path, path)
 
-    texts = []
-    metadata = []
 
-    print("📦 Reading semantic products...")
+def save_array(path: Path, array: np.ndarray):
+    def write(tmp_path: Path):
+        with tmp_path.open("wb") as f:
+            np.save(f, array)
+
+    write_atomic(path, write)
+
+
+def iter_records(warn: bool = True):
+    """
+    Semantic records in FAISS row order (one row per product_id),
+    read line by line.
+    """
+    seen = set()
+
     with INPUT_PATH.open("r", encoding="utf-8") as f:
         for line in f:
             record = json.loads(line)
@@ -50,62 +147,645 @@ def run():
             if not text:
                 continue
 
+            product_id = str(record.get("product_id"))
+            if product_id in seen:
+                if warn:
+                    print(f"⚠️ Duplicate product_id {product_id} skipped")
+                continue
+            seen.add(product_id)
+
+            record["text"] = text
+            yield record
+
+
+def iter_semantic_products(warn: bool = True):
+    """
+    (text, metadata) pairs in FAISS row order.
+    """
+    for record in iter_records(warn):
+        yield record["text"], {
+            "product_id": record.get("product_id"),
+            "category": record.get("category"),
+            "source": record.get("source"),
+            "url": record.get("url"),
+            "images": record.get("images", []),
+        }
+
+
+def iter_field_records(warn: bool = True):
+    """
+    (field text, (product row, field kind)) for every non-empty field.
+    """
+    for row, record in enumerate(iter_records(warn)):
+        fields = build_field_texts(record["text"], record.get("use_cases"))
+
+        for kind, text in fields.items():
+            yield text, (row, FIELD_KINDS.index(kind))
+
+
+def read_semantic_products():
+    """
+    texts + metadata in FAISS row order (one row per product_id).
+    """
+    texts = []
+    metadata = []
+
+    for text, meta in iter_semantic_products():
+        texts.append(text)
+        metadata.append(meta)
+
+    return texts, metadata
+
+
+def iter_chunks(items, size: int):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def encode_texts(model, texts):
+    # Backends load lazily: a fully cached build never loads the model
+    def encode(batch):
+        return model.encode(batch, batch_size=BATCH_SIZE, show_progress_bar=True)
+
+    if not USE_EMBED_CACHE:
+        return encode(texts)
+
+    return EmbeddingCache(EMBED_CACHE_DIR, model.name).encode(texts, encode)
+
+
+# ==========================
+# Streaming (parallel) encode
+# ==========================
+
+_worker_model = None
+
+
+def _init_worker(backend_cls, model_name: str, threads: int):
+    # Split the cores between workers instead of oversubscribing them
+    global _worker_model
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+
+    from rag.embeddings import backends
+    backends.ONNX_THREADS = threads
+
+    _worker_model = backend_cls(model_name).load()
+
+
+def _encode_chunk(texts):
+    return _worker_model.encode(texts, batch_size=BATCH_SIZE)
+
+
+def resolve_workers(workers: int | None) -> int:
+    workers = EMBED_WORKERS if workers is None else workers
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def stream_embeddings(
+    model,
+    workers: int = 1,
+    records=iter_semantic_products,
+    vectors_tmp: Path = VECTORS_PATH.with_name(VECTORS_PATH.name + ".tmp"),
+):
+    """
+    Chunked read → encode (worker pool) → float32 .npy memory map.
+
+    At most 2 * workers chunks are in flight and vectors go straight to
+    disk, so the encode stage holds no float matrix of the catalog.
+    Texts and payloads are still collected for the later stages
+    (metadata files, BM25, hashes): the build's RAM stays O(N) in text
+    size, not in N * dim floats. records yields (text, payload); returns
+    texts, payloads and the memory-mapped vectors (row order, written to
+    vectors_tmp).
+    """
+    total = sum(1 for _ in records(warn=False))
+    if total == 0:
+        return [], [], None
+
+    cache = EmbeddingCache(EMBED_CACHE_DIR, model.name) if USE_EMBED_CACHE else None
+
+    texts, metadata = [], []
+    state = {"vectors": None, "row": 0, "encoded": 0}
+
+    pool = None
+    if workers > 1:
+        print(f"🧵 Encoding with {workers} worker processes")
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        pool = ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(type(model), model.model_name, threads),
+        )
+
+    def submit(chunk):
+        chunk_texts = [text for text, _ in chunk]
+        missing = cache.missing(chunk_texts) if cache is not None else chunk_texts
+
+        job = None
+        if missing and pool is not None:
+            job = pool.submit(_encode_chunk, missing)
+
+        return chunk, chunk_texts, missing, job
+
+    def drain(entry):
+        chunk, chunk_texts, missing, job = entry
+
+        encoded = None
+        if missing:
+            encoded = job.result() if job is not None else model.encode(missing, batch_size=BATCH_SIZE)
+            state["encoded"] += len(missing)
+
+        if cache is not None:
+            if missing:
+                cache.add(missing, encoded)
+            chunk_vectors = cache.get(chunk_texts)
+        else:
+            chunk_vectors = encoded
+
+        if state["vectors"] is None:
+            state["vectors"] = np.lib.format.open_memmap(
+                vectors_tmp, mode="w+", dtype="float32",
+                shape=(total, chunk_vectors.shape[1]),
+            )
+
+        row = state["row"]
+        state["vectors"][row:row + len(chunk)] = chunk_vectors
+        state["row"] = row + len(chunk)
+
+        for text, meta in chunk:
             texts.append(text)
-            metadata.append({
-                "product_id": record.get("product_id"),
-                "category": record.get("category"),
-                "source": record.get("source"),
-                "url": record.get("url"),
-                "images": record.get("images", []),
-            })
+            metadata.append(meta)
+
+        print(f"⚙️ Embedded {state['row']}/{total} ({state['encoded']} encoded)")
+
+    try:
+        inflight = deque()
+
+        for chunk in iter_chunks(records(), STREAM_CHUNK_SIZE):
+            inflight.append(submit(chunk))
+            if len(inflight) >= 2 * max(workers, 1):
+                drain(inflight.popleft())
+
+        while inflight:
+            drain(inflight.popleft())
+
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    state["vectors"].flush()
+    return texts, metadata, state["vectors"]
+
+
+def save_vectors(vectors, keep: bool):
+    """
+    Publish the float matrix as VECTORS_PATH (re-rank), or drop the
+    streaming temp file when it is not needed.
+    """
+    vectors_tmp = VECTORS_PATH.with_name(VECTORS_PATH.name + ".tmp")
+
+    if isinstance(vectors, np.memmap):
+        vectors.flush()
+        if keep:
+            os.replace(vectors_tmp, VECTORS_PATH)
+        else:
+            vectors_tmp.unlink(missing_ok=True)
+        return
+
+    if keep:
+        save_array(VECTORS_PATH, np.asarray(vectors, dtype="float32"))
+
+
+# ==========================
+# Multi-vector (field) index
+# ==========================
+
+def build_field_index(model, config: dict, workers: int = 1):
+    """
+    One vector per product field (title, attribute line, use-case line),
+    same index type as the product index. The map
+    file gives the product row and field kind of every field vector.
+    Unchanged fields are embedding-cache hits.
+
+    Returns (product row per field vector, memory-mapped field vectors);
+    the caller drops the temp file with discard_vectors.
+    """
+    vectors_tmp = FIELD_INDEX_PATH.with_name(FIELD_INDEX_PATH.name + ".vectors.tmp")
+
+    print("🧩 Embedding product fields...")
+    _, payloads, vectors = stream_embeddings(model, workers, iter_field_records, vectors_tmp)
+
+    if vectors is None:
+        return None, None
+
+    field_config = {**config, "id_map": False, "rerank": False}
+    print(f"📥 Building field index ({field_config['mode']}, {len(payloads)} vectors)...")
+    index = build_index(vectors, field_config)
+
+    write_atomic(FIELD_INDEX_PATH, lambda path: faiss.write_index(index, str(path)))
+
+    def write_map(tmp_path: Path):
+        with tmp_path.open("wb") as f:
+            np.savez(
+                f,
+                rows=np.array([row for row, _ in payloads], dtype="int32"),
+                kinds=np.array([kind for _, kind in payloads], dtype="int8"),
+                names=np.array(FIELD_KINDS),
+            )
+
+    write_atomic(FIELD_MAP_PATH, write_map)
+    print(f"📁 Field index: {FIELD_INDEX_PATH}")
+
+    return np.array([row for row, _ in payloads], dtype="int64"), vectors
+
+
+def discard_vectors(vectors):
+    if isinstance(vectors, np.memmap):
+        path = Path(vectors.filename)
+        del vectors
+        path.unlink(missing_ok=True)
+
+
+# ==========================
+# Sharded indexes
+# ==========================
+
+def build_shards(
+    products: list,
+    unit_kind: str,
+    unit_rows: np.ndarray,
+    unit_vectors: np.ndarray,
+    config: dict,
+):
+    """
+    One index per product_type group over "units" (product vectors, or
+    field vectors when the multi-vector index is built). Shard indexes
+    are labelled by local position; the manifest maps them back to
+    unit ids, product rows and a centroid per shard for routing.
+    """
+    groups = shard_groups(products)
+    names = list(groups)
+
+    row_shard = np.full(len(products), -1, dtype="int32")
+    for shard, rows in enumerate(groups.values()):
+        row_shard[rows] = shard
+
+    # Units grouped by shard, ascending unit id inside each shard
+    unit_shard = row_shard[unit_rows]
+    units = np.argsort(unit_shard, kind="stable")
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(unit_shard, minlength=len(names)))])
+
+    SHARD_DIR.mkdir(parents=True, exist_ok=True)
+    for stale in SHARD_DIR.glob("*.index"):
+        if stale.stem not in groups:
+            stale.unlink()
+
+    centroids = []
+    modes = []
+    print(f"🧱 Building {len(names)} shards over {unit_kind}...")
+
+    for shard, name in enumerate(names):
+        shard_units = units[offsets[shard]:offsets[shard + 1]]
+        vectors = np.ascontiguousarray(unit_vectors[shard_units], dtype="float32")
+
+        shard_config = {**config, "id_map": False, "rerank": False}
+        if config["mode"] in ("ivf_pq", "pq") and len(vectors) < 2 ** config["pq_bits"]:
+            shard_config["mode"] = "flat"  # too few vectors to train the PQ codebooks
+
+        index = build_index(vectors, shard_config)
+        modes.append(shard_config["mode"])
+        write_atomic(SHARD_DIR / f"{name}.index", lambda path: faiss.write_index(index, str(path)))
+
+        centroid = vectors.mean(axis=0)
+        centroids.append(centroid / max(float(np.linalg.norm(centroid)), 1e-12))
+        print(f"   {name}: {len(groups[name])} products, {shard_units.size} vectors")
+
+    def write_manifest(tmp_path: Path):
+        with tmp_path.open("wb") as f:
+            np.savez(
+                f,
+                names=np.array(names),
+                offsets=offsets.astype("int64"),
+                units=units.astype("int64"),
+                row_shard=row_shard,
+                centroids=np.vstack(centroids).astype("float32"),
+                unit_kind=np.array(unit_kind),
+                modes=np.array(modes),
+            )
+
+    write_atomic(SHARD_MANIFEST_PATH, write_manifest)
+    print(f"📁 Shards: {SHARD_DIR}")
+
+
+# ==========================
+# Incremental update
+# ==========================
+
+def load_for_update(config: dict, requested: dict, model_name: str):
+    """
+    Existing index + config when an in-place update is possible,
+    otherwise (None, config) → full rebuild.
+    """
+    if not all(path.exists() for path in (INDEX_PATH, INDEX_CONFIG_PATH, HASHES_PATH, ROW_IDS_PATH)):
+        print("ℹ️ No previous build found → full rebuild")
+        return None, config
+
+    existing = load_index_config(INDEX_CONFIG_PATH)
+
+    reasons = []
+    if not existing["id_map"]:
+        reasons.append("index is not keyed by product_id")
+    if existing["mode"] not in REMOVABLE_MODES:
+        reasons.append(f"mode '{existing['mode']}' cannot remove vectors")
+    if existing.get("model_name") != model_name:
+        reasons.append("embedding model changed")
+    if requested.get("mode") and requested["mode"] != existing["mode"]:
+        reasons.append("index mode changed")
+    if existing["rerank"] and not VECTORS_PATH.exists():
+        reasons.append("re-rank vectors missing")
+
+    if reasons:
+        print("ℹ️ Full rebuild:", "; ".join(reasons))
+        return None, config
+
+    return faiss.read_index(str(INDEX_PATH)), existing
+
+
+def stored_vectors(index, labels) -> np.ndarray:
+    """
+    Vectors of labels read back from the IndexIDMap2: exact for flat,
+    the decoded approximation for sq8 / fp16.
+    """
+    return index.reconstruct_batch(np.asarray(labels, dtype="int64"))
+
+
+def apply_update(index, config: dict, model, texts, metadata, ids, hashes):
+    """
+    Add / replace / remove only the products whose semantic text changed.
+
+    Returns (vectors, previous, changed): the full float matrix in row
+    order (only changed rows encoded; the others from the re-rank file
+    or the index), the old row of every row (-1 = new product) and the
+    mask of rows with a new vector.
+    """
+    old_hashes = json.loads(HASHES_PATH.read_text(encoding="utf-8"))
+
+    pids = [str(m["product_id"]) for m in metadata]
+    changed = np.array([old_hashes.get(pid) != hashes[pid] for pid in pids], dtype=bool)
+    replaced = [row for row in np.flatnonzero(changed) if pids[row] in old_hashes]
+    removed = [pid for pid in old_hashes if pid not in hashes]
+
+    print(
+        f"🔁 Update: {changed.sum() - len(replaced)} new, {len(replaced)} changed, "
+        f"{len(removed)} removed, {len(pids) - changed.sum()} unchanged"
+    )
+
+    # Old row of every product (-1 = new)
+    old_ids = np.load(ROW_IDS_PATH)
+    order = np.argsort(old_ids)
+    pos = order[np.searchsorted(old_ids[order], ids).clip(max=len(old_ids) - 1)]
+    previous = np.where(old_ids[pos] == ids, pos, -1)
+
+    stale = [faiss_id(pid) for pid in removed] + [int(ids[row]) for row in replaced]
+    if stale:
+        index.remove_ids(np.array(stale, dtype="int64"))
+
+    # Unchanged products keep their vectors: never re-encoded
+    if config["rerank"]:
+        vectors = np.asarray(np.load(VECTORS_PATH, mmap_mode="r")[previous.clip(min=0)], dtype="float32")
+    else:
+        vectors = np.zeros((len(ids), index.d), dtype="float32")
+        vectors[~changed] = stored_vectors(index, ids[~changed])
+
+    if changed.any():
+        print("⚙️ Embedding changed products...")
+        new_embeddings = encode_texts(model, [texts[row] for row in np.flatnonzero(changed)])
+        index.add_with_ids(new_embeddings, ids[changed])
+        vectors[changed] = new_embeddings
+
+    return vectors, previous, changed
+
+
+def refresh_neighbours(vectors, groups, old_groups, index, ids, config: dict, previous, changed):
+    """
+    update_neighbours over the previous graph, or None when it cannot
+    be reused (missing, other NEIGHBOURS, variants switched on / off).
+    """
+    if not (NEIGHBOURS_PATH.exists() and NEIGHBOUR_SCORES_PATH.exists()):
+        return None
+    if (groups is None) != (old_groups is None):
+        return None
+
+    old_rows = np.load(NEIGHBOURS_PATH)
+    old_scores = np.load(NEIGHBOUR_SCORES_PATH)
+    if old_rows.shape[1] != NEIGHBOURS or len(old_rows) <= previous.max(initial=-1):
+        return None
+    if old_groups is not None and len(old_groups) != len(old_rows):
+        return None
+
+    regrouped = None if groups is None else regrouped_rows(groups, old_groups, previous)
+
+    return update_neighbours(
+        vectors, previous, old_rows, old_scores, changed,
+        groups, regrouped, index, ids if config["id_map"] else None,
+    )
+
+
+
+
+# ==========================
+# Main
+# ==========================
+
+def run(
+    index_config: dict | None = None,
+    update: bool = False,
+    workers: int | None = None,
+):
+    requested = {**INDEX_CONFIG, **(index_config or {})}
+    config = resolve_config(requested)
+
+    if not INPUT_PATH.exists():
+        print("❌ Semantic products file not found.")
+        print(f"Expected at: {INPUT_PATH}")
+        return
+
+    # Loaded on the first cache miss; shared if the engine already holds it
+    model = runtime.model(model_name=MODEL_NAME, load=False)
+    print(f"🧠 Embedding backend: {model.name}")
+
+    index = None
+    if update:
+        index, config = load_for_update(config, index_config or {}, model.name)
+
+    if index is not None:
+        # ==========================
+        # Incremental update (diff only)
+        # ==========================
+        print("📦 Reading semantic products...")
+        texts, metadata = read_semantic_products()
+
+    else:
+        # ==========================
+        # Generate embeddings (streamed)
+        # ==========================
+        print("📦 Streaming semantic products...")
+        texts, metadata, vectors = stream_embeddings(model, resolve_workers(workers))
 
     total = len(texts)
-    print(f"🧾 Products to embed: {total}")
+    print(f"🧾 Products: {total}")
 
     if total == 0:
         print("❌ No products to embed.")
         return
 
-    # ==========================
-    # Generate embeddings
-    # ==========================
+    ids = np.array([faiss_id(m["product_id"]) for m in metadata], dtype="int64")
+    hashes = {
+        str(m["product_id"]): text_hash(text)
+        for m, text in zip(metadata, texts)
+    }
 
-    print("⚙️ Generating embeddings...")
-    embeddings = model.encode(
-        texts,
-        batch_size=BATCH_SIZE,
-        show_progress_bar=True,
-        convert_to_numpy=True,
-        normalize_embeddings=True,
-    )
+    previous = changed = None
 
-    dim = embeddings.shape[1]
-    print(f"📐 Embedding dimension: {dim}")
+    if index is not None:
+        vectors, previous, changed = apply_update(index, config, model, texts, metadata, ids, hashes)
+        dim = index.d
 
-    # ==========================
-    # Build FAISS index
-    # ==========================
+    else:
+        dim = vectors.shape[1]
+        print(f"📐 Embedding dimension: {dim}")
+
+        # ==========================
+        # Build FAISS index
+        # ==========================
 
-    print("📥 Building FAISS index...")
-    index = faiss.IndexFlatIP(dim)  # cosine similarity
-    index.add(embeddings)
+        print(f"📥 Building FAISS index ({config['mode']})...")
+        index = build_index(vectors, config, ids)  # cosine similarity
 
     # ==========================
     # Save artifacts
     # ==========================
 
     print("💾 Saving FAISS index...")
-    faiss.write_index(index, str(INDEX_PATH))
+    write_atomic(INDEX_PATH, lambda path: faiss.write_index(index, str(path)))
+    save_index_config(INDEX_CONFIG_PATH, config, dim, index.ntotal, model.name)
+
+    with HASHES_PATH.open("w", encoding="utf-8") as f:
+        json.dump(hashes, f)
+
+    # FAISS label of every metadata row (label → row lookup in the engine)
+    save_array(ROW_IDS_PATH, ids)
 
     print("💾 Saving metadata...")
     with META_PATH.open("w", encoding="utf-8") as f:
         json.dump(metadata, f, ensure_ascii=False, indent=2)
 
+    # Compact binary copy: memory-mapped by the search engine
+    write_atomic(META_STORE_PATH, lambda path: write_metadata_store(path, metadata))
+
+    # ==========================
+    # Multi-vector field index
+    # ==========================
+
+    field_rows = field_vectors = None
+
+    if BUILD_FIELD_INDEX:
+        field_rows, field_vectors = build_field_index(model, config, resolve_workers(workers))
+
+    # ==========================
+    # Sharded indexes (product_type groups)
+    # ==========================
+
+    structured = load_structured_products()
+    products = [structured.get(str(m["product_id"])) for m in metadata] if structured else []
+
+    if BUILD_SHARDS and products:
+        if field_vectors is not None:
+            build_shards(products, "fields", field_rows, field_vectors, config)
+        else:
+            build_shards(products, "products", np.arange(total), vectors, config)
+
+    discard_vectors(field_vectors)
+
+    # ==========================
+    # Variant groups (near-duplicates)
+    # ==========================
+
+    groups = old_groups = None
+
+    if BUILD_VARIANTS and products:
+        if previous is not None and VARIANTS_PATH.exists():
+            old_groups = np.load(VARIANTS_PATH)
+
+        # Block-local pass (no kNN search): cheap enough to redo on update
+        print("🧬 Grouping near-duplicate variants...")
+        groups = build_variant_groups(products, vectors)
+        save_array(VARIANTS_PATH, groups)
+        print(f"📁 Variant groups: {len(np.unique(groups))} for {total} products")
+
+    # ==========================
+    # Product kNN graph
+    # ==========================
+
+    if BUILD_NEIGHBOURS:
+        print("🕸️ Computing product neighbours...")
+        graph = None
+        if previous is not None:
+            graph = refresh_neighbours(vectors, groups, old_groups, index, ids, config, previous, changed)
+
+        neighbours, neighbour_scores = graph or build_neighbours(
+            vectors, groups, index, ids if config["id_map"] else None
+        )
+        save_array(NEIGHBOURS_PATH, neighbours)
+        save_array(NEIGHBOUR_SCORES_PATH, neighbour_scores)
+        print(f"📁 Neighbours: {NEIGHBOURS_PATH} {neighbours.shape}")
+
+    if config["rerank"]:
+        print("💾 Saving float vectors for re-ranking...")
+    save_vectors(vectors, keep=config["rerank"])
+
+    # ==========================
+    # Lexical (BM25) index
+    # ==========================
+
+    # text already starts with "Product: <title>"
+    print("🔤 Building BM25 index...")
+    LexicalIndex.build(texts).save(LEXICAL_PATH)
+    print(f"📁 Lexical index: {LEXICAL_PATH}")
+
+    # ==========================
+    # Attribute posting lists
+    # ==========================
+
+    if products:
+        print("🗂️ Building attribute index...")
+        attribute_index = AttributeIndex.build(products)
+        attribute_index.save(POSTINGS_PATH)
+        print(f"📁 Postings: {POSTINGS_PATH}")
+
+        # Numeric columns for the feature re-ranker
+        columns = build_columns(products)
+        write_atomic(COLUMNS_PATH, lambda path: save_columns(path, columns))
+        print(f"📁 Catalog columns: {COLUMNS_PATH}")
+
     print("🎉 DONE")
     print(f"🔢 Vectors stored: {index.ntotal}")
-    print(f"📁 Index: {INDEX_PATH}")
+    print(f"📁 Index: {INDEX_PATH} ({config['mode']})")
     print(f"📁 Metadata: {META_PATH}")
+    print(f"📁 Metadata store: {META_STORE_PATH}")
 
 
 if __name__ == "__main__":
-    run()
+    # python -m rag.indexing.embed_products [--update] [--workers N]
+    cli_workers = None
+    if "--workers" in sys.argv:
+        cli_workers = int(sys.argv[sys.argv.index("--workers") + 1])
+
+    run(update="--update" in sys.argv, workers=cli_workers)
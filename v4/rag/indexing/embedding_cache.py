@@ -0,0 +1,161 @@
+# rag/indexing/embedding_cache.py
+
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+
+
+# ==========================
+# On-disk layout (per model)
+# ==========================
+#
+#   <model>.json   {"model_name", "dim"}
+#   <model>.f16    append-only float16 matrix, one row per text
+#   <model>.keys   append-only uint64 text hashes, same row order
+#
+# Rows are never rewritten, so the matrix can stay memory-mapped.
+# A row is valid only once both its vector and its key are written.
+
+
+def text_key(model_name: str, text: str) -> int:
+    digest = hashlib.blake2b(
+        f"{model_name}\x00{text}".encode("utf-8"), digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "little")
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache keyed by (model name, text hash).
+    """
+
+    def __init__(self, cache_dir: Path, model_name: str):
+        self.model_name = model_name
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self.meta_path = cache_dir / f"{slug}.json"
+        self.vectors_path = cache_dir / f"{slug}.f16"
+        self.keys_path = cache_dir / f"{slug}.keys"
+
+        self.dim = None
+        if self.meta_path.exists():
+            self.dim = json.loads(self.meta_path.read_text(encoding="utf-8"))["dim"]
+
+        self._reload()
+
+    # --------------------------
+
+    def _reload(self):
+        if self.dim is None or not self.keys_path.exists():
+            self.n = 0
+            self._vectors = np.empty((0, self.dim or 0), dtype="float16")
+            self._sorted_keys = np.empty(0, dtype="<u8")
+            self._key_rows = np.empty(0, dtype="int64")
+            return
+
+        keys = np.fromfile(self.keys_path, dtype="<u8")
+        rows_on_disk = self.vectors_path.stat().st_size // (2 * self.dim)
+        self.n = min(len(keys), rows_on_disk)  # ignore a torn tail
+
+        self._vectors = (
+            np.memmap(self.vectors_path, dtype="float16", mode="r", shape=(self.n, self.dim))
+            if self.n else np.empty((0, self.dim), dtype="float16")
+        )
+
+        keys = keys[:self.n]
+        self._key_rows = np.argsort(keys, kind="stable")
+        self._sorted_keys = keys[self._key_rows]
+
+    def lookup(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Cache row per key, -1 when missing.
+        """
+        if not self.n:
+            return np.full(len(keys), -1, dtype="int64")
+
+        pos = np.searchsorted(self._sorted_keys, keys).clip(max=self.n - 1)
+        found = self._sorted_keys[pos] == keys
+
+        return np.where(found, self._key_rows[pos], -1)
+
+    def _append(self, keys: np.ndarray, vectors: np.ndarray):
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+            self.meta_path.write_text(
+                json.dumps({"model_name": self.model_name, "dim": self.dim}),
+                encoding="utf-8",
+            )
+
+        # Drop a torn tail before appending
+        if self.vectors_path.exists():
+            with self.vectors_path.open("r+b") as f:
+                f.truncate(self.n * self.dim * 2)
+        if self.keys_path.exists():
+            with self.keys_path.open("r+b") as f:
+                f.truncate(self.n * 8)
+
+        with self.vectors_path.open("ab") as f:
+            f.write(np.ascontiguousarray(vectors, dtype="float16").tobytes())
+        with self.keys_path.open("ab") as f:
+            f.write(np.ascontiguousarray(keys, dtype="<u8").tobytes())
+
+        self._reload()
+
+    # --------------------------
+
+    def _keys(self, texts: List[str]) -> np.ndarray:
+        return np.array([text_key(self.model_name, t) for t in texts], dtype="<u8")
+
+    def missing(self, texts: List[str]) -> List[str]:
+        """
+        Distinct texts with no cached vector.
+        """
+        rows = self.lookup(self._keys(texts))
+        return list(dict.fromkeys(texts[i] for i in np.flatnonzero(rows < 0)))
+
+    def add(self, texts: List[str], vectors: np.ndarray):
+        keys = self._keys(texts)
+        new = self.lookup(keys) < 0
+
+        if new.any():
+            self._append(keys[new], np.asarray(vectors)[new])
+
+    def get(self, texts: List[str]) -> np.ndarray:
+        """
+        Cached embeddings (float32, input order). Every text must be cached.
+        Rows are re-normalized after the float16 round trip.
+        """
+        rows = self.lookup(self._keys(texts))
+
+        if (rows < 0).any():
+            raise KeyError(f"{int((rows < 0).sum())} texts not in the embedding cache")
+
+        vectors = np.asarray(self._vectors[rows], dtype="float32")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+
+        return vectors / np.maximum(norms, 1e-12)
+
+    def encode(
+        self,
+        texts: List[str],
+        encode_fn: Callable[[List[str]], np.ndarray],
+    ) -> np.ndarray:
+        """
+        Embeddings for texts (float32, input order).
+        Only texts never seen with this model reach encode_fn, which
+        must return normalized embeddings.
+        """
+        missing = self.missing(texts)
+
+        print(f"🗃️ Embedding cache: {len(texts) - len(missing)} hits, "
+              f"{len(missing)} texts to encode")
+
+        if missing:
+            self.add(missing, encode_fn(missing))
+
+        return self.get(texts)
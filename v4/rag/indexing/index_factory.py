@@ -0,0 +1,241 @@
+# rag/indexing/index_factory.py
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict
+
+import faiss
+import numpy as np
+
+
+# ==========================
+# Config
+# ==========================
+
+INDEX_MODES = {"flat", "ivf_flat", "ivf_pq", "hnsw", "sq8", "fp16", "pq"}
+
+# "pq" is stored as a single-list IVF-PQ: plain IndexPQ rejects
+# SearchParameters, so it could not take the attribute selector.
+IVF_MODES = {"ivf_flat", "ivf_pq", "pq"}
+
+# Modes whose storage supports remove_ids (incremental updates).
+# IVF lists keep their internal ids on removal while IndexIDMap2
+# compacts its label table, so labels would drift: full rebuild.
+REMOVABLE_MODES = INDEX_MODES - {"hnsw"} - IVF_MODES
+
+SCALAR_QUANTIZERS = {
+    "sq8": faiss.ScalarQuantizer.QT_8bit,    # 1 byte / dim
+    "fp16": faiss.ScalarQuantizer.QT_fp16,   # 2 bytes / dim
+}
+
+DEFAULT_INDEX_CONFIG = {
+    "mode": "flat",
+
+    # IndexIDMap2: FAISS labels are numeric product ids, not row numbers
+    "id_map": True,
+
+    # IVF (ivf_flat / ivf_pq)
+    "nlist": 256,
+    "nprobe": 16,
+
+    # PQ (pq / ivf_pq): dim must be divisible by pq_m
+    "pq_m": 48,
+    "pq_bits": 8,
+
+    # HNSW
+    "hnsw_m": 32,
+    "ef_construction": 200,
+    "ef_search": 64,
+
+    # Exact float re-rank of the short list (compressed modes).
+    # The indexer keeps float32 vectors in a memory-mapped .npy.
+    "rerank": False,
+    "rerank_factor": 4,
+}
+
+# FAISS wants ~39 training points per centroid
+MIN_POINTS_PER_CENTROID = 39
+
+# Large builds: quantizers train on a sample, vectors are added in batches
+MAX_TRAINING_POINTS = 200_000
+ADD_BATCH_SIZE = 65_536
+
+
+def resolve_config(overrides: Dict | None = None) -> Dict:
+    config = dict(DEFAULT_INDEX_CONFIG)
+    config.update({k: v for k, v in (overrides or {}).items() if v is not None})
+
+    if config["mode"] not in INDEX_MODES:
+        raise ValueError(
+            f"Unknown index mode '{config['mode']}'. "
+            f"Expected one of: {sorted(INDEX_MODES)}"
+        )
+
+    return config
+
+
+# ==========================
+# Factory
+# ==========================
+
+def check_pq_m(dim: int, config: Dict):
+    if dim % config["pq_m"] != 0:
+        raise ValueError(
+            f"pq_m={config['pq_m']} must divide embedding dim {dim}"
+        )
+
+
+def faiss_id(product_id) -> int:
+    """
+    int64 FAISS label for a product id (numeric ids are used as-is).
+    """
+    pid = str(product_id)
+    if pid.isdigit():
+        return int(pid)
+
+    digest = hashlib.blake2b(pid.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") & 0x3FFFFFFFFFFFFFFF
+
+
+def mmap_read_flags(mode: str) -> int | None:
+    """
+    read_index flags that map the index file instead of copying it.
+    IO_FLAG_MMAP only maps IVF inverted lists; flat / SQ / HNSW storage
+    is mapped by IO_FLAG_MMAP_IFC (recent faiss). None when the
+    installed faiss cannot map this mode.
+    """
+    if mode in IVF_MODES:
+        return faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+
+    ifc = getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+    if ifc is None:
+        return None
+
+    return ifc | faiss.IO_FLAG_READ_ONLY
+
+
+def base_index(index: faiss.Index) -> faiss.Index:
+    """
+    The storage index below an IndexIDMap / IndexIDMap2 wrapper.
+    """
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def training_sample(embeddings: np.ndarray) -> np.ndarray:
+    """
+    Evenly strided rows (at most MAX_TRAINING_POINTS), in memory.
+    """
+    total = embeddings.shape[0]
+    step = max(1, -(-total // MAX_TRAINING_POINTS))
+    return np.ascontiguousarray(embeddings[::step], dtype="float32")
+
+
+def build_index(
+    embeddings: np.ndarray,
+    config: Dict,
+    ids: np.ndarray | None = None,
+) -> faiss.Index:
+    """
+    Build (train + add) an inner-product index for normalized embeddings.
+    With config["id_map"] the index is wrapped in IndexIDMap2 and
+    vectors are added under ids (see faiss_id).
+    Mutates config with the effective values (e.g. clamped nlist).
+
+    embeddings may be a memory map: training uses a sample and vectors
+    are added ADD_BATCH_SIZE rows at a time, so the float matrix is
+    never fully loaded.
+    """
+    total, dim = embeddings.shape
+    mode = config["mode"]
+
+    if mode == "flat":
+        index = faiss.IndexFlatIP(dim)
+
+    elif mode in SCALAR_QUANTIZERS:
+        index = faiss.IndexScalarQuantizer(
+            dim, SCALAR_QUANTIZERS[mode], faiss.METRIC_INNER_PRODUCT
+        )
+        print(f"🏋️ Training {mode} scalar quantizer...")
+        index.train(training_sample(embeddings))
+
+    elif mode in IVF_MODES:
+        if mode == "pq":
+            nlist = 1  # exhaustive scan over PQ codes
+        else:
+            nlist = max(1, min(config["nlist"], total // MIN_POINTS_PER_CENTROID))
+        config["nlist"] = nlist
+        config["nprobe"] = min(config["nprobe"], nlist)
+
+        quantizer = faiss.IndexFlatIP(dim)
+
+        if mode == "ivf_flat":
+            index = faiss.IndexIVFFlat(
+                quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT
+            )
+        else:  # ivf_pq / pq
+            check_pq_m(dim, config)
+            index = faiss.IndexIVFPQ(
+                quantizer, dim, nlist,
+                config["pq_m"], config["pq_bits"],
+                faiss.METRIC_INNER_PRODUCT,
+            )
+
+        print(f"🏋️ Training {mode} (nlist={nlist})...")
+        index.train(training_sample(embeddings))
+        index.nprobe = config["nprobe"]
+
+    else:  # hnsw
+        index = faiss.IndexHNSWFlat(
+            dim, config["hnsw_m"], faiss.METRIC_INNER_PRODUCT
+        )
+        index.hnsw.efConstruction = config["ef_construction"]
+        index.hnsw.efSearch = config["ef_search"]
+
+    if config["id_map"]:
+        if ids is None:
+            raise ValueError("id_map index needs ids")
+        index = faiss.IndexIDMap2(index)
+        ids = np.asarray(ids, dtype="int64")
+
+    for start in range(0, total, ADD_BATCH_SIZE):
+        batch = np.ascontiguousarray(embeddings[start:start + ADD_BATCH_SIZE], dtype="float32")
+
+        if config["id_map"]:
+            index.add_with_ids(batch, ids[start:start + ADD_BATCH_SIZE])
+        else:
+            index.add(batch)
+
+    return index
+
+
+# ==========================
+# Persistence (saved next to the index)
+# ==========================
+
+def save_index_config(path: Path, config: Dict, dim: int, ntotal: int, model_name: str):
+    payload = {
+        **config,
+        "dim": dim,
+        "ntotal": ntotal,
+        "model_name": model_name,
+    }
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+
+
+def load_index_config(path: Path) -> Dict:
+    """
+    Older indexes have no config file: they were always flat,
+    labelled by row number.
+    """
+    if not path.exists():
+        return resolve_config({"id_map": False})
+
+    with path.open("r", encoding="utf-8") as f:
+        payload = json.load(f)
+
+    payload.setdefault("id_map", False)
+    return resolve_config(payload)
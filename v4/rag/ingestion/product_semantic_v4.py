@@ -62,6 +62,51 @@ def build_semantic_text(product: dict) -> str:
     return "\n".join(lines)
 
 
+# ==========================
+# Field texts (multi-vector index)
+# ==========================
+
+# One vector per field, all mapped to the same product row. The full
+# text is already the product index vector: not repeated here.
+FIELD_KINDS = ("title", "attributes", "use_case")
+
+# Labels that repeat another line (Category == Type)
+REDUNDANT_LABELS = {"Category"}
+
+
+def build_field_texts(text: str, use_cases=None) -> dict:
+    """
+    Split a build_semantic_text blob into short per-field texts so that
+    short attribute queries are not diluted by the whole blob.
+    """
+    fields = {}
+    attributes = []
+
+    for line in text.splitlines():
+        label, _, value = line.partition(": ")
+        value = value.strip()
+
+        if not value or label in REDUNDANT_LABELS:
+            continue
+
+        if label == "Product":
+            fields["title"] = value
+        else:
+            attributes.append(value)
+
+    if attributes:
+        fields["attributes"] = ", ".join(attributes)
+
+    if use_cases:
+        fields["use_case"] = ", ".join(use_cases)
+
+    # untitled product: still one vector, so it stays retrievable
+    if "title" not in fields:
+        fields["title"] = text
+
+    return fields
+
+
 def run():
 
     if not INPUT_PATH.exists():
@@ -0,0 +1,51 @@
+# rag/llm/http_limits.py
+
+import os
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# ==========================
+# Config
+# ==========================
+
+# Per-call timeout (seconds); generate(..., timeout=) overrides it
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+
+# Connection pool per client (one per worker process)
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "16"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+
+
+def httpx_timeout(timeout: float | None = None) -> httpx.Timeout:
+    return httpx.Timeout(
+        LLM_TIMEOUT if timeout is None else timeout,
+        connect=LLM_CONNECT_TIMEOUT,
+    )
+
+
+def httpx_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+    )
+
+
+def requests_timeout(timeout: float | None = None):
+    return (LLM_CONNECT_TIMEOUT, LLM_TIMEOUT if timeout is None else timeout)
+
+
+def pooled_session() -> requests.Session:
+    """
+    requests Session with a keep-alive pool sized like the httpx clients.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=LLM_MAX_CONNECTIONS)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
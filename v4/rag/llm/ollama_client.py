@@ -1,29 +1,157 @@
-import requests
+import json
+from typing import Iterator
+
+import httpx
+
+from rag.llm.http_limits import (
+    httpx_limits,
+    httpx_timeout,
+    pooled_session,
+    requests_timeout,
+)
+from rag.llm.response_cache import llm_cache
+
+
+OLLAMA_BASE_URL = "http://localhost:11434"
+
+
+def _payload(model: str, prompt: str, temperature: float, stream: bool = False) -> dict:
+    return {
+        "model": model,
+        "prompt": prompt,
+        "stream": stream,
+        "options": {
+            "temperature": temperature
+        }
+    }
 
 
 class OllamaClient:
-    def __init__(self, base_url: str = "http://localhost:11434"):
+    def __init__(self, base_url: str = OLLAMA_BASE_URL, model: str = "phi3:mini"):
         self.base_url = base_url
+        self.model = model
+        # keep-alive connections reused across calls
+        self.session = pooled_session()
 
-    def generate(self, prompt: str, temperature: float = 0.2) -> str:
-        payload = {
-            "model": "phi3:mini",
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": temperature
-            }
-        }
+    def generate(
+        self,
+        prompt: str,
+        temperature: float = 0.2,
+        call_site: str = "unknown",
+        timeout: float | None = None,
+    ) -> str:
+        # temperature 0 → served from the local response cache when seen before
+        return llm_cache.generate(
+            "ollama",
+            self.model,
+            prompt,
+            temperature,
+            call_site,
+            lambda: self._generate(prompt, temperature, timeout),
+        )
+
+    def stream(
+        self,
+        prompt: str,
+        temperature: float = 0.2,
+        call_site: str = "unknown",
+        timeout: float | None = None,
+    ) -> Iterator[str]:
+        """
+        generate() as text deltas (Ollama streams one JSON object per line).
+        """
+        return llm_cache.stream(
+            "ollama",
+            self.model,
+            prompt,
+            temperature,
+            call_site,
+            lambda: self._stream(prompt, temperature, timeout),
+        )
+
+    def _stream(self, prompt: str, temperature: float, timeout: float | None = None) -> Iterator[str]:
+        with self.session.post(
+            f"{self.base_url}/api/generate",
+            json=_payload(self.model, prompt, temperature, stream=True),
+            timeout=requests_timeout(timeout),
+            stream=True,
+        ) as response:
+            response.raise_for_status()
+
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                part = json.loads(line)
+                if part.get("response"):
+                    yield part["response"]
+                if part.get("done"):
+                    break
 
-        response = requests.post(
+    def _generate(self, prompt: str, temperature: float, timeout: float | None = None) -> str:
+        response = self.session.post(
             f"{self.base_url}/api/generate",
-            json=payload,
-            timeout=60
+            json=_payload(self.model, prompt, temperature),
+            timeout=requests_timeout(timeout),
         )
         response.raise_for_status()
 
         return response.json().get("response", "").strip()
 
 
+class AsyncOllamaClient:
+    """
+    Same interface as OllamaClient, awaitable, on a pooled httpx.AsyncClient.
+    """
+
+    def __init__(self, base_url: str = OLLAMA_BASE_URL, model: str = "phi3:mini"):
+        self.base_url = base_url
+        self.model = model
+        self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=httpx_limits(),
+                timeout=httpx_timeout(),
+            )
+        return self._client
+
+    async def generate(
+        self,
+        prompt: str,
+        temperature: float = 0.2,
+        call_site: str = "unknown",
+        timeout: float | None = None,
+    ) -> str:
+        return await llm_cache.agenerate(
+            "ollama",
+            self.model,
+            prompt,
+            temperature,
+            call_site,
+            lambda: self._generate(prompt, temperature, timeout),
+        )
+
+    async def _generate(self, prompt: str, temperature: float, timeout: float | None = None) -> str:
+        options = {} if timeout is None else {"timeout": httpx_timeout(timeout)}
+
+        response = await self.client.post(
+            "/api/generate",
+            json=_payload(self.model, prompt, temperature),
+            **options,
+        )
+        response.raise_for_status()
+
+        return response.json().get("response", "").strip()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
 # ✅ singleton instance (IMPORTANT)
 ollama_client = OllamaClient()
+async_ollama_client = AsyncOllamaClient()
@@ -1,31 +1,212 @@
 # rag/llm/openai_client.py
 
 import os
-from openai import OpenAI
+from typing import Iterator
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
 from dotenv import load_dotenv
+
+from rag.llm.http_limits import httpx_limits, httpx_timeout
+from rag.llm.response_cache import llm_cache
 # Load environment variables from .env file
 
 load_dotenv()
 
 
+def _chat_options(temperature: float, json_mode: bool, timeout: float | None) -> dict:
+    options = {"temperature": temperature}
+
+    if json_mode:
+        options["response_format"] = {"type": "json_object"}
+
+    if timeout is not None:
+        options["timeout"] = httpx_timeout(timeout)
+
+    return options
+
+
 class OpenAIClient:
-    def __init__(self):
-        self.client = OpenAI(
-            api_key=os.getenv("OPENAI_API_KEY")
+    def __init__(self, model: str = "gpt-4o-mini"):
+        self.model = model
+        # Built on first use (or by the API warm-up), not at import time
+        self._client = None
+
+    @property
+    def client(self) -> OpenAI:
+        if self._client is None:
+            # Keep-alive pool shared by every thread of the worker
+            self._client = OpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                timeout=httpx_timeout(),
+                http_client=httpx.Client(limits=httpx_limits(), timeout=httpx_timeout()),
+            )
+        return self._client
+
+
+    def generate(
+        self,
+        prompt: str,
+        temperature: float = 0.2,
+        call_site: str = "unknown",
+        timeout: float | None = None,
+    ) -> str:
+        # temperature 0 → served from the local response cache when seen before
+        return llm_cache.generate(
+            "openai",
+            self.model,
+            prompt,
+            temperature,
+            call_site,
+            lambda: self._generate(prompt, temperature, timeout=timeout),
+        )
+
+    def generate_json(
+        self,
+        prompt: str,
+        temperature: float = 0.0,
+        call_site: str = "unknown",
+        timeout: float | None = None,
+    ) -> str:
+        """
+        JSON mode: the response is always one JSON object.
+        The prompt must mention JSON and describe the schema.
+        """
+        return llm_cache.generate(
+            "openai-json",
+            self.model,
+            prompt,
+            temperature,
+            call_site,
+            lambda: self._generate(prompt, temperature, json_mode=True, timeout=timeout),
+        )
+
+    def stream(
+        self,
+        prompt: str,
+        temperature: float = 0.2,
+        call_site: str = "unknown",
+        timeout: float | None = None,
+    ) -> Iterator[str]:
+        """
+        generate() as text deltas, yielded while the model writes.
+        """
+        return llm_cache.stream(
+            "openai",
+            self.model,
+            prompt,
+            temperature,
+            call_site,
+            lambda: self._stream(prompt, temperature, timeout=timeout),
         )
 
+    def _stream(self, prompt: str, temperature: float, timeout: float | None = None) -> Iterator[str]:
+        chunks = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "user", "content": prompt}
+            ],
+            stream=True,
+            **_chat_options(temperature, False, timeout),
+        )
 
-    def generate(self, prompt: str, temperature: float = 0.2) -> str:
+        for chunk in chunks:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def _generate(
+        self,
+        prompt: str,
+        temperature: float,
+        json_mode: bool = False,
+        timeout: float | None = None,
+    ) -> str:
         response = self.client.chat.completions.create(
-            model="gpt-4o-mini",  
+            model=self.model,
             messages=[
                 {"role": "user", "content": prompt}
             ],
-            temperature=temperature,
+            **_chat_options(temperature, json_mode, timeout),
         )
 
         return response.choices[0].message.content.strip()
 
 
-# singleton
+class AsyncOpenAIClient:
+    """
+    Same interface as OpenAIClient, awaitable. One pooled AsyncClient
+    serves every conversation on the worker's event loop.
+    """
+
+    def __init__(self, model: str = "gpt-4o-mini"):
+        self.model = model
+        self._client = None
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        if self._client is None:
+            self._client = AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                timeout=httpx_timeout(),
+                http_client=httpx.AsyncClient(limits=httpx_limits(), timeout=httpx_timeout()),
+            )
+        return self._client
+
+    async def generate(
+        self,
+        prompt: str,
+        temperature: float = 0.2,
+        call_site: str = "unknown",
+        timeout: float | None = None,
+    ) -> str:
+        return await llm_cache.agenerate(
+            "openai",
+            self.model,
+            prompt,
+            temperature,
+            call_site,
+            lambda: self._generate(prompt, temperature, timeout=timeout),
+        )
+
+    async def generate_json(
+        self,
+        prompt: str,
+        temperature: float = 0.0,
+        call_site: str = "unknown",
+        timeout: float | None = None,
+    ) -> str:
+        return await llm_cache.agenerate(
+            "openai-json",
+            self.model,
+            prompt,
+            temperature,
+            call_site,
+            lambda: self._generate(prompt, temperature, json_mode=True, timeout=timeout),
+        )
+
+    async def _generate(
+        self,
+        prompt: str,
+        temperature: float,
+        json_mode: bool = False,
+        timeout: float | None = None,
+    ) -> str:
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "user", "content": prompt}
+            ],
+            **_chat_options(temperature, json_mode, timeout),
+        )
+
+        return response.choices[0].message.content.strip()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+# singletons
 openai_client = OpenAIClient()
+async_openai_client = AsyncOpenAIClient()
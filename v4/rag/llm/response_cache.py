@@ -0,0 +1,319 @@
+# rag/llm/response_cache.py
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterator
+
+
+# ==========================
+# Config
+# ==========================
+
+BASE_DIR = Path(__file__).resolve().parents[1]  # rag/
+
+LLM_CACHE_PATH = BASE_DIR / "data" / "llm_cache.sqlite3"
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "true").lower() == "true"
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+
+# Only deterministic calls are cached
+CACHEABLE_MAX_TEMPERATURE = 0.0
+
+# Evict down to this share of max_entries, so inserts don't evict one by one
+EVICT_TO = 0.9
+
+# Hits update last_used in memory; written in one batch every N hits
+# (and before eviction), so a hit is a single SELECT.
+TOUCH_FLUSH_EVERY = 64
+
+
+def prompt_key(backend: str, model: str, prompt: str, temperature: float) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{backend}\x00{model}\x00{temperature:.3f}\x00".encode("utf-8"))
+    h.update(prompt.encode("utf-8"))
+    return h.hexdigest()
+
+
+# ==========================
+# Cache
+# ==========================
+
+class LLMResponseCache:
+    """
+    SQLite cache of LLM responses keyed by
+    (backend, model, prompt hash, temperature), with TTL and LRU-by-
+    last-use eviction. Hit / miss counters are kept per call site.
+
+    last_used is approximate between flushes (see TOUCH_FLUSH_EVERY);
+    the row count is kept in memory, read from the table once.
+    """
+
+    def __init__(
+        self,
+        path: Path = LLM_CACHE_PATH,
+        ttl_seconds: float = LLM_CACHE_TTL,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._conn = None
+        self._lock = threading.Lock()
+        self._sites: Dict[str, Dict[str, int]] = {}
+        self._touched: Dict[str, float] = {}
+        self._entries = 0
+        self.evictions = 0
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    backend TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    call_site TEXT,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)"
+            )
+            self._conn.commit()
+            self._entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return self._conn
+
+    def _count(self, call_site: str, outcome: str):
+        site = self._sites.setdefault(call_site, {"hits": 0, "misses": 0})
+        site[outcome] += 1
+
+    def _flush_touched(self):
+        # caller holds the lock and commits
+        if self._touched:
+            self.conn.executemany(
+                "UPDATE responses SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def flush(self):
+        with self._lock:
+            if self._conn is not None and self._touched:
+                self._flush_touched()
+                self.conn.commit()
+
+    # --------------------------
+
+    def get(self, key: str, call_site: str = "unknown") -> str | None:
+        now = time.time()
+
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self.conn.commit()
+                    self._touched.pop(key, None)
+                    self._entries -= 1
+                    self.evictions += 1
+                self._count(call_site, "misses")
+                return None
+
+            self._touched[key] = now
+            if len(self._touched) >= TOUCH_FLUSH_EVERY:
+                self._flush_touched()
+                self.conn.commit()
+
+            self._count(call_site, "hits")
+            return row[0]
+
+    def put(self, key: str, response: str, backend: str, model: str, call_site: str = "unknown"):
+        now = time.time()
+
+        with self._lock:
+            inserted = self.conn.execute(
+                "INSERT OR IGNORE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, backend, model, call_site, response, now, now),
+            ).rowcount
+
+            if inserted:
+                self._entries += 1
+            else:
+                self.conn.execute(
+                    "UPDATE responses SET call_site = ?, response = ?, created_at = ?, "
+                    "last_used = ? WHERE key = ?",
+                    (call_site, response, now, now, key),
+                )
+                self._touched.pop(key, None)
+
+            if self._entries > self.max_entries:
+                # LRU order needs the pending last_used values
+                self._flush_touched()
+
+                # Expired first, then least recently used
+                expired = self.conn.execute(
+                    "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+                ).rowcount
+                excess = self._entries - expired - int(self.max_entries * EVICT_TO)
+                if excess > 0:
+                    excess = self.conn.execute(
+                        "DELETE FROM responses WHERE key IN "
+                        "(SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                        (excess,),
+                    ).rowcount
+                evicted = expired + max(excess, 0)
+                self._entries -= evicted
+                self.evictions += evicted
+
+            self.conn.commit()
+
+    def generate(
+        self,
+        backend: str,
+        model: str,
+        prompt: str,
+        temperature: float,
+        call_site: str,
+        generate: Callable[[], str],
+    ) -> str:
+        """
+        Cached generate() for deterministic calls; others go straight through.
+        """
+        if not LLM_CACHE_ENABLED or temperature > CACHEABLE_MAX_TEMPERATURE:
+            return generate()
+
+        key = prompt_key(backend, model, prompt, temperature)
+
+        try:
+            cached = self.get(key, call_site)
+        except sqlite3.Error as e:
+            print("[LLM CACHE] read failed:", e)
+            return generate()
+
+        if cached is not None:
+            return cached
+
+        response = generate()
+
+        try:
+            self.put(key, response, backend, model, call_site)
+        except sqlite3.Error as e:
+            print("[LLM CACHE] write failed:", e)
+
+        return response
+
+    async def agenerate(
+        self,
+        backend: str,
+        model: str,
+        prompt: str,
+        temperature: float,
+        call_site: str,
+        generate: Callable[[], Awaitable[str]],
+    ) -> str:
+        """
+        generate() for async clients. SQLite calls run in a worker
+        thread, so a slow disk never stalls the event loop.
+        """
+        if not LLM_CACHE_ENABLED or temperature > CACHEABLE_MAX_TEMPERATURE:
+            return await generate()
+
+        key = prompt_key(backend, model, prompt, temperature)
+
+        try:
+            cached = await asyncio.to_thread(self.get, key, call_site)
+        except sqlite3.Error as e:
+            print("[LLM CACHE] read failed:", e)
+            return await generate()
+
+        if cached is not None:
+            return cached
+
+        response = await generate()
+
+        try:
+            await asyncio.to_thread(self.put, key, response, backend, model, call_site)
+        except sqlite3.Error as e:
+            print("[LLM CACHE] write failed:", e)
+
+        return response
+
+    def stream(
+        self,
+        backend: str,
+        model: str,
+        prompt: str,
+        temperature: float,
+        call_site: str,
+        stream: Callable[[], Iterator[str]],
+    ) -> Iterator[str]:
+        """
+        generate() for streamed responses: a hit is yielded whole, a miss
+        is passed through chunk by chunk and stored once complete.
+        """
+        if not LLM_CACHE_ENABLED or temperature > CACHEABLE_MAX_TEMPERATURE:
+            yield from stream()
+            return
+
+        key = prompt_key(backend, model, prompt, temperature)
+
+        try:
+            cached = self.get(key, call_site)
+        except sqlite3.Error as e:
+            print("[LLM CACHE] read failed:", e)
+            yield from stream()
+            return
+
+        if cached is not None:
+            yield cached
+            return
+
+        parts = []
+        for chunk in stream():
+            parts.append(chunk)
+            yield chunk
+
+        try:
+            self.put(key, "".join(parts).strip(), backend, model, call_site)
+        except sqlite3.Error as e:
+            print("[LLM CACHE] write failed:", e)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            sites = {
+                name: {
+                    **counts,
+                    "hit_rate": round(counts["hits"] / max(counts["hits"] + counts["misses"], 1), 3),
+                }
+                for name, counts in self._sites.items()
+            }
+            entries = self._entries if self._conn is not None else None
+
+        return {
+            "enabled": LLM_CACHE_ENABLED,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "sites": sites,
+        }
+
+
+# shared by every LLM client
+llm_cache = LLMResponseCache()
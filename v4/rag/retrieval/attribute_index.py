@@ -0,0 +1,273 @@
+# rag/retrieval/attribute_index.py
+
+import json
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from rag.ingestion.attribute_extractors import (
+    extract_product_type,
+    extract_material,
+    extract_color,
+    extract_shape,
+)
+
+
+# ==========================
+# Config
+# ==========================
+
+# Every field gets posting lists at build time.
+INDEXED_FIELDS = (
+    "product_type",
+    "material",
+    "color",
+    "shape",
+    "use_case",
+    "category",
+)
+
+# Fields derived from SearchMemory and applied as hard filters.
+# use_case / category are only applied through explicit filters:
+# catalog use_cases are inferred from product_type, not from usage.
+MEMORY_FILTER_FIELDS = ("product_type", "material", "color", "shape")
+
+# When the intersection is empty, drop attributes in this order
+# (same spirit as relaxation_engine). product_type is never dropped.
+RELAX_ORDER = ("color", "shape", "material")
+
+CANONICALIZERS = {
+    "product_type": extract_product_type,
+    "material": extract_material,
+    "color": extract_color,
+    "shape": extract_shape,
+}
+
+
+# ==========================
+# Normalization
+# ==========================
+
+def normalize_key(value) -> str | None:
+    if value is None:
+        return None
+
+    key = str(value).strip().lower()
+    if key in {"", "none", "null", "nan"}:
+        return None
+
+    return key
+
+
+def canonical_value(field: str, value) -> str | None:
+    """
+    Map a query-side value onto the catalog vocabulary.
+    Uses the same extractors that built structured_products_v4.json.
+    """
+    key = normalize_key(value)
+    if key is None:
+        return None
+
+    extractor = CANONICALIZERS.get(field)
+    if extractor:
+        canonical = extractor(key)
+        if canonical:
+            return canonical
+
+    return key
+
+
+def product_fields(product: Dict) -> Dict[str, List[str]]:
+    """
+    Indexed values of one structured product (multi-valued fields as lists).
+    """
+    attrs = product.get("attributes") or {}
+
+    fields = {
+        "product_type": [product.get("product_type")],
+        "material": [attrs.get("material")],
+        "color": [attrs.get("color")],
+        "shape": [attrs.get("shape")],
+        "use_case": list(product.get("use_cases") or []),
+        "category": [product.get("category")],
+    }
+
+    return {
+        field: [k for k in (normalize_key(v) for v in values) if k]
+        for field, values in fields.items()
+    }
+
+
+# ==========================
+# Inverted index
+# ==========================
+
+class AttributeIndex:
+    """
+    Inverted index: field -> value -> sorted FAISS row ids.
+    Row ids are positions in the FAISS index / metadata list.
+    """
+
+    def __init__(self, postings: Dict[str, Dict[str, np.ndarray]], ntotal: int):
+        self.postings = postings
+        self.ntotal = ntotal
+
+    # --------------------------
+    # Build / persist
+    # --------------------------
+
+    @classmethod
+    def build(cls, products: List[Dict | None]) -> "AttributeIndex":
+        """
+        products[i] is the structured product stored at FAISS row i
+        (None when the product has no structured record).
+        """
+        lists: Dict[str, Dict[str, List[int]]] = {
+            field: {} for field in INDEXED_FIELDS
+        }
+
+        for row, product in enumerate(products):
+            if not product:
+                continue
+
+            for field, values in product_fields(product).items():
+                for value in values:
+                    lists[field].setdefault(value, []).append(row)
+
+        postings = {
+            field: {
+                value: np.asarray(rows, dtype=np.int64)
+                for value, rows in values.items()
+            }
+            for field, values in lists.items()
+        }
+
+        return cls(postings, ntotal=len(products))
+
+    def save(self, path: Path):
+        payload = {
+            "ntotal": self.ntotal,
+            "postings": {
+                field: {value: ids.tolist() for value, ids in values.items()}
+                for field, values in self.postings.items()
+            },
+        }
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: Path) -> "AttributeIndex":
+        with path.open("r", encoding="utf-8") as f:
+            payload = json.load(f)
+
+        postings = {
+            field: {
+                value: np.asarray(ids, dtype=np.int64)
+                for value, ids in values.items()
+            }
+            for field, values in payload["postings"].items()
+        }
+
+        return cls(postings, ntotal=payload["ntotal"])
+
+    # --------------------------
+    # Lookup
+    # --------------------------
+
+    def lookup(self, field: str, value) -> np.ndarray | None:
+        """
+        Row ids matching field == value.
+        Returns None when the value is unknown to the catalog
+        (the filter cannot be applied, so it is skipped).
+        """
+        values = self.postings.get(field)
+        key = canonical_value(field, value)
+
+        if not values or key is None:
+            return None
+
+        matches = [values[key]] if key in values else []
+
+        # "piatto" also covers piatto_fondo / piatto_piano / ...
+        if field == "product_type":
+            prefix = f"{key}_"
+            matches += [ids for k, ids in values.items() if k.startswith(prefix)]
+
+        if not matches:
+            return None
+
+        if len(matches) == 1:
+            return matches[0]
+
+        return np.unique(np.concatenate(matches))
+
+    def memory_conditions(self, memory, filters: Dict | None = None) -> Dict[str, str]:
+        conditions = {}
+
+        if memory:
+            if memory.product_type:
+                conditions["product_type"] = memory.product_type
+
+            for field in MEMORY_FILTER_FIELDS:
+                value = (memory.attributes or {}).get(field)
+                if value:
+                    conditions[field] = value
+
+        for field, value in (filters or {}).items():
+            if field in INDEXED_FIELDS and value:
+                conditions[field] = value
+
+        return conditions
+
+    def select(
+        self,
+        memory=None,
+        filters: Dict | None = None,
+    ) -> Tuple[np.ndarray | None, List[str]]:
+        """
+        Turn SearchMemory (+ explicit filters) into a sorted id selection.
+
+        Returns (ids, dropped_fields).
+        ids is None when no filter applies (search the whole index).
+        """
+        postings = {}
+
+        for field, value in self.memory_conditions(memory, filters).items():
+            ids = self.lookup(field, value)
+            if ids is not None:
+                postings[field] = ids
+
+        if not postings:
+            return None, []
+
+        dropped = []
+
+        while postings:
+            selection = intersect_postings(list(postings.values()))
+            if selection.size:
+                return selection, dropped
+
+            relaxable = [f for f in RELAX_ORDER if f in postings]
+            if not relaxable:
+                break
+
+            postings.pop(relaxable[0])
+            dropped.append(relaxable[0])
+
+        return np.empty(0, dtype=np.int64), dropped
+
+
+def intersect_postings(lists: List[np.ndarray]) -> np.ndarray:
+    """
+    Intersect sorted posting lists, shortest first.
+    """
+    lists = sorted(lists, key=len)
+    result = lists[0]
+
+    for ids in lists[1:]:
+        if not result.size:
+            break
+        result = np.intersect1d(result, ids, assume_unique=True)
+
+    return result
@@ -0,0 +1,162 @@
+# rag/retrieval/candidate_pool.py
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+import numpy as np
+
+from rag.retrieval.query_cache import normalize_query
+from rag.retrieval.variant_groups import first_in_group
+
+
+# ==========================
+# Fingerprint / cursor
+# ==========================
+
+def query_fingerprint(
+    query: str,
+    selection: np.ndarray | None,
+    **params,
+) -> str:
+    """
+    Stable id of a ranked candidate list: enriched query, attribute
+    selection and every knob that changes the ranking.
+    """
+    h = hashlib.blake2b(digest_size=10)
+    h.update(normalize_query(query).encode("utf-8"))
+
+    h.update(b"\x00sel:")
+    if selection is not None:
+        h.update(np.ascontiguousarray(selection, dtype="int64").tobytes())
+
+    for key in sorted(params):
+        h.update(f"\x00{key}={params[key]}".encode("utf-8"))
+
+    return h.hexdigest()
+
+
+def encode_cursor(fingerprint: str, offset: int) -> str:
+    return f"{fingerprint}:{offset}"
+
+
+def decode_cursor(cursor: str | None, fingerprint: str) -> int:
+    """
+    Offset stored in a cursor; 0 when the cursor belongs to another query.
+    """
+    if not cursor:
+        return 0
+
+    prefix, _, offset = cursor.rpartition(":")
+    if prefix != fingerprint or not offset.isdigit():
+        return 0
+
+    return int(offset)
+
+
+# ==========================
+# Pool
+# ==========================
+
+@dataclass
+class CandidatePool:
+    """
+    Ranked rows for one (session, fingerprint).
+
+    Rows only ever get appended: pages already served keep their
+    order when the pool is extended with a deeper search.
+    groups holds the variant group of every row when variants are
+    collapsed (one row per group).
+    """
+
+    query: str
+    selection: np.ndarray | None
+    query_vec: np.ndarray | None
+    scores: np.ndarray = field(default_factory=lambda: np.empty(0, dtype="float32"))
+    rows: np.ndarray = field(default_factory=lambda: np.empty(0, dtype="int64"))
+    groups: np.ndarray = field(default_factory=lambda: np.empty(0, dtype="int64"))
+    depth: int = 0
+    exhausted: bool = False
+    extensions: int = 0
+
+    def extend(self, scores: np.ndarray, rows: np.ndarray, groups: np.ndarray | None = None):
+        keep = (rows >= 0) & ~np.isin(rows, self.rows)
+
+        if groups is not None:
+            kept = np.flatnonzero(keep)
+            keep[kept] = first_in_group(groups[kept], self.groups)
+            self.groups = np.concatenate([self.groups, groups[keep]])
+
+        self.rows = np.concatenate([self.rows, rows[keep]])
+        self.scores = np.concatenate([self.scores, scores[keep].astype("float32")])
+
+    def __len__(self) -> int:
+        return int(self.rows.size)
+
+
+class CandidatePoolCache:
+    """
+    Bounded LRU of candidate pools keyed by (session id, fingerprint),
+    with TTL eviction.
+    """
+
+    def __init__(self, max_size: int = 512, ttl_seconds: float = 1800):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+
+        self._pools: "OrderedDict[Tuple[str, str], Tuple[float, CandidatePool]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, session_id: str, fingerprint: str) -> CandidatePool | None:
+        key = (session_id, fingerprint)
+        now = time.time()
+
+        with self._lock:
+            entry = self._pools.get(key)
+
+            if entry is None or now - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    del self._pools[key]
+                    self.evictions += 1
+                self.misses += 1
+                return None
+
+            self._pools[key] = (now, entry[1])
+            self._pools.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, session_id: str, fingerprint: str, pool: CandidatePool):
+        key = (session_id, fingerprint)
+
+        with self._lock:
+            self._pools[key] = (time.time(), pool)
+            self._pools.move_to_end(key)
+
+            while len(self._pools) > self.max_size:
+                self._pools.popitem(last=False)
+                self.evictions += 1
+
+    def drop_session(self, session_id: str):
+        with self._lock:
+            for key in [k for k in self._pools if k[0] == session_id]:
+                del self._pools[key]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._pools),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
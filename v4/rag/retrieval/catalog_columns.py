@@ -0,0 +1,159 @@
+# rag/retrieval/catalog_columns.py
+
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+
+# ==========================
+# Config
+# ==========================
+
+# Numeric catalog fields, one float32 column per field in FAISS row
+# order (NaN when the product has no value).
+#   price         euro (tax incl.)
+#   availability  pieces in stock
+#   capacity      ml
+#   size          cm
+NUMERIC_COLUMNS = ("price", "availability", "set_size", "capacity", "size")
+
+# Capacity units of CAPACITY_PATTERN → ml
+CAPACITY_UNITS_ML = {"cc": 1.0, "ml": 1.0, "cl": 10.0, "lt": 1000.0, "l": 1000.0}
+
+
+def capacity_ml(capacity: Dict | None) -> float | None:
+    """
+    {"value": 1.4, "unit": "lt"} (extract_capacity) → 1400.0
+    """
+    if not capacity or capacity.get("value") is None:
+        return None
+
+    factor = CAPACITY_UNITS_ML.get(str(capacity.get("unit", "")).lower())
+    if factor is None:
+        return None
+
+    return float(capacity["value"]) * factor
+
+
+def product_numbers(product: Dict | None) -> Dict[str, float | None]:
+    product = product or {}
+    attrs = product.get("attributes") or {}
+
+    return {
+        "price": product.get("price"),
+        "availability": product.get("availability"),
+        "set_size": attrs.get("set_size"),
+        "capacity": capacity_ml(attrs.get("capacity")),
+        "size": (attrs.get("size") or {}).get("value"),
+    }
+
+
+def build_columns(products: List[Dict | None]) -> Dict[str, np.ndarray]:
+    """
+    products[i] is the structured product at FAISS row i.
+    """
+    columns = {
+        name: np.full(len(products), np.nan, dtype="float32")
+        for name in NUMERIC_COLUMNS
+    }
+
+    for row, product in enumerate(products):
+        for name, value in product_numbers(product).items():
+            if value is not None:
+                columns[name][row] = float(value)
+
+    return columns
+
+
+def sorted_rows(column: np.ndarray) -> np.ndarray:
+    """
+    Rows with a value, ascending by value (NaN sorts last and is cut).
+    """
+    order = np.argsort(column, kind="stable")
+    return order[:int(np.count_nonzero(~np.isnan(column)))].astype("int64")
+
+
+def save_columns(path: Path, columns: Dict[str, np.ndarray]):
+    """
+    Each column is stored with its sort order ("<name>.order").
+    """
+    arrays = dict(columns)
+    for name, column in columns.items():
+        arrays[f"{name}.order"] = sorted_rows(column)
+
+    with path.open("wb") as f:
+        np.savez(f, **arrays)
+
+
+def load_columns(path: Path) -> Dict[str, np.ndarray]:
+    with np.load(path, allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+
+# ==========================
+# Range lookups
+# ==========================
+
+class RangeIndex:
+    """
+    Sorted numeric columns: a [low, high] range on a column is two
+    binary searches, giving a sorted row id set to intersect with the
+    attribute selection before the vector search.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.orders: Dict[str, np.ndarray] = {}
+        self.values: Dict[str, np.ndarray] = {}
+
+        for name in NUMERIC_COLUMNS:
+            if name not in columns:
+                continue
+
+            order = columns.get(f"{name}.order")
+            if order is None:
+                order = sorted_rows(columns[name])
+
+            self.orders[name] = order
+            self.values[name] = columns[name][order]
+
+    def rows(self, column: str, low: float | None = None, high: float | None = None) -> np.ndarray:
+        """
+        Sorted rows with low <= value <= high (open ends when None).
+        """
+        values = self.values[column]
+
+        start = 0 if low is None else int(np.searchsorted(values, low, side="left"))
+        stop = values.size if high is None else int(np.searchsorted(values, high, side="right"))
+
+        return np.sort(self.orders[column][start:stop])
+
+    def conditions(self, memory=None, filters: Dict | None = None) -> Dict[str, Dict]:
+        """
+        {column: {"min": ..., "max": ...}} from memory.constraints and
+        explicit filters (filters win).
+        """
+        conditions = {}
+        sources = [getattr(memory, "constraints", None) or {}, filters or {}]
+
+        for source in sources:
+            for column, bounds in source.items():
+                if column not in self.values or not isinstance(bounds, dict):
+                    continue
+                if bounds.get("min") is None and bounds.get("max") is None:
+                    continue
+                conditions[column] = bounds
+
+        return conditions
+
+    def select(self, memory=None, filters: Dict | None = None) -> np.ndarray | None:
+        """
+        Intersection of every range condition, or None when none applies.
+        """
+        selection = None
+
+        for column, bounds in self.conditions(memory, filters).items():
+            rows = self.rows(column, bounds.get("min"), bounds.get("max"))
+            selection = rows if selection is None else np.intersect1d(selection, rows, assume_unique=True)
+
+        return selection
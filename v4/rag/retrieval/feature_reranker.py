@@ -0,0 +1,140 @@
+# rag/retrieval/feature_reranker.py
+
+import json
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+from rag.retrieval.attribute_index import AttributeIndex
+
+
+# ==========================
+# Config
+# ==========================
+
+# Columns of the feature matrix, in order
+FEATURES = (
+    "score",            # retrieval score relative to the best candidate
+    "attribute_match",  # share of memory attributes the product matches
+    "use_case_match",   # product use_cases contain memory.use_case
+    "in_stock",         # availability > 0
+    "log_stock",        # log1p(availability)
+    "log_price",        # log1p(price)
+    "set_size",         # log1p(pieces in the set)
+)
+
+# Used when no weights file exists. score dominates; structured
+# signals break near-ties between semantically close products.
+DEFAULT_WEIGHTS = {
+    "score": 1.0,
+    "attribute_match": 0.15,
+    "use_case_match": 0.05,
+    "in_stock": 0.05,
+    "log_stock": 0.0,
+    "log_price": 0.0,
+    "set_size": 0.0,
+}
+
+
+class FeatureReranker:
+    """
+    Linear model over per-candidate features built in one NumPy pass
+    from the catalog columns and the attribute postings.
+
+    Weights file (JSON): {"weights": {feature: weight}, "bias": 0.0};
+    missing features keep their default weight.
+    """
+
+    def __init__(self, weights: Dict[str, float] | None = None, bias: float = 0.0):
+        weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+
+        unknown = set(weights) - set(FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown re-rank features: {sorted(unknown)}")
+
+        self.weights = np.array([weights[name] for name in FEATURES], dtype="float32")
+        self.bias = float(bias)
+
+    @classmethod
+    def load(cls, path: Path) -> "FeatureReranker":
+        if not path.exists():
+            return cls()
+
+        with path.open("r", encoding="utf-8") as f:
+            payload = json.load(f)
+
+        return cls(payload.get("weights"), payload.get("bias", 0.0))
+
+    def weights_dict(self) -> Dict[str, float]:
+        return {name: round(float(w), 4) for name, w in zip(FEATURES, self.weights)}
+
+    # --------------------------
+
+    def features(
+        self,
+        scores: np.ndarray,
+        rows: np.ndarray,
+        columns: Dict[str, np.ndarray],
+        attribute_index: AttributeIndex | None = None,
+        memory=None,
+        filters: Dict | None = None,
+    ) -> np.ndarray:
+        """
+        (len(rows), len(FEATURES)) float32; rows must be valid (>= 0).
+        """
+        matrix = np.zeros((rows.size, len(FEATURES)), dtype="float32")
+        # Relative score: same scale for inner product and RRF
+        matrix[:, 0] = scores / max(float(np.abs(scores).max()), 1e-12)
+
+        if attribute_index is not None:
+            conditions = attribute_index.memory_conditions(memory, filters)
+            if conditions:
+                matched = np.zeros(rows.size, dtype="float32")
+                for field, value in conditions.items():
+                    ids = attribute_index.lookup(field, value)
+                    if ids is not None:
+                        matched += np.isin(rows, ids)
+                matrix[:, 1] = matched / len(conditions)
+
+            use_case = getattr(memory, "use_case", None)
+            if use_case:
+                ids = attribute_index.lookup("use_case", use_case)
+                if ids is not None:
+                    matrix[:, 2] = np.isin(rows, ids)
+
+        if columns:
+            stock = np.nan_to_num(columns["availability"][rows], nan=0.0)
+            price = np.nan_to_num(columns["price"][rows], nan=0.0)
+            pieces = np.nan_to_num(columns["set_size"][rows], nan=1.0)
+
+            matrix[:, 3] = stock > 0
+            matrix[:, 4] = np.log1p(np.maximum(stock, 0))
+            matrix[:, 5] = np.log1p(np.maximum(price, 0))
+            matrix[:, 6] = np.log1p(np.maximum(pieces, 0))
+
+        return matrix
+
+    def rerank(
+        self,
+        scores: np.ndarray,
+        rows: np.ndarray,
+        columns: Dict[str, np.ndarray],
+        attribute_index: AttributeIndex | None = None,
+        memory=None,
+        filters: Dict | None = None,
+    ):
+        """
+        (scores, rows) re-ordered by the linear model; invalid rows dropped.
+        """
+        valid = rows >= 0
+        scores, rows = scores[valid], rows[valid]
+
+        if not rows.size:
+            return scores, rows
+
+        matrix = self.features(scores, rows, columns, attribute_index, memory, filters)
+        final = matrix @ self.weights + self.bias
+
+        order = np.argsort(-final, kind="stable")
+        return final[order].astype("float32"), rows[order]
@@ -0,0 +1,192 @@
+# rag/retrieval/lexical_index.py
+
+import re
+from collections import Counter
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+
+# ==========================
+# Config
+# ==========================
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Field labels of products_semantic_v4.jsonl + a few function words
+LEXICAL_STOPWORDS = {
+    "product", "type", "category", "material", "color",
+    "capacity", "size", "set", "pieces",
+    "in", "con", "per", "da", "di", "del", "della", "dei", "degli",
+    "e", "il", "la", "le", "lo", "gli", "un", "una",
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9àèéìòùç]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Exact-token view of a text: codes, numbers and short abbreviations
+    ("cc 280", "pcl", "inox") are kept as-is.
+    """
+    return [
+        t for t in TOKEN_PATTERN.findall((text or "").lower())
+        if t not in LEXICAL_STOPWORDS
+    ]
+
+
+# ==========================
+# BM25 index
+# ==========================
+
+class LexicalIndex:
+    """
+    BM25 inverted index over FAISS rows.
+
+    Per-posting BM25 weights are precomputed at build time (they only
+    depend on tf, document length and idf), so a query is a sum of
+    impacts over its terms' posting lists.
+    """
+
+    def __init__(self, terms, offsets, docs, impacts, n_docs: int):
+        self.vocab = {term: i for i, term in enumerate(terms)}
+        self.offsets = offsets
+        self.docs = docs
+        self.impacts = impacts
+        self.n_docs = n_docs
+
+    # --------------------------
+    # Build / persist
+    # --------------------------
+
+    @classmethod
+    def build(cls, texts: List[str]) -> "LexicalIndex":
+        doc_tfs = [Counter(tokenize(text)) for text in texts]
+        doc_lens = np.array([sum(tf.values()) for tf in doc_tfs], dtype="float32")
+        avg_len = float(doc_lens.mean()) if len(doc_lens) else 1.0
+
+        postings = {}
+        for row, tfs in enumerate(doc_tfs):
+            for term, tf in tfs.items():
+                postings.setdefault(term, []).append((row, tf))
+
+        n_docs = len(texts)
+        terms = sorted(postings)
+        offsets = [0]
+        docs, impacts = [], []
+
+        for term in terms:
+            plist = postings[term]
+            df = len(plist)
+            idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+            rows = np.array([row for row, _ in plist], dtype="int64")
+            tf = np.array([tf for _, tf in plist], dtype="float32")
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lens[rows] / avg_len)
+
+            docs.append(rows)
+            impacts.append(idf * tf * (BM25_K1 + 1) / (tf + norm))
+            offsets.append(offsets[-1] + df)
+
+        return cls(
+            terms,
+            np.array(offsets, dtype="int64"),
+            np.concatenate(docs) if docs else np.empty(0, dtype="int64"),
+            np.concatenate(impacts).astype("float32") if impacts else np.empty(0, dtype="float32"),
+            n_docs,
+        )
+
+    def save(self, path: Path):
+        terms = sorted(self.vocab, key=self.vocab.get)
+        with path.open("wb") as f:
+            np.savez(
+                f,
+                terms=np.array(terms),
+                offsets=self.offsets,
+                docs=self.docs,
+                impacts=self.impacts,
+                n_docs=np.array(self.n_docs),
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> "LexicalIndex":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["terms"].tolist(),
+                data["offsets"],
+                data["docs"],
+                data["impacts"],
+                int(data["n_docs"]),
+            )
+
+    # --------------------------
+    # Search
+    # --------------------------
+
+    def search(
+        self,
+        query: str,
+        k: int,
+        selection: np.ndarray | None = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k (scores, rows) by BM25, optionally restricted to selection.
+        Cost is proportional to the query terms' posting lists.
+        """
+        term_ids = [self.vocab[t] for t in dict.fromkeys(tokenize(query)) if t in self.vocab]
+
+        if not term_ids:
+            return np.empty(0, dtype="float32"), np.empty(0, dtype="int64")
+
+        docs = np.concatenate([self.docs[self.offsets[t]:self.offsets[t + 1]] for t in term_ids])
+        impacts = np.concatenate([self.impacts[self.offsets[t]:self.offsets[t + 1]] for t in term_ids])
+
+        rows, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=impacts).astype("float32")
+
+        if selection is not None:
+            keep = np.isin(rows, selection, assume_unique=True)
+            rows, scores = rows[keep], scores[keep]
+
+        if rows.size > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[top], scores[top]
+
+        order = np.argsort(-scores, kind="stable")
+        return scores[order], rows[order]
+
+
+# ==========================
+# Rank fusion
+# ==========================
+
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(
+    rankings: List[np.ndarray],
+    k: int = RRF_K,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fuse ranked row lists: score(row) = sum 1 / (k + rank).
+    Returns (scores, rows) sorted by fused score.
+    """
+    fused = {}
+
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, start=1):
+            row = int(row)
+            if row < 0:
+                continue
+            fused[row] = fused.get(row, 0.0) + 1.0 / (k + rank)
+
+    if not fused:
+        return np.empty(0, dtype="float32"), np.empty(0, dtype="int64")
+
+    rows = np.fromiter(fused.keys(), dtype="int64")
+    scores = np.fromiter(fused.values(), dtype="float32")
+    order = np.argsort(-scores, kind="stable")
+
+    return scores[order], rows[order]
@@ -0,0 +1,206 @@
+# rag/retrieval/metadata_store.py
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+
+# ==========================
+# Binary layout
+# ==========================
+#
+#   MAGIC (8 bytes)
+#   header length (uint64, little endian)
+#   header (JSON: n, columns, section offsets)
+#   per column: uint32 heap offset + uint32 length, one pair per row
+#   string heap (utf-8, identical strings stored once)
+#   id table: uint64 id hashes (sorted) + int64 rows
+#
+# Everything after the header is read through one read-only memmap,
+# so forked workers share the pages and rows are decoded on access.
+
+MAGIC = b"PMETA001"
+ALIGN = 8
+NULL_LENGTH = np.uint32(0xFFFFFFFF)
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def id_hash(product_id) -> int:
+    digest = hashlib.blake2b(str(product_id).encode("utf-8"), digest_size=8)
+    return int.from_bytes(digest.digest(), "little")
+
+
+# ==========================
+# Writer
+# ==========================
+
+def write_metadata_store(path: Path, rows: List[Dict], id_field: str = "product_id"):
+    """
+    Write metadata rows (FAISS row order) as a columnar binary store.
+    String values are stored as-is; anything else is JSON-encoded.
+    """
+    n = len(rows)
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+
+    kinds = {
+        col: "str" if all(
+            isinstance(row.get(col), str) or row.get(col) is None for row in rows
+        ) else "json"
+        for col in columns
+    }
+
+    heap = bytearray()
+    heap_index: Dict[bytes, int] = {}
+    spans = {}
+
+    for col in columns:
+        span = np.empty((n, 2), dtype="<u4")
+
+        for i, row in enumerate(rows):
+            value = row.get(col)
+
+            if value is None and kinds[col] == "str":
+                span[i] = (0, NULL_LENGTH)
+                continue
+
+            text = value if kinds[col] == "str" else json.dumps(value, ensure_ascii=False)
+            data = text.encode("utf-8")
+
+            if data not in heap_index:
+                heap_index[data] = len(heap)
+                heap.extend(data)
+
+            span[i] = (heap_index[data], len(data))
+
+        spans[col] = span
+
+    hashes = np.array([id_hash(row.get(id_field)) for row in rows], dtype="<u8")
+    order = np.argsort(hashes, kind="stable")
+    id_hashes = hashes[order]
+    id_rows = order.astype("<i8")
+
+    # Section offsets are relative to the start of the data area
+    sections = {}
+    offset = 0
+    for col in columns:
+        sections[f"col:{col}"] = offset
+        offset = _align(offset + spans[col].nbytes)
+    sections["heap"] = offset
+    offset = _align(offset + len(heap))
+    sections["id_hashes"] = offset
+    offset = _align(offset + id_hashes.nbytes)
+    sections["id_rows"] = offset
+
+    header = json.dumps({
+        "n": n,
+        "id_field": id_field,
+        "columns": columns,
+        "kinds": kinds,
+        "heap_bytes": len(heap),
+        "sections": sections,
+    }).encode("utf-8")
+
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    with path.open("wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header)).tobytes())
+        f.write(header)
+
+        def write_at(relative: int, payload: bytes):
+            f.seek(data_start + relative)
+            f.write(payload)
+
+        for col in columns:
+            write_at(sections[f"col:{col}"], spans[col].tobytes())
+        write_at(sections["heap"], bytes(heap))
+        write_at(sections["id_hashes"], id_hashes.tobytes())
+        write_at(sections["id_rows"], id_rows.tobytes())
+
+
+# ==========================
+# Reader
+# ==========================
+
+class MetadataStore:
+    """
+    Lazy, read-only view over the binary metadata file.
+    Behaves like the old list of dicts: len(store), store[row].
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._buf = np.memmap(path, dtype=np.uint8, mode="r")
+
+        if bytes(self._buf[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"Not a metadata store: {path}")
+
+        header_len = int(np.frombuffer(self._buf, dtype="<u8", count=1, offset=len(MAGIC))[0])
+        header_start = len(MAGIC) + 8
+        header = json.loads(bytes(self._buf[header_start:header_start + header_len]))
+
+        self.n = header["n"]
+        self.id_field = header["id_field"]
+        self.columns = header["columns"]
+        self.kinds = header["kinds"]
+
+        data_start = _align(header_start + header_len)
+        sections = header["sections"]
+
+        def view(name, dtype, count):
+            return np.frombuffer(
+                self._buf, dtype=dtype, count=count,
+                offset=data_start + sections[name],
+            )
+
+        self._spans = {
+            col: view(f"col:{col}", "<u4", self.n * 2).reshape(self.n, 2)
+            for col in self.columns
+        }
+        self._heap = view("heap", np.uint8, header["heap_bytes"])
+        self._id_hashes = view("id_hashes", "<u8", self.n)
+        self._id_rows = view("id_rows", "<i8", self.n)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def value(self, row: int, col: str):
+        start, length = self._spans[col][row]
+
+        if length == NULL_LENGTH:
+            return None
+
+        text = bytes(self._heap[start:start + length]).decode("utf-8")
+        return text if self.kinds[col] == "str" else json.loads(text)
+
+    def __getitem__(self, row: int) -> Dict:
+        row = int(row)
+        if row < 0 or row >= self.n:
+            raise IndexError(row)
+
+        return {col: self.value(row, col) for col in self.columns}
+
+    def __iter__(self):
+        for row in range(self.n):
+            yield self[row]
+
+    def row_of(self, product_id) -> int | None:
+        """
+        id -> row via binary search on the hashed id table.
+        """
+        key = np.uint64(id_hash(product_id))
+        pos = int(np.searchsorted(self._id_hashes, key))
+
+        while pos < self.n and self._id_hashes[pos] == key:
+            row = int(self._id_rows[pos])
+            if str(self.value(row, self.id_field)) == str(product_id):
+                return row
+            pos += 1
+
+        return None
@@ -0,0 +1,171 @@
+# rag/retrieval/product_neighbours.py
+
+import faiss
+import numpy as np
+
+
+# ==========================
+# Config
+# ==========================
+
+# Neighbours stored per product
+NEIGHBOURS = 20
+
+SEARCH_BATCH_SIZE = 4096
+
+
+# ==========================
+# Offline kNN graph
+# ==========================
+
+def exact_index(vectors: np.ndarray) -> faiss.Index:
+    """
+    Flat inner-product index over the rows, added in batches.
+    """
+    index = faiss.IndexFlatIP(vectors.shape[1])
+    for start in range(0, len(vectors), SEARCH_BATCH_SIZE):
+        index.add(np.ascontiguousarray(vectors[start:start + SEARCH_BATCH_SIZE], dtype="float32"))
+    return index
+
+
+def build_neighbours(
+    vectors: np.ndarray,
+    groups: np.ndarray | None = None,
+    index: faiss.Index | None = None,
+    row_ids: np.ndarray | None = None,
+):
+    """
+    Top-NEIGHBOURS rows per FAISS row by cosine, as
+    (int32 rows, float16 scores), -1 / 0 padded.
+
+    The product itself and, with groups, the other variants of the same
+    design are left out: "similar" means a different product.
+
+    index is the product index when given (row_ids: its label per row,
+    for IndexIDMap2): no second copy of the vectors, and an IVF / HNSW
+    index answers each batch without a full scan. Otherwise an exact
+    flat index is built, O(N²) over the catalog.
+    """
+    total = len(vectors)
+
+    if index is None:
+        index, row_ids = exact_index(vectors), None
+
+    rows = np.full((total, NEIGHBOURS), -1, dtype="int32")
+    scores = np.zeros((total, NEIGHBOURS), dtype="float16")
+
+    search_neighbours(vectors, np.arange(total), rows, scores, groups, index, row_ids)
+
+    return rows, scores
+
+
+def search_neighbours(vectors, targets, rows, scores, groups, index, row_ids):
+    """
+    Fill rows / scores in place for the target rows only.
+    """
+    total = len(vectors)
+    k = min(NEIGHBOURS, max(total - 1, 0))
+
+    if row_ids is not None:
+        id_order = np.argsort(row_ids)
+        sorted_ids = np.asarray(row_ids)[id_order]
+
+    # Room for self + variants; variants beyond the margin just shorten the list
+    search_k = min(total, 2 * NEIGHBOURS + 1)
+
+    for start in range(0, len(targets), SEARCH_BATCH_SIZE):
+        batch_rows = targets[start:start + SEARCH_BATCH_SIZE]
+        batch = np.ascontiguousarray(vectors[batch_rows], dtype="float32")
+        hit_scores, hits = index.search(batch, search_k)
+
+        if row_ids is not None:
+            pos = np.searchsorted(sorted_ids, hits).clip(max=total - 1)
+            hits = np.where((hits >= 0) & (sorted_ids[pos] == hits), id_order[pos], -1)
+
+        for offset, row in enumerate(batch_rows):
+            valid = (hits[offset] >= 0) & (hits[offset] != row)
+            if groups is not None:
+                valid &= groups[hits[offset].clip(min=0)] != groups[row]
+
+            keep = np.flatnonzero(valid)[:k]
+            rows[row] = -1
+            scores[row] = 0
+            rows[row, :keep.size] = hits[offset][keep]
+            scores[row, :keep.size] = hit_scores[offset][keep]
+
+
+# ==========================
+# Incremental refresh
+# ==========================
+
+def update_neighbours(
+    vectors: np.ndarray,
+    previous: np.ndarray,
+    old_rows: np.ndarray,
+    old_scores: np.ndarray,
+    changed: np.ndarray,
+    groups: np.ndarray | None = None,
+    regrouped: np.ndarray | None = None,
+    index: faiss.Index | None = None,
+    row_ids: np.ndarray | None = None,
+):
+    """
+    build_neighbours after an incremental update, searching again only
+    the rows whose list can differ from the previous graph.
+
+    previous: old row per row (-1 = new product); changed: rows with a
+    new vector; regrouped: rows whose variant group gained / lost
+    members. Every other row keeps its list (renumbered) unless it
+    points at a removed / changed product, or a changed product now
+    scores above its last neighbour.
+    """
+    total = len(vectors)
+
+    if index is None:
+        index, row_ids = exact_index(vectors), None
+
+    kept = np.flatnonzero(previous >= 0)
+    renumber = np.full(len(old_rows) + 1, -1, dtype="int32")  # [-1] → -1
+    renumber[previous[kept]] = kept
+
+    rows = np.full((total, NEIGHBOURS), -1, dtype="int32")
+    scores = np.zeros((total, NEIGHBOURS), dtype="float16")
+    rows[kept] = renumber[old_rows[previous[kept]]]
+    scores[kept] = old_scores[previous[kept]]
+
+    stale = changed | (previous < 0)
+    if regrouped is not None:
+        stale |= regrouped
+
+    # Lists that lost an entry: removed products, or changed ones (new score)
+    lost = (renumber[old_rows[previous[kept]]] < 0) & (old_rows[previous[kept]] >= 0)
+    lost |= stale[rows[kept].clip(min=0)] & (rows[kept] >= 0)
+    stale[kept[lost.any(axis=1)]] = True
+
+    # Lists a changed product now enters (short lists: any changed product)
+    k = min(NEIGHBOURS, max(total - 1, 0))
+    fresh = np.flatnonzero(changed)
+    if fresh.size and k:
+        floor = np.where(rows[:, k - 1] >= 0, scores[:, k - 1].astype("float32"), -np.inf)
+        floor -= 1e-3  # float16 scores
+
+        rest = np.flatnonzero(~stale)
+        for start in range(0, rest.size, SEARCH_BATCH_SIZE):
+            batch_rows = rest[start:start + SEARCH_BATCH_SIZE]
+            batch = np.asarray(vectors[batch_rows], dtype="float32")
+            best = np.full(batch_rows.size, -np.inf, dtype="float32")
+
+            for fresh_start in range(0, fresh.size, SEARCH_BATCH_SIZE):
+                fresh_rows = fresh[fresh_start:fresh_start + SEARCH_BATCH_SIZE]
+                sims = batch @ np.asarray(vectors[fresh_rows], dtype="float32").T
+                if groups is not None:
+                    sims[groups[batch_rows][:, None] == groups[fresh_rows][None, :]] = -np.inf
+                best = np.maximum(best, sims.max(axis=1))
+
+            stale[batch_rows[best > floor[batch_rows]]] = True
+
+    targets = np.flatnonzero(stale)
+    print(f"🕸️ Neighbours: {targets.size} of {total} rows searched again")
+    search_neighbours(vectors, targets, rows, scores, groups, index, row_ids)
+
+    return rows, scores
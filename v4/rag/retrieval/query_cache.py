@@ -0,0 +1,185 @@
+# rag/retrieval/query_cache.py
+
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+
+def normalize_query(text: str) -> str:
+    return re.sub(r"\s+", " ", text.strip().lower())
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU cache of query vectors with TTL eviction.
+
+    Keys are normalized enriched queries; values are the normalized
+    embeddings returned by model.encode. Optionally persisted to disk
+    (most recent entries first) so hot queries survive a restart.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_size: int = 2048,
+        ttl_seconds: float = 24 * 3600,
+        path: Path | None = None,
+    ):
+        self.model_name = model_name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+
+        self._entries: "OrderedDict[str, tuple[float, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._saver: threading.Thread | None = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if path is not None:
+            self.load()
+
+    # --------------------------
+
+    def get(self, text: str) -> np.ndarray | None:
+        key = normalize_query(text)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            created_at, vector = entry
+
+            if now - created_at > self.ttl_seconds:
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, text: str, vector: np.ndarray, created_at: float | None = None):
+        key = normalize_query(text)
+        vector = np.asarray(vector, dtype="float32").reshape(-1)
+        vector.setflags(write=False)
+
+        with self._lock:
+            self._entries[key] = (created_at or time.time(), vector)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+    # --------------------------
+    # Persistence
+    # --------------------------
+
+    def save_async(self):
+        """
+        save() in a background thread (off the request path); skipped
+        while a previous snapshot is still being written.
+        """
+        if self.path is None or (self._saver is not None and self._saver.is_alive()):
+            return
+
+        self._saver = threading.Thread(target=self.save, name="query-cache-save", daemon=True)
+        self._saver.start()
+
+    def save(self):
+        if self.path is None:
+            return
+
+        with self._save_lock:
+            self._save()
+
+    def _save(self):
+
+        now = time.time()
+
+        with self._lock:
+            live = [
+                (key, created_at, vector)
+                for key, (created_at, vector) in reversed(self._entries.items())
+                if now - created_at <= self.ttl_seconds
+            ]
+
+        if not live:
+            return
+
+        keys, created, vectors = zip(*live)
+
+        # Unique temp name: workers sharing the file never write into
+        # each other's snapshot before the rename
+        with tempfile.NamedTemporaryFile(
+            dir=self.path.parent, prefix=self.path.name + ".", suffix=".tmp", delete=False
+        ) as f:
+            tmp_path = Path(f.name)
+            try:
+                np.savez(
+                    f,
+                    model_name=np.array(self.model_name),
+                    keys=np.array(keys),
+                    created_at=np.array(created, dtype="float64"),
+                    vectors=np.vstack(vectors),
+                )
+            except BaseException:
+                f.close()
+                tmp_path.unlink(missing_ok=True)
+                raise
+
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        if self.path is None or not self.path.exists():
+            return
+
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if str(data["model_name"]) != self.model_name:
+                    return
+
+                keys = data["keys"].tolist()
+                created = data["created_at"].tolist()
+                vectors = data["vectors"]
+
+        except Exception as e:
+            print("[QUERY CACHE] load failed:", e)
+            return
+
+        now = time.time()
+
+        # stored most-recent first → insert oldest first to keep LRU order
+        for key, created_at, vector in reversed(
+            list(zip(keys, created, vectors))[:self.max_size]
+        ):
+            if now - created_at <= self.ttl_seconds:
+                self.put(key, vector, created_at=created_at)
@@ -0,0 +1,138 @@
+# rag/retrieval/runtime.py
+
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Tuple
+
+from rag.embeddings.backends import DEFAULT_MODEL_NAME, get_embedding_backend
+
+
+def resident_memory_bytes() -> int:
+    """
+    Current RSS of this process (Linux /proc), else peak RSS.
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return 0
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def file_version(path: Path) -> str:
+    """
+    Changes whenever the indexer rewrites the file (atomic replace).
+    """
+    stat = path.stat()
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+# ==========================
+# Registry
+# ==========================
+
+class RuntimeRegistry:
+    """
+    Process-wide owner of loaded models, indexes and stores, keyed by
+    (kind, name, version). Every retriever asks here instead of loading
+    its own copy, so a worker holds one embedding model and one copy of
+    each index no matter how many engines use them.
+
+    File-backed entries are versioned by mtime + size: a rebuilt index
+    is loaded again and the registry forgets the old version. Engines
+    that already hold the old object keep using it; it is freed with
+    the last of those references (plain Python refcounting, the
+    registry does not track holders).
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str, str], Dict] = {}
+        self._lock = threading.RLock()
+
+    def get(self, kind: str, name: str, version: str, load: Callable):
+        key = (kind, name, version)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                # Older versions of the same file are superseded
+                for stale in [k for k in self._entries if k[:2] == (kind, name)]:
+                    del self._entries[stale]
+
+                started = time.perf_counter()
+                rss_before = resident_memory_bytes()
+
+                entry = {
+                    "value": load(),
+                    "lookups": 0,
+                    "load_ms": round((time.perf_counter() - started) * 1000, 2),
+                    "rss_delta_bytes": resident_memory_bytes() - rss_before,
+                }
+                self._entries[key] = entry
+
+            # How often the entry was shared (diagnostics only)
+            entry["lookups"] += 1
+            return entry["value"]
+
+    # --------------------------
+
+    def model(
+        self,
+        backend: str | None = None,
+        model_name: str = DEFAULT_MODEL_NAME,
+        load: bool = True,
+    ):
+        """
+        Shared embedding backend. With load=False it is handed out
+        unloaded (the indexer only needs it on cache misses); the first
+        load() / encode() pays for the weights, once per process.
+        """
+        instance = get_embedding_backend(backend, model_name=model_name)
+        model = self.get(
+            "model",
+            instance.name,
+            model_name,
+            lambda: instance.load() if load else instance,
+        )
+        return model.load() if load else model
+
+    def file(self, kind: str, path: Path, load: Callable):
+        """
+        Shared object loaded from path (index, metadata store, postings...).
+        """
+        return self.get(kind, str(Path(path).resolve()), file_version(path), load)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = [
+                {
+                    "kind": kind,
+                    "name": name,
+                    "version": version,
+                    "lookups": entry["lookups"],
+                    "load_ms": entry["load_ms"],
+                    "rss_delta_bytes": entry["rss_delta_bytes"],
+                }
+                for (kind, name, version), entry in self._entries.items()
+            ]
+
+        return {"rss_bytes": resident_memory_bytes(), "entries": entries}
+
+
+# Process-wide instance (one per worker)
+runtime = RuntimeRegistry()
@@ -1,11 +1,31 @@
 
+import atexit
 import json
+import os
+import time
 from pathlib import Path
 from typing import List, Dict
 
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+from rag.indexing.index_factory import IVF_MODES, base_index, load_index_config, mmap_read_flags
+from rag.retrieval.attribute_index import AttributeIndex
+from rag.retrieval.catalog_columns import RangeIndex, load_columns
+from rag.retrieval.candidate_pool import (
+    CandidatePool,
+    CandidatePoolCache,
+    decode_cursor,
+    encode_cursor,
+    query_fingerprint,
+)
+from rag.retrieval.feature_reranker import FeatureReranker
+from rag.retrieval.lexical_index import LexicalIndex, reciprocal_rank_fusion
+from rag.retrieval.metadata_store import MetadataStore
+from rag.retrieval.query_cache import QueryEmbeddingCache
+from rag.retrieval.runtime import resident_memory_bytes, runtime
+from rag.retrieval.shard_router import ShardRouter
+from rag.retrieval.variant_groups import first_in_group
 
 
 # ==========================
@@ -17,7 +37,23 @@ BASE_DIR = Path(__file__).resolve().parents[1]  # rag/
 VECTOR_DIR = BASE_DIR / "data" / "vector_store"
 
 INDEX_PATH = VECTOR_DIR / "faiss_products.index"
+INDEX_CONFIG_PATH = VECTOR_DIR / "faiss_products_index.json"
+VECTORS_PATH = VECTOR_DIR / "faiss_products_vectors.npy"
+ROW_IDS_PATH = VECTOR_DIR / "faiss_products_ids.npy"
 META_PATH = VECTOR_DIR / "faiss_products_meta.json"
+META_STORE_PATH = VECTOR_DIR / "faiss_products_meta.bin"
+POSTINGS_PATH = VECTOR_DIR / "faiss_products_postings.json"
+LEXICAL_PATH = VECTOR_DIR / "faiss_products_lexical.npz"
+QUERY_CACHE_PATH = VECTOR_DIR / "query_cache.npz"
+FIELD_INDEX_PATH = VECTOR_DIR / "faiss_products_fields.index"
+FIELD_MAP_PATH = VECTOR_DIR / "faiss_products_fields.npz"
+SHARD_DIR = VECTOR_DIR / "shards"
+SHARD_MANIFEST_PATH = VECTOR_DIR / "faiss_products_shards.npz"
+VARIANTS_PATH = VECTOR_DIR / "faiss_products_variants.npy"
+NEIGHBOURS_PATH = VECTOR_DIR / "faiss_products_neighbours.npy"
+NEIGHBOUR_SCORES_PATH = VECTOR_DIR / "faiss_products_neighbour_scores.npy"
+COLUMNS_PATH = VECTOR_DIR / "faiss_products_columns.npz"
+RERANKER_WEIGHTS_PATH = BASE_DIR / "data" / "models" / "reranker_weights.json"
 
 
 # ==========================
@@ -27,6 +63,87 @@ META_PATH = VECTOR_DIR / "faiss_products_meta.json"
 MODEL_NAME = "all-MiniLM-L6-v2"
 DEFAULT_TOP_K = 20
 
+# Map the index file instead of reading it when the installed faiss
+# can (see mmap_read_flags): vectors stay in the page cache, shared
+# between workers, instead of a private copy per process.
+INDEX_MMAP = True
+
+# Query embedding cache (enriched query → vector)
+QUERY_CACHE_SIZE = 2048
+QUERY_CACHE_TTL = 24 * 3600  # seconds
+QUERY_CACHE_SAVE_EVERY = 50  # background snapshot every N misses (+ at exit)
+
+ENCODE_BATCH_SIZE = 64
+
+# Retrieval: dense (FAISS) | lexical (BM25) | hybrid (RRF of both)
+RETRIEVAL_MODES = {"dense", "lexical", "hybrid"}
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+
+# Multi-vector products (field index): off | max | weighted
+#   max       product score = best matching field
+#   weighted  sum of FIELD_WEIGHTS[field] * score over retrieved fields
+# Opt-in: field vectors replace the product index on the dense path,
+# so its index mode / exact re-rank no longer apply.
+MULTI_VECTOR_MODES = {"off", "max", "weighted"}
+MULTI_VECTOR = os.getenv("MULTI_VECTOR", "off")
+FIELD_WEIGHTS = {"title": 1.0, "attributes": 0.7, "use_case": 0.5}
+
+# Route dense search to product_type shards (fanout in shard_router).
+# Opt-in: pays off only when the catalog is large enough that a full
+# scan dominates the query.
+USE_SHARDS = os.getenv("SHARDS", "false").lower() == "true"
+
+# One result per variant group (set sizes / colors of the same design)
+COLLAPSE_VARIANTS = os.getenv("COLLAPSE_VARIANTS", "true").lower() == "true"
+
+# Linear re-rank of the candidates on structured features
+# (weights: RERANKER_WEIGHTS_PATH, defaults in feature_reranker)
+FEATURE_RERANK = os.getenv("FEATURE_RERANK", "true").lower() == "true"
+
+# Pagination: candidates fetched per query and kept per session, so
+# "show me more" pages are served without a new encode.
+CANDIDATE_POOL_DEPTH = 50
+CANDIDATE_POOL_CACHE_SIZE = 512
+CANDIDATE_POOL_TTL = 30 * 60  # seconds
+DEFAULT_SESSION = "default"
+
+
+# ==========================
+# Helpers
+# ==========================
+
+def fetch_depth(top_k: int) -> int:
+    return max(top_k * 3, CANDIDATE_POOL_DEPTH)
+
+
+def elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+# ==========================
+# Query enrichment
+# ==========================
+
+def enrich_query(query: str, memory=None) -> str:
+    if not memory:
+        return query
+
+    tokens = [query]
+
+    if memory.product_type:
+        tokens.append(memory.product_type)
+
+    for val in memory.attributes.values():
+        tokens.append(val)
+
+    if memory.use_case:
+        tokens.append(memory.use_case)
+
+    if memory.occasion:
+        tokens.append(memory.occasion)
+
+    return " ".join(dict.fromkeys(tokens))  # remove duplicates
+
 
 # ==========================
 # Search Engine
@@ -38,27 +155,787 @@ class ProductSearchEngine:
     """
 
     def __init__(self):
-        self._load_index()
-        self._load_metadata()
-        self._load_model()
+        # Per-component load time + RSS growth (reported by /readyz)
+        self.load_stats: Dict[str, Dict] = {}
+
+        self._timed_load("index", self._load_index)
+        self._timed_load("field_index", self._load_field_index)
+        self._timed_load("shards", self._load_shards)
+        self._timed_load("metadata", self._load_metadata)
+        self._timed_load("attribute_index", self._load_attribute_index)
+        self._timed_load("variant_groups", self._load_variant_groups)
+        self._timed_load("neighbours", self._load_neighbours)
+        self._timed_load("catalog_columns", self._load_catalog_columns)
+        self._timed_load("feature_reranker", self._load_feature_reranker)
+        self._timed_load("lexical_index", self._load_lexical_index)
+        self._timed_load("model", self._load_model)
+        self._timed_load("query_cache", self._load_query_cache)
+        self.candidate_pools = CandidatePoolCache(
+            max_size=CANDIDATE_POOL_CACHE_SIZE,
+            ttl_seconds=CANDIDATE_POOL_TTL,
+        )
+        self.last_timings: Dict = {}
+        self._rows_by_id = None
 
         # 🔥 DEBUG CHECK
         print("[DEBUG] FAISS index size:", self.index.ntotal)
         print("[DEBUG] Metadata size:", len(self.metadata))
+        if self.variant_groups is not None:
+            print("[DEBUG] Variant groups:", len(np.unique(self.variant_groups)))
+        print("[DEBUG] Index mode:", self.index_mode)
+        print("[DEBUG] Vector storage:", self.memory_stats())
+        print("[DEBUG] Query cache:", self.query_cache.stats())
+        print("[DEBUG] Shards:", self.shard_stats())
+        if self.feature_reranker is not None:
+            print("[DEBUG] Feature re-rank weights:", self.feature_reranker.weights_dict())
+        print("[DEBUG] Load stats:", self.load_stats)
+        print("[DEBUG] Runtime:", runtime.stats())
+
+    def _timed_load(self, name: str, load):
+        started = time.perf_counter()
+        rss_before = resident_memory_bytes()
+
+        load()
+
+        self.load_stats[name] = {
+            "load_ms": elapsed_ms(started),
+            "rss_delta_bytes": resident_memory_bytes() - rss_before,
+        }
+
+    def _read_index(self, path: Path, mode: str) -> faiss.Index:
+        # Shared with every other engine in this process
+        return runtime.file("faiss_index", path, lambda: self._read_index_file(path, mode))
+
+    def _read_index_file(self, path: Path, mode: str) -> faiss.Index:
+        flags = mmap_read_flags(mode) if INDEX_MMAP else None
+
+        if flags is not None:
+            try:
+                return faiss.read_index(str(path), flags)
+            except RuntimeError as e:
+                print("[DEBUG] mmap index load failed, reading fully:", e)
+
+        return faiss.read_index(str(path))
 
     def _load_index(self):
         if not INDEX_PATH.exists():
             raise FileNotFoundError(f"FAISS index not found at {INDEX_PATH}")
-        self.index = faiss.read_index(str(INDEX_PATH))
+
+        # Saved by the indexer: mode + default recall/latency knobs
+        self.index_config = load_index_config(INDEX_CONFIG_PATH)
+        self.index_mode = self.index_config["mode"]
+
+        self.index = self._read_index(INDEX_PATH, self.index_mode)
+        self.nprobe = self.index_config["nprobe"]
+        self.ef_search = self.index_config["ef_search"]
+
+        if self.index_mode in IVF_MODES:
+            faiss.extract_index_ivf(self.index).nprobe = self.nprobe
+        elif self.index_mode == "hnsw":
+            base_index(self.index).hnsw.efSearch = self.ef_search
+
+        # IndexIDMap2: FAISS labels are product ids → translate to rows
+        self.id_mapped = self.index_config["id_map"]
+        if self.id_mapped:
+            self.row_ids = np.load(ROW_IDS_PATH, mmap_mode="r")
+            self._id_order = np.argsort(self.row_ids)
+            self._sorted_ids = np.asarray(self.row_ids)[self._id_order]
+
+        # Float vectors for exact re-ranking (memory-mapped, paged on demand)
+        self.rerank_vectors = None
+        self.rerank_factor = self.index_config["rerank_factor"]
+        if self.index_config["rerank"] and VECTORS_PATH.exists():
+            self.rerank_vectors = np.load(VECTORS_PATH, mmap_mode="r")
+
+    def _load_field_index(self):
+        # Optional: without it dense search uses one vector per product.
+        self.field_index = None
+        self.multi_vector = "off"
+
+        if MULTI_VECTOR not in MULTI_VECTOR_MODES:
+            raise ValueError(
+                f"Unknown multi-vector mode '{MULTI_VECTOR}'. "
+                f"Expected one of: {sorted(MULTI_VECTOR_MODES)}"
+            )
+
+        if MULTI_VECTOR == "off" or not (FIELD_INDEX_PATH.exists() and FIELD_MAP_PATH.exists()):
+            return
+
+        self.field_index = self._read_index(FIELD_INDEX_PATH, self.index_mode)
+        self.multi_vector = MULTI_VECTOR
+
+        with np.load(FIELD_MAP_PATH, allow_pickle=False) as data:
+            self.field_rows = data["rows"].astype("int64")
+            self.field_kinds = data["kinds"].astype("int64")
+            names = data["names"].tolist()
+
+        self.field_weights = np.array(
+            [FIELD_WEIGHTS.get(name, 1.0) for name in names], dtype="float32"
+        )
+        self.fields_per_product = len(names)
+
+    def _load_shards(self):
+        # Optional: without shards every query scans the full index.
+        self.shards = None
+
+        if not (USE_SHARDS and SHARD_MANIFEST_PATH.exists()):
+            return
+
+        field_rows = self.field_rows if self.field_index is not None else None
+
+        try:
+            shards, unit_kind = ShardRouter.load(
+                SHARD_MANIFEST_PATH, SHARD_DIR, self._read_index, field_rows, self.index_mode
+            )
+        except (ValueError, RuntimeError) as e:
+            print("[DEBUG] Shards not loaded:", e)
+            return
+
+        # Shards must hold the same vectors as the active dense path
+        if (unit_kind == "fields") != (self.field_index is not None):
+            print(f"[DEBUG] Shards built over {unit_kind} → not used")
+            return
+
+        self.shards = shards
+        self.shard_unit_kind = unit_kind
 
     def _load_metadata(self):
+        # Binary store: rows decoded lazily from a shared memory map
+        if META_STORE_PATH.exists():
+            self.metadata = runtime.file(
+                "metadata", META_STORE_PATH, lambda: MetadataStore(META_STORE_PATH)
+            )
+            return
+
         if not META_PATH.exists():
             raise FileNotFoundError(f"Metadata file not found at {META_PATH}")
+        self.metadata = runtime.file("metadata", META_PATH, self._read_metadata_json)
+
+    def _read_metadata_json(self):
         with META_PATH.open("r", encoding="utf-8") as f:
-            self.metadata = json.load(f)
+            return json.load(f)
+
+    def _load_attribute_index(self):
+        # Optional: without postings the engine searches the whole index.
+        self.attribute_index = None
+        if POSTINGS_PATH.exists():
+            self.attribute_index = runtime.file(
+                "attribute_index", POSTINGS_PATH, lambda: AttributeIndex.load(POSTINGS_PATH)
+            )
+
+    def _load_variant_groups(self):
+        # Optional: without groups every variant is its own result.
+        self.variant_groups = None
+
+        if not (COLLAPSE_VARIANTS and VARIANTS_PATH.exists()):
+            return
+
+        groups = np.load(VARIANTS_PATH, mmap_mode="r")
+        if len(groups) != len(self.metadata):
+            print("[DEBUG] Variant groups out of date → not used")
+            return
+
+        self.variant_groups = groups
+
+    def _load_neighbours(self):
+        # Optional: without the kNN graph similar_to() returns nothing.
+        self.neighbours = self.neighbour_scores = None
+
+        if not (NEIGHBOURS_PATH.exists() and NEIGHBOUR_SCORES_PATH.exists()):
+            return
+
+        neighbours = np.load(NEIGHBOURS_PATH, mmap_mode="r")
+        if len(neighbours) != len(self.metadata):
+            print("[DEBUG] Neighbours out of date → not used")
+            return
+
+        self.neighbours = neighbours
+        self.neighbour_scores = np.load(NEIGHBOUR_SCORES_PATH, mmap_mode="r")
+
+    def _load_catalog_columns(self):
+        # Optional: numeric ranges and re-rank features need them.
+        self.catalog_columns = {}
+        self.range_index = None
+
+        if not COLUMNS_PATH.exists():
+            return
+
+        columns = load_columns(COLUMNS_PATH)
+        if any(len(columns[name]) != len(self.metadata) for name in columns if "." not in name):
+            print("[DEBUG] Catalog columns out of date → not used")
+            return
+
+        self.catalog_columns = columns
+        self.range_index = RangeIndex(columns)
+
+    def _load_feature_reranker(self):
+        # Optional: without it candidates keep the retrieval order.
+        self.feature_reranker = None
+
+        if FEATURE_RERANK:
+            self.feature_reranker = FeatureReranker.load(RERANKER_WEIGHTS_PATH)
+
+    def _row_of(self, product_id) -> int | None:
+        if isinstance(self.metadata, MetadataStore):
+            return self.metadata.row_of(product_id)
+
+        if self._rows_by_id is None:
+            self._rows_by_id = {
+                str(meta.get("product_id")): row
+                for row, meta in enumerate(self.metadata)
+            }
+        return self._rows_by_id.get(str(product_id))
+
+    def _row_groups(self, rows: np.ndarray) -> np.ndarray | None:
+        if self.variant_groups is None:
+            return None
+        return np.where(rows >= 0, self.variant_groups[rows.clip(min=0)], -1).astype("int64")
+
+    def _feature_key(self, memory=None, filters: Dict | None = None) -> str | None:
+        """
+        Memory signals the re-ranker uses (part of the pool fingerprint).
+        """
+        if self.feature_reranker is None or self.attribute_index is None:
+            return None
+
+        conditions = self.attribute_index.memory_conditions(memory, filters)
+        use_case = getattr(memory, "use_case", None)
+
+        return json.dumps([sorted(conditions.items()), use_case], ensure_ascii=False)
+
+    def _rerank_features(self, scores, rows, memory=None, filters=None, timings=None):
+        if self.feature_reranker is None:
+            return scores, rows
+
+        started = time.perf_counter()
+        scores, rows = self.feature_reranker.rerank(
+            scores,
+            rows,
+            self.catalog_columns,
+            self.attribute_index,
+            memory,
+            filters,
+        )
+
+        if timings is not None:
+            timings["feature_rerank_ms"] = round(
+                timings.get("feature_rerank_ms", 0.0) + elapsed_ms(started), 3
+            )
+
+        return scores, rows
+
+    def _collapse_variants(self, scores, rows):
+        """
+        Best-ranked row of every variant group (search_many path;
+        pages collapse inside CandidatePool.extend).
+        """
+        groups = self._row_groups(rows)
+        if groups is None:
+            return scores, rows
+
+        keep = (rows >= 0) & first_in_group(groups)
+        return scores[keep], rows[keep]
+
+    def _load_lexical_index(self):
+        # Optional: without it every mode degrades to dense.
+        self.lexical_index = None
+        if LEXICAL_PATH.exists():
+            self.lexical_index = runtime.file(
+                "lexical_index", LEXICAL_PATH, lambda: LexicalIndex.load(LEXICAL_PATH)
+            )
 
     def _load_model(self):
-        self.model = SentenceTransformer(MODEL_NAME)
+        # EMBEDDING_BACKEND=sentence_transformers | onnx | fake
+        self.model = runtime.model(model_name=MODEL_NAME)
+
+        index_model = self.index_config.get("model_name")
+        if index_model and index_model != self.model.name:
+            print(
+                f"[WARNING] Index built with '{index_model}', "
+                f"queries encoded with '{self.model.name}'"
+            )
+
+    def _load_query_cache(self):
+        self.query_cache = QueryEmbeddingCache(
+            self.model.name,
+            max_size=QUERY_CACHE_SIZE,
+            ttl_seconds=QUERY_CACHE_TTL,
+            path=QUERY_CACHE_PATH,
+        )
+        self._cache_unsaved = 0
+        atexit.register(self.query_cache.save)
+
+    def _encode_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Query embeddings through the LRU cache, shape (n, dim).
+        Only uncached queries reach model.encode, in one batch.
+        """
+        vectors: List[np.ndarray | None] = [self.query_cache.get(q) for q in queries]
+        missing = list(dict.fromkeys(
+            q for q, vec in zip(queries, vectors) if vec is None
+        ))
+
+        if missing:
+            encoded = self.model.encode(missing, batch_size=ENCODE_BATCH_SIZE)
+            fresh = dict(zip(missing, encoded))
+
+            for q, vec in fresh.items():
+                self.query_cache.put(q, vec)
+
+            vectors = [fresh[q] if vec is None else vec for q, vec in zip(queries, vectors)]
+
+            self._cache_unsaved += len(missing)
+            if self._cache_unsaved >= QUERY_CACHE_SAVE_EVERY:
+                self.query_cache.save_async()
+                self._cache_unsaved = 0
+
+        return np.vstack(vectors).astype("float32", copy=False)
+
+    def _search_params(
+        self,
+        selector=None,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+    ):
+        """
+        Per-call FAISS search parameters (None = index defaults).
+        """
+        if self.index_mode in IVF_MODES:
+            return faiss.SearchParametersIVF(
+                sel=selector,
+                nprobe=nprobe or self.nprobe,
+            )
+
+        if self.index_mode == "hnsw":
+            return faiss.SearchParametersHNSW(
+                sel=selector,
+                efSearch=ef_search or self.ef_search,
+            )
+
+        if selector is not None:
+            return faiss.SearchParameters(sel=selector)
+
+        return None
+
+    def _rows_to_labels(self, rows: np.ndarray) -> np.ndarray:
+        if not self.id_mapped:
+            return rows
+        return np.asarray(self.row_ids[rows], dtype="int64")
+
+    def _labels_to_rows(self, labels: np.ndarray) -> np.ndarray:
+        if not self.id_mapped:
+            return labels
+
+        pos = np.searchsorted(self._sorted_ids, labels).clip(max=len(self._sorted_ids) - 1)
+        rows = self._id_order[pos]
+        found = (labels >= 0) & (self._sorted_ids[pos] == labels)
+
+        return np.where(found, rows, -1)
+
+    def _rerank_exact(self, query_vecs, scores, indices):
+        """
+        Re-score each short list with exact float inner products.
+        """
+        out_scores = np.full_like(scores, -np.inf)
+        out_indices = np.full_like(indices, -1)
+
+        for row, query_vec in enumerate(query_vecs):
+            # sorted rows → sequential reads on the memory map
+            rows = np.sort(indices[row][indices[row] >= 0])
+            if not rows.size:
+                continue
+
+            exact = np.asarray(self.rerank_vectors[rows]) @ query_vec
+            order = np.argsort(-exact)
+
+            out_scores[row, :rows.size] = exact[order]
+            out_indices[row, :rows.size] = rows[order]
+
+        return out_scores, out_indices
+
+    def _select(self, memory=None, filters: Dict | None = None) -> np.ndarray | None:
+        """
+        Attribute + numeric range pre-filter: row ids to search, or None
+        for the whole index.
+        """
+        selection = None
+
+        if self.attribute_index is not None:
+            selection, dropped = self.attribute_index.select(memory, filters)
+
+            if dropped:
+                print("[SEARCH] Relaxed filters:", dropped)
+
+            if selection is not None and not selection.size:
+                print("[SEARCH] Filters match nothing → unfiltered search")
+                selection = None
+
+        if self.range_index is not None:
+            ranges = self.range_index.select(memory, filters)
+
+            if ranges is not None:
+                narrowed = ranges if selection is None else np.intersect1d(
+                    selection, ranges, assume_unique=True
+                )
+                if narrowed.size:
+                    selection = narrowed
+                else:
+                    print("[SEARCH] Range filters match nothing → dropped:",
+                        self.range_index.conditions(memory, filters))
+
+        return selection
+
+    def _search_vectors(
+        self,
+        query_vecs: np.ndarray,
+        fetch_k: int,
+        selection: np.ndarray | None = None,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+        rerank: bool | None = None,
+    ):
+        """
+        One index.search over a stack of query vectors sharing a selection.
+        """
+        if rerank is None:
+            rerank = self.rerank_vectors is not None
+        rerank = rerank and self.rerank_vectors is not None
+
+        # Field vectors are scored as stored: the float vectors are
+        # per product, not per field
+        if self.field_index is not None:
+            rerank = False
+
+        if rerank:
+            fetch_k *= self.rerank_factor
+
+        if self.shards is not None:
+            shard_ids = self.shards.route(query_vecs, selection)
+            if shard_ids is not None:
+                scores, indices = self._search_shards(
+                    query_vecs, fetch_k, shard_ids, selection,
+                    nprobe=nprobe, ef_search=ef_search,
+                )
+                if rerank:
+                    scores, indices = self._rerank_exact(query_vecs, scores, indices)
+                return scores, indices
+
+        if self.field_index is not None:
+            return self._search_fields(
+                query_vecs, fetch_k, selection, nprobe=nprobe, ef_search=ef_search
+            )
+
+        selector = None
+
+        if selection is not None:
+            fetch_k = min(fetch_k, int(selection.size))
+            selector = faiss.IDSelectorBatch(self._rows_to_labels(selection))
+
+        params = self._search_params(selector, nprobe=nprobe, ef_search=ef_search)
+        scores, labels = self.index.search(query_vecs, fetch_k, params=params)
+        indices = self._labels_to_rows(labels)
+
+        if rerank:
+            scores, indices = self._rerank_exact(query_vecs, scores, indices)
+
+        return scores, indices
+
+    def _search_fields(
+        self,
+        query_vecs: np.ndarray,
+        fetch_k: int,
+        selection: np.ndarray | None = None,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+    ):
+        """
+        Multi-vector search: one index.search over all field vectors,
+        then field hits are aggregated per product row (max or weighted
+        sum). fetch_k * fields_per_product hits always cover fetch_k
+        distinct products unless the candidates run out.
+        """
+        selector = None
+        limit = self.field_index.ntotal
+
+        if selection is not None:
+            fetch_k = min(fetch_k, int(selection.size))
+            field_ids = np.flatnonzero(np.isin(self.field_rows, selection))
+            limit = int(field_ids.size)
+            selector = faiss.IDSelectorBatch(field_ids.astype("int64"))
+
+        k = min(fetch_k * self.fields_per_product, max(limit, 1))
+        params = self._search_params(selector, nprobe=nprobe, ef_search=ef_search)
+        hit_scores, labels = self.field_index.search(query_vecs, k, params=params)
+
+        return self._aggregate_hits(hit_scores, labels, fetch_k)
+
+    def _search_shards(
+        self,
+        query_vecs: np.ndarray,
+        fetch_k: int,
+        shard_ids: List[int],
+        selection: np.ndarray | None = None,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+    ):
+        """
+        Search only the routed shards (cost ~ their size), then merge
+        the hits per product like the full-index path.
+        """
+        fields = self.shard_unit_kind == "fields"
+        per_product = self.fields_per_product if fields else 1
+        hit_scores, hit_units = [], []
+
+        if selection is not None:
+            fetch_k = min(fetch_k, int(selection.size))
+
+        for shard in shard_ids:
+            selector = None
+            limit = self.shards.indexes[shard].ntotal
+
+            if selection is not None:
+                local = np.flatnonzero(np.isin(self.shards.shard_rows(shard), selection))
+                if not local.size:
+                    continue
+                limit = int(local.size)
+                selector = faiss.IDSelectorBatch(local.astype("int64"))
+
+            k = min(fetch_k * per_product, limit)
+            params = self._search_params(selector, nprobe=nprobe, ef_search=ef_search)
+            scores, labels = self.shards.search(shard, query_vecs, k, params=params)
+
+            units = self.shards.shard_units(shard)
+            hit_scores.append(scores)
+            hit_units.append(np.where(labels >= 0, units[labels.clip(min=0)], -1))
+
+        if not hit_scores:
+            return (
+                np.full((len(query_vecs), fetch_k), -np.inf, dtype="float32"),
+                np.full((len(query_vecs), fetch_k), -1, dtype="int64"),
+            )
+
+        return self._aggregate_hits(
+            np.hstack(hit_scores), np.hstack(hit_units), fetch_k, fields=fields
+        )
+
+    def _aggregate_hits(self, hit_scores, hits, fetch_k: int, fields: bool = True):
+        """
+        Per query: hits (field ids, or product rows when fields is False)
+        → top fetch_k product rows, scored by max or weighted field sum.
+        """
+        out_scores = np.full((len(hit_scores), fetch_k), -np.inf, dtype="float32")
+        out_indices = np.full((len(hit_scores), fetch_k), -1, dtype="int64")
+
+        for q in range(len(hit_scores)):
+            valid = hits[q] >= 0
+            units = hits[q][valid]
+            if not units.size:
+                continue
+
+            unit_rows = self.field_rows[units] if fields else units
+            rows, inverse = np.unique(unit_rows, return_inverse=True)
+
+            if not fields or self.multi_vector == "max":
+                scores = np.full(rows.size, -np.inf, dtype="float32")
+                np.maximum.at(scores, inverse, hit_scores[q][valid])
+            else:
+                weights = self.field_weights[self.field_kinds[units]]
+                scores = np.zeros(rows.size, dtype="float32")
+                np.add.at(scores, inverse, weights * hit_scores[q][valid])
+
+            order = np.argsort(-scores, kind="stable")[:fetch_k]
+            out_scores[q, :order.size] = scores[order]
+            out_indices[q, :order.size] = rows[order]
+
+        return out_scores, out_indices
+
+    def _retrieval_mode(self, override: str | None = None) -> str:
+        mode = override or RETRIEVAL_MODE
+
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(
+                f"Unknown retrieval mode '{mode}'. "
+                f"Expected one of: {sorted(RETRIEVAL_MODES)}"
+            )
+
+        if mode != "dense" and self.lexical_index is None:
+            return "dense"
+
+        return mode
+
+    def _search_lexical(self, query: str, fetch_k: int, selection=None):
+        return self.lexical_index.search(query, fetch_k, selection)
+
+    def _combine(self, mode: str, dense, lexical, timings: Dict):
+        """
+        (scores, rows) for the selected retrieval mode.
+        """
+        if mode == "dense":
+            return dense
+
+        if mode == "lexical":
+            return lexical
+
+        start = time.perf_counter()
+        fused = reciprocal_rank_fusion([dense[1], lexical[1]])
+        timings["fusion_ms"] = round(timings.get("fusion_ms", 0.0) + elapsed_ms(start), 2)
+
+        return fused
+
+    def _build_results(self, scores, indices, top_k: int) -> List[Dict]:
+        results = []
+
+        for score, idx in zip(scores, indices):
+
+            if idx < 0:
+                continue
+
+            meta = self.metadata[idx]
+
+            results.append({
+                "product_id": meta.get("product_id"),
+                "score": float(score),
+                "category": meta.get("category"),
+                "source": meta.get("source"),
+                "url": meta.get("url"),
+                "images": meta.get("images", []),
+                **self._numbers(idx),
+            })
+
+            if len(results) >= top_k:
+                break
+
+        return results
+
+    def _numbers(self, row: int) -> Dict:
+        """
+        price / availability / capacity / size of a row (None when unknown).
+        """
+        numbers = {}
+
+        for name in ("price", "availability", "capacity", "size"):
+            column = self.catalog_columns.get(name)
+            if column is not None:
+                value = float(column[row])
+                numbers[name] = None if np.isnan(value) else round(value, 2)
+
+        return numbers
+
+    def memory_stats(self) -> Dict:
+        """
+        Vector storage footprint of the loaded index.
+        """
+        ntotal = max(self.index.ntotal, 1)
+        index_bytes = INDEX_PATH.stat().st_size
+
+        try:
+            code_bytes = int(self.index.sa_code_size())
+        except RuntimeError:
+            code_bytes = None  # e.g. HNSW: no standalone codes
+
+        return {
+            "mode": self.index_mode,
+            "ntotal": self.index.ntotal,
+            "dim": self.index.d,
+            "code_bytes_per_vector": code_bytes,
+            "bytes_per_vector": round(index_bytes / ntotal, 1),
+            "index_bytes": index_bytes,
+            "rerank_vectors_bytes": (
+                int(self.rerank_vectors.nbytes)
+                if self.rerank_vectors is not None else 0
+            ),
+            "field_index_bytes": (
+                FIELD_INDEX_PATH.stat().st_size
+                if self.field_index is not None else 0
+            ),
+            "shard_index_bytes": (
+                sum(self.shards.index_bytes)
+                if self.shards is not None else 0
+            ),
+        }
+
+    def shard_stats(self) -> Dict:
+        """
+        Per-shard size, index bytes and search latency.
+        """
+        return self.shards.stats() if self.shards is not None else {}
+
+    def similar_to(
+        self,
+        product_id,
+        top_k: int = 5,
+        memory=None,
+        filters: Dict | None = None,
+    ) -> List[Dict]:
+        """
+        Products closest to product_id: one lookup in the precomputed
+        kNN graph, no encode / index search. memory / filters keep only
+        neighbours inside the attribute selection.
+        """
+        row = self._row_of(product_id)
+        if row is None or self.neighbours is None:
+            return []
+
+        rows = np.asarray(self.neighbours[row], dtype="int64")
+        scores = np.asarray(self.neighbour_scores[row], dtype="float32")
+
+        selection = self._select(memory, filters)
+        if selection is not None:
+            inside = np.isin(rows, selection)
+            rows, scores = rows[inside], scores[inside]
+
+        scores, rows = self._collapse_variants(scores, rows)
+
+        return self._build_results(scores, rows, top_k)
+
+    def _fill_pool(
+        self,
+        pool: CandidatePool,
+        mode: str,
+        depth: int,
+        timings: Dict,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+        rerank: bool | None = None,
+        memory=None,
+        filters: Dict | None = None,
+    ):
+        """
+        (Re-)run retrieval at the given depth, re-rank on features and
+        append unseen rows. Reuses the pool's query vector: no encode.
+        """
+        limit = self.index.ntotal if pool.selection is None else int(pool.selection.size)
+        depth = min(depth, limit)
+        dense = lexical = None
+        short = []
+
+        if mode != "lexical":
+            started = time.perf_counter()
+            scores, indices = self._search_vectors(
+                pool.query_vec,
+                depth,
+                pool.selection,
+                nprobe=nprobe,
+                ef_search=ef_search,
+                rerank=rerank,
+            )
+            dense = (scores[0], indices[0])
+            short.append(int((indices[0] >= 0).sum()) < depth)
+            timings["dense_ms"] = round(timings.get("dense_ms", 0.0) + elapsed_ms(started), 2)
+
+        if mode != "dense":
+            started = time.perf_counter()
+            lexical = self._search_lexical(pool.query, depth, pool.selection)
+            short.append(lexical[1].size < depth)
+            timings["lexical_ms"] = round(timings.get("lexical_ms", 0.0) + elapsed_ms(started), 2)
+
+        scores, rows = self._combine(mode, dense, lexical, timings)
+        scores, rows = self._rerank_features(scores, rows, memory, filters, timings)
+
+        pool.extend(scores, rows, self._row_groups(rows))
+        pool.depth = depth
+        pool.extensions += 1
+        pool.exhausted = depth >= limit or all(short)
 
     # --------------------------
 
@@ -68,10 +945,55 @@ class ProductSearchEngine:
         memory=None,
         top_k: int = 3,
         offset: int = 0,
+        filters: Dict | None = None,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+        rerank: bool | None = None,
+        retrieval_mode: str | None = None,
+        session_id: str | None = None,
     ) -> List[Dict]:
+        """
+        Results offset..offset+top_k of the ranked candidates.
+        """
+        return self.search_page(
+            query,
+            memory=memory,
+            page_size=top_k,
+            offset=offset,
+            filters=filters,
+            nprobe=nprobe,
+            ef_search=ef_search,
+            rerank=rerank,
+            retrieval_mode=retrieval_mode,
+            session_id=session_id,
+        )["results"]
+
+    def search_page(
+        self,
+        query: str,
+        memory=None,
+        page_size: int = 3,
+        cursor: str | None = None,
+        offset: int = 0,
+        filters: Dict | None = None,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+        rerank: bool | None = None,
+        retrieval_mode: str | None = None,
+        session_id: str | None = None,
+    ) -> Dict:
+        """
+        Cursor-based pagination.
+
+        The first call for a (session, query fingerprint) encodes the
+        query and fetches a candidate pool; later pages are sliced from
+        the pool and the pool is deepened when a page runs past it.
+        Pass back next_cursor to get the following page.
+        """
+        page = {"results": [], "next_cursor": None, "offset": offset, "pool_size": 0}
 
         if not query or not query.strip():
-            return []
+            return page
 
         print("\n================ SEARCH START ================")
         print("[SEARCH] Raw query:", query)
@@ -79,66 +1001,179 @@ class ProductSearchEngine:
         # -------------------------
         # Query enrichment (SAFE)
         # -------------------------
-        if memory:
-            tokens = [query]
-
-            if memory.product_type:
-                tokens.append(memory.product_type)
+        query = enrich_query(query, memory)
 
-            for val in memory.attributes.values():
-                tokens.append(val)
-
-            if memory.use_case:
-                tokens.append(memory.use_case)
+        print("[SEARCH] Enriched query:", query)
 
-            if memory.occasion:
-                tokens.append(memory.occasion)
+        mode = self._retrieval_mode(retrieval_mode)
+        timings: Dict = {}
 
-            query = " ".join(dict.fromkeys(tokens))  # remove duplicates
+        # -------------------------
+        # Attribute pre-filter
+        # -------------------------
+        selection = self._select(memory, filters)
 
-        print("[SEARCH] Enriched query:", query)
+        if selection is not None:
+            print("[SEARCH] Candidate ids after filters:", selection.size)
 
         # -------------------------
-        # Embedding
+        # Candidate pool (per session + fingerprint)
         # -------------------------
-        query_vec = self.model.encode(
+        fingerprint = query_fingerprint(
             query,
-            convert_to_numpy=True,
-            normalize_embeddings=True,
-        ).reshape(1, -1)
+            selection,
+            mode=mode,
+            nprobe=nprobe,
+            ef_search=ef_search,
+            rerank=rerank,
+            features=self._feature_key(memory, filters),
+        )
+        if cursor:
+            offset = decode_cursor(cursor, fingerprint)
+
+        session_id = session_id or DEFAULT_SESSION
+        pool = self.candidate_pools.get(session_id, fingerprint)
+
+        if pool is None:
+            query_vec = None
+
+            # -------------------------
+            # Embedding
+            # -------------------------
+            if mode != "lexical":
+                started = time.perf_counter()
+                query_vec = self._encode_queries([query])
+                timings["encode_ms"] = elapsed_ms(started)
+
+            pool = CandidatePool(query=query, selection=selection, query_vec=query_vec)
+            self.candidate_pools.put(session_id, fingerprint, pool)
+        else:
+            print(f"[SEARCH] Candidate pool hit: {len(pool)} rows, offset {offset}")
 
         # -------------------------
-        # Search
+        # Search (dense / lexical), deepened on demand
         # -------------------------
-        fetch_k = max(top_k * 3, 20)
-        scores, indices = self.index.search(query_vec, fetch_k)
-
-        results = []
+        needed = offset + page_size
 
-        for score, idx in zip(scores[0], indices[0]):
+        while len(pool) < needed and not pool.exhausted:
+            depth = max(fetch_depth(needed), pool.depth * 2)
+            self._fill_pool(
+                pool,
+                mode,
+                depth,
+                timings,
+                nprobe=nprobe,
+                ef_search=ef_search,
+                rerank=rerank,
+                memory=memory,
+                filters=filters,
+            )
 
-            if idx < 0:
-                continue
+        results = self._build_results(
+            pool.scores[offset:],
+            pool.rows[offset:],
+            page_size,
+        )
+        next_offset = offset + len(results)
 
-            meta = self.metadata[idx]
+        if results and (next_offset < len(pool) or not pool.exhausted):
+            page["next_cursor"] = encode_cursor(fingerprint, next_offset)
 
-            results.append({
-                "product_id": meta.get("product_id"),
-                "score": float(score),
-                "category": meta.get("category"),
-                "source": meta.get("source"),
-                "url": meta.get("url"),
-                "images": meta.get("images", []),
-            })
+        page.update(results=results, offset=offset, pool_size=len(pool))
 
-            if len(results) >= top_k:
-                break
+        self.last_timings = timings
+        print(f"[SEARCH] Retrieval ({mode}) timings ms:", timings)
 
         print("[SEARCH] Final product_ids:",
             [r["product_id"] for r in results])
         print("================ SEARCH END =================\n")
 
-        return results[offset: offset + top_k]
+        return page
+
+    def search_many(
+        self,
+        queries: List[str],
+        memories: List | None = None,
+        top_k: int = 3,
+        filters: Dict | None = None,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+        rerank: bool | None = None,
+        retrieval_mode: str | None = None,
+    ) -> List[List[Dict]]:
+        """
+        Batched search: one model.encode for all queries and one
+        index.search per distinct attribute selection (a single call
+        when no filters apply). Returns one search()-shaped list per query.
+        """
+        if memories is None:
+            memories = [None] * len(queries)
+
+        if len(memories) != len(queries):
+            raise ValueError("queries and memories must have the same length")
+
+        results: List[List[Dict]] = [[] for _ in queries]
+
+        live = [i for i, q in enumerate(queries) if q and q.strip()]
+        if not live:
+            return results
+
+        mode = self._retrieval_mode(retrieval_mode)
+        timings: Dict = {}
+
+        enriched = [enrich_query(queries[i], memories[i]) for i in live]
+        selections = [self._select(memories[i], filters) for i in live]
+
+        # Dense: one encode batch, one index.search per distinct selection
+        dense = [None] * len(live)
+        groups: Dict = {}
+
+        if mode != "lexical":
+            started = time.perf_counter()
+            query_vecs = self._encode_queries(enriched)
+            timings["encode_ms"] = elapsed_ms(started)
+
+            for pos, selection in enumerate(selections):
+                key = None if selection is None else selection.tobytes()
+                groups.setdefault(key, (selection, []))[1].append(pos)
+
+            started = time.perf_counter()
+            for selection, positions in groups.values():
+                scores, indices = self._search_vectors(
+                    query_vecs[positions],
+                    fetch_depth(top_k),
+                    selection,
+                    nprobe=nprobe,
+                    ef_search=ef_search,
+                    rerank=rerank,
+                )
+                for row, pos in enumerate(positions):
+                    dense[pos] = (scores[row], indices[row])
+            timings["dense_ms"] = elapsed_ms(started)
+
+        # Lexical: posting-list sums, per query
+        lexical = [None] * len(live)
+
+        if mode != "dense":
+            started = time.perf_counter()
+            for pos, (text, selection) in enumerate(zip(enriched, selections)):
+                lexical[pos] = self._search_lexical(text, fetch_depth(top_k), selection)
+            timings["lexical_ms"] = elapsed_ms(started)
+
+        for pos, i in enumerate(live):
+            scores, rows = self._combine(mode, dense[pos], lexical[pos], timings)
+            scores, rows = self._rerank_features(scores, rows, memories[i], filters, timings)
+            scores, rows = self._collapse_variants(scores, rows)
+            results[i] = self._build_results(scores, rows, top_k)
+
+        self.last_timings = timings
+
+        print(
+            f"[SEARCH] search_many ({mode}): {len(live)} queries, "
+            f"{len(groups)} index calls, timings ms: {timings}"
+        )
+
+        return results
 
 
 # ==========================
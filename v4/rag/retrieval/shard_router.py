@@ -0,0 +1,189 @@
+# rag/retrieval/shard_router.py
+
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from rag.retrieval.attribute_index import normalize_key
+
+
+# ==========================
+# Config
+# ==========================
+
+# product_type groups smaller than this go to the catch-all shard
+SHARD_MIN_SIZE = 50
+OTHER_SHARD = "other"
+
+# Queries without a product_type scan the SHARD_FANOUT shards whose
+# centroid is closest to the query (0 = scan the full index instead).
+SHARD_FANOUT = 3
+
+
+def shard_key(product_type) -> str:
+    """
+    Shard of a product: its product_type group
+    ("piatto_fondo" → "piatto", same grouping as AttributeIndex.lookup).
+    """
+    key = normalize_key(product_type)
+    if key is None:
+        return OTHER_SHARD
+
+    return re.sub(r"[^a-z0-9]+", "_", key.split("_")[0]) or OTHER_SHARD
+
+
+def shard_groups(products: List[Dict | None]) -> Dict[str, np.ndarray]:
+    """
+    Shard name → sorted FAISS rows; products[i] is the structured
+    product at row i (None when unknown).
+    """
+    groups: Dict[str, List[int]] = {}
+
+    for row, product in enumerate(products):
+        key = shard_key((product or {}).get("product_type"))
+        groups.setdefault(key, []).append(row)
+
+    merged: Dict[str, List[int]] = {}
+    for key, rows in groups.items():
+        target = key if len(rows) >= SHARD_MIN_SIZE else OTHER_SHARD
+        merged.setdefault(target, []).extend(rows)
+
+    return {
+        key: np.sort(np.asarray(rows, dtype="int64"))
+        for key, rows in sorted(merged.items())
+    }
+
+
+# ==========================
+# Router
+# ==========================
+
+class ShardRouter:
+    """
+    Per-shard FAISS indexes over "units": product vectors, or field
+    vectors of the multi-vector index. Each shard is labelled by local
+    position; units[offsets[s]:offsets[s + 1]] gives the global unit ids.
+    """
+
+    def __init__(
+        self,
+        names: List[str],
+        offsets: np.ndarray,
+        units: np.ndarray,
+        unit_rows: np.ndarray,
+        row_shard: np.ndarray,
+        centroids: np.ndarray,
+        indexes: List,
+        index_bytes: List[int],
+    ):
+        self.names = names
+        self.offsets = offsets
+        self.units = units
+        self.unit_rows = unit_rows  # product row of every entry of units
+        self.row_shard = row_shard
+        self.centroids = centroids
+        self.indexes = indexes
+        self.index_bytes = index_bytes
+
+        self._lock = threading.Lock()
+        self._searches = np.zeros(len(names), dtype="int64")
+        self._total_ms = np.zeros(len(names), dtype="float64")
+
+    @classmethod
+    def load(cls, manifest_path: Path, shard_dir: Path, read_index, field_rows=None, mode: str = "flat"):
+        """
+        field_rows maps field ids to product rows (unit_kind "fields").
+        read_index(path, mode) opens one shard; mode is the shard's index
+        mode from the manifest (older manifests: the product index mode).
+        """
+        with np.load(manifest_path, allow_pickle=False) as data:
+            names = data["names"].tolist()
+            offsets = data["offsets"]
+            units = data["units"]
+            row_shard = data["row_shard"]
+            centroids = data["centroids"]
+            unit_kind = str(data["unit_kind"])
+            modes = data["modes"].tolist() if "modes" in data.files else [mode] * len(names)
+
+        if unit_kind == "fields":
+            if field_rows is None:
+                raise ValueError("field shards need the field index map")
+            unit_rows = field_rows[units]
+        else:
+            unit_rows = units
+
+        paths = [shard_dir / f"{name}.index" for name in names]
+
+        return cls(
+            names,
+            offsets,
+            units,
+            unit_rows,
+            row_shard,
+            centroids,
+            [read_index(path, shard_mode) for path, shard_mode in zip(paths, modes)],
+            [path.stat().st_size for path in paths],
+        ), unit_kind
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    # --------------------------
+
+    def shard_units(self, shard: int) -> np.ndarray:
+        return self.units[self.offsets[shard]:self.offsets[shard + 1]]
+
+    def shard_rows(self, shard: int) -> np.ndarray:
+        return self.unit_rows[self.offsets[shard]:self.offsets[shard + 1]]
+
+    def route(self, query_vecs: np.ndarray, selection: np.ndarray | None) -> List[int] | None:
+        """
+        Shards to scan, or None for the full index.
+
+        A product_type filter (via the attribute selection) pins the
+        query to the shards holding the selected rows; otherwise the
+        SHARD_FANOUT nearest centroids per query are scanned.
+        """
+        if selection is not None:
+            shards = np.unique(self.row_shard[selection]).tolist()
+            return shards if len(shards) < len(self.names) else None
+
+        if not SHARD_FANOUT or SHARD_FANOUT >= len(self.names):
+            return None
+
+        sims = query_vecs @ self.centroids.T
+        nearest = np.argsort(-sims, axis=1)[:, :SHARD_FANOUT]
+
+        return np.unique(nearest).tolist()
+
+    def search(self, shard: int, query_vecs: np.ndarray, k: int, params=None):
+        started = time.perf_counter()
+        result = self.indexes[shard].search(query_vecs, k, params=params)
+        ms = (time.perf_counter() - started) * 1000
+
+        with self._lock:
+            self._searches[shard] += 1
+            self._total_ms[shard] += ms
+
+        return result
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                name: {
+                    "units": int(self.offsets[s + 1] - self.offsets[s]),
+                    "products": int((self.row_shard == s).sum()),
+                    "index_bytes": self.index_bytes[s],
+                    "searches": int(self._searches[s]),
+                    "avg_ms": (
+                        round(float(self._total_ms[s] / self._searches[s]), 3)
+                        if self._searches[s] else None
+                    ),
+                }
+                for s, name in enumerate(self.names)
+            }
+
@@ -0,0 +1,125 @@
+# rag/retrieval/variant_groups.py
+
+from typing import Dict, List
+
+import numpy as np
+
+from rag.retrieval.attribute_index import normalize_key
+
+
+# ==========================
+# Config
+# ==========================
+
+# Cosine above which two products with the same variant key are the
+# same design ("Set 6 tazze ... cc 280" / "Set 12 tazze ... cc 280").
+VARIANT_SIMILARITY = 0.9
+
+# Attributes a variant must share; set_size and color may differ.
+VARIANT_KEY_FIELDS = ("material", "capacity", "size", "shape")
+
+BLOCK_BATCH_SIZE = 1024
+
+
+def variant_key(product: Dict | None) -> tuple | None:
+    """
+    Products can only be variants of each other when their keys match.
+    None (no product_type) = never grouped.
+    """
+    product = product or {}
+    product_type = normalize_key(product.get("product_type"))
+    if product_type is None:
+        return None
+
+    attributes = product.get("attributes") or {}
+    return (product_type,) + tuple(
+        normalize_key(attributes.get(field)) for field in VARIANT_KEY_FIELDS
+    )
+
+
+# ==========================
+# Offline grouping
+# ==========================
+
+def build_variant_groups(products: List[Dict | None], vectors: np.ndarray) -> np.ndarray:
+    """
+    Variant group id per FAISS row: the row of the group's leader.
+
+    Rows are blocked by variant_key; inside a block each row joins the
+    first earlier leader with cosine >= VARIANT_SIMILARITY, otherwise
+    it leads a new group (no chaining through intermediate rows).
+    """
+    groups = np.arange(len(products), dtype="int32")
+    blocks: Dict[tuple, List[int]] = {}
+
+    for row, product in enumerate(products):
+        key = variant_key(product)
+        if key is not None:
+            blocks.setdefault(key, []).append(row)
+
+    for rows in blocks.values():
+        if len(rows) < 2:
+            continue
+
+        leader_rows: List[int] = []
+        leader_vectors = np.empty((0, vectors.shape[1]), dtype="float32")
+
+        for start in range(0, len(rows), BLOCK_BATCH_SIZE):
+            batch = rows[start:start + BLOCK_BATCH_SIZE]
+            block_vectors = np.asarray(vectors[batch], dtype="float32")
+
+            for row, vec in zip(batch, block_vectors):
+                if leader_rows:
+                    sims = leader_vectors @ vec
+                    best = int(np.argmax(sims))
+                    if sims[best] >= VARIANT_SIMILARITY:
+                        groups[row] = leader_rows[best]
+                        continue
+
+                leader_rows.append(row)
+                leader_vectors = np.vstack([leader_vectors, vec])
+
+    return groups
+
+
+def regrouped_rows(groups: np.ndarray, old_groups: np.ndarray, previous: np.ndarray) -> np.ndarray:
+    """
+    Mask of rows whose group has other members than in the previous
+    build (previous: old row per row, -1 = new product).
+
+    Leader ids differ between builds, so groups are compared as
+    partitions: an old group split across new ones, or a new group
+    merging old ones, marks all of their rows.
+    """
+    kept = np.flatnonzero(previous >= 0)
+    old_labels = old_groups[previous[kept]]
+    new_labels = groups[kept]
+
+    pairs = np.unique(np.stack([old_labels, new_labels], axis=1), axis=0)
+    split, split_counts = np.unique(pairs[:, 0], return_counts=True)
+    merged, merged_counts = np.unique(pairs[:, 1], return_counts=True)
+
+    dirty = np.isin(old_labels, split[split_counts > 1])
+    dirty |= np.isin(new_labels, merged[merged_counts > 1])
+
+    regrouped = np.zeros(len(groups), dtype=bool)
+    regrouped[kept[dirty]] = True
+    return regrouped
+
+
+# ==========================
+# Query time
+# ==========================
+
+def first_in_group(groups: np.ndarray, seen: np.ndarray | None = None) -> np.ndarray:
+    """
+    Mask keeping the first (best-ranked) entry of every group,
+    skipping groups already in seen.
+    """
+    keep = np.zeros(groups.size, dtype=bool)
+    keep[np.unique(groups, return_index=True)[1]] = True
+
+    if seen is not None and seen.size:
+        keep &= ~np.isin(groups, seen)
+
+    return keep
@@ -0,0 +1,69 @@
+# rag/workflow/events.py
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterable
+
+
+# ==========================
+# Turn event sink
+# ==========================
+
+# Set for the duration of a streamed turn (SSE /chat/stream). Stages
+# report progress through emit(); on the plain /chat path no sink is
+# set and emit() does nothing.
+#
+# Events:
+#   stage    {"stage": ..., ...}      pipeline progress
+#   results  {"results": [...]}       product cards, right after call_rag
+#   token    {"text": ...}            reply text as it is produced
+#
+# Streamed tokens are provisional: the final reply (returned by the
+# handler) is authoritative, e.g. after the material answer guards.
+_sink: ContextVar[Callable[[str, dict], None] | None] = ContextVar("event_sink", default=None)
+
+
+@contextmanager
+def event_sink(callback: Callable[[str, dict], None]):
+    token = _sink.set(callback)
+    try:
+        yield
+    finally:
+        _sink.reset(token)
+
+
+def streaming() -> bool:
+    return _sink.get() is not None
+
+
+def emit(event: str, data: dict):
+    sink = _sink.get()
+    if sink is not None:
+        sink(event, data)
+
+
+def emit_text(text: str):
+    if text:
+        emit("token", {"text": text})
+
+
+def stream_text(chunks: Iterable[str]) -> str:
+    """
+    Emits each chunk as a token event; returns the whole text.
+    """
+    parts = []
+    for chunk in chunks:
+        emit_text(chunk)
+        parts.append(chunk)
+    return "".join(parts)
+
+
+def generate_reply(client, prompt: str, temperature: float = 0.2, call_site: str = "unknown") -> str:
+    """
+    LLM-written reply text: streamed token by token while a sink is
+    active, a single generate() call otherwise.
+    """
+    if streaming():
+        return stream_text(client.stream(prompt, temperature=temperature, call_site=call_site)).strip()
+
+    return client.generate(prompt, temperature=temperature, call_site=call_site)
@@ -6,6 +6,7 @@
 import random
 import re
 from rag.workflow.product_description import generate_product_snippet
+from rag.workflow.events import emit_text
 
 
 INTRO_TEMPLATES = [
@@ -129,19 +130,23 @@ def generate_explanation(results, memory=None):
         intro = random.choice(GENERIC_INTROS)
 
     lines = [intro, ""]
+    emit_text(intro + "\n\n")
 
     # Limit to first 3 for demo stability
     for r in results[:3]:
         snippet = safe_generate_snippet(r)
         url = r.get("url", "")
 
-        lines.append(f"• <strong>{snippet}</strong>")
-        lines.append(
+        item = [
+            f"• <strong>{snippet}</strong>",
             f'<a href="{url}" target="_blank" '
             f'style="color:#2563eb;text-decoration:none;font-size:13px;">'
-            f'🔗 Vedi prodotto</a>'
-        )
-        lines.append("")
+            f'🔗 Vedi prodotto</a>',
+            "",
+        ]
+        lines.extend(item)
+        # each product line is sent as soon as its snippet is ready
+        emit_text("\n".join(item) + "\n")
 
     return "\n".join(lines).strip()
 
@@ -1,6 +1,10 @@
 # rag/workflow/extraction.py
 
+import re
 from typing import Dict
+
+from rag.ingestion.attribute_extractors import CAPACITY_PATTERN, SIZE_PATTERN
+from rag.retrieval.catalog_columns import CAPACITY_UNITS_ML
 from rag.workflow.schemas import SearchMemory
 from rag.workflow.signals import extract_product_signals
 from rag.workflow.vocab import (
@@ -12,6 +16,23 @@ from rag.workflow.intent_vocab import PROMOTION_TERMS
 
 NEGATION_ANY = "__ANY__"
 
+# "bicchieri da 300 ml" also matches 255–345 ml
+CAPACITY_TOLERANCE = 0.15
+SIZE_TOLERANCE = 0.10
+
+NUMBER = r"(\d+(?:[.,]\d+)?)"
+EURO = r"\s*(?:€|euro)"
+
+PRICE_BETWEEN = re.compile(rf"tra\s*{NUMBER}\s*e\s*{NUMBER}{EURO}")
+PRICE_MAX = re.compile(rf"(?:sotto|meno di|massimo|max|fino a|entro)\s*(?:i\s*|ai\s*)?{NUMBER}{EURO}")
+PRICE_MIN = re.compile(rf"(?:sopra|più di|oltre|almeno|minimo)\s*(?:i\s*|ai\s*)?{NUMBER}{EURO}")
+
+# "disponibili" → in stock; "non disponibili" / "indisponibili" → out of stock
+IN_STOCK_TERMS = r"(?:disponibil|in stock|pronta consegna|in magazzino)"
+STOCK_PATTERN = re.compile(
+    rf"(?:\b(?P<negation>non|senza)\s+(?:\w+\s+){{0,2}})?\b(?P<prefix>in)?{IN_STOCK_TERMS}"
+)
+
 
 # =====================================================
 # Utilities
@@ -59,14 +80,85 @@ def extract_negations(text: str) -> dict:
     return negations
 
 
+# =====================================================
+# Numeric constraints
+# =====================================================
+
+def to_number(value: str) -> float:
+    return float(value.replace(",", "."))
+
+
+def standalone_match(pattern: re.Pattern, text: str):
+    """
+    First match not glued to a word ("nel 2020" is not "l 2020").
+    """
+    for match in pattern.finditer(text):
+        before = text[match.start() - 1] if match.start() else " "
+        after = text[match.end()] if match.end() < len(text) else " "
+        if not before.isalpha() and not after.isalpha():
+            return match
+    return None
+
+
+def tolerance_range(value: float, tolerance: float) -> Dict:
+    return {"min": round(value * (1 - tolerance), 2), "max": round(value * (1 + tolerance), 2)}
+
+
+def extract_numeric_constraints(text: str) -> Dict:
+    """
+    Capacity (ml), size (cm), price (euro) and stock ranges for
+    SearchMemory.constraints, in the units of the catalog columns.
+    Reuses the catalog extractors' CAPACITY_PATTERN / SIZE_PATTERN.
+    """
+    text = text.lower()
+    constraints: Dict = {}
+
+    match = standalone_match(CAPACITY_PATTERN, text)
+    if match:
+        unit = (match.group(1) or match.group(4)).lower()
+        value = to_number(match.group(2) or match.group(3))
+        constraints["capacity"] = tolerance_range(value * CAPACITY_UNITS_ML[unit], CAPACITY_TOLERANCE)
+
+    match = standalone_match(SIZE_PATTERN, text)
+    if match:
+        value = to_number(match.group(1) or match.group(2))
+        constraints["size"] = tolerance_range(value, SIZE_TOLERANCE)
+
+    between = PRICE_BETWEEN.search(text)
+    if between:
+        low, high = sorted([to_number(between.group(1)), to_number(between.group(2))])
+        constraints["price"] = {"min": low, "max": high}
+    else:
+        price = {}
+        for bound, pattern in (("max", PRICE_MAX), ("min", PRICE_MIN)):
+            match = pattern.search(text)
+            if match:
+                price[bound] = to_number(match.group(1))
+        if price:
+            constraints["price"] = price
+
+    match = STOCK_PATTERN.search(text)
+    if match:
+        negated = match.group("negation") or match.group("prefix")
+        constraints["availability"] = {"max": 0} if negated else {"min": 1}
+
+    return constraints
+
+
 # =====================================================
 # Main Extraction
 # =====================================================
 
 def extract_memory(
     user_message: str,
-    memory: SearchMemory
+    memory: SearchMemory,
+    raw_message: str | None = None,
 ) -> Dict:
+    """
+    user_message is the normalized text. Numbers are read from
+    raw_message when given: normalization drops decimal commas
+    ("1,5 lt" → "1 5 lt").
+    """
 
     user_message = user_message.lower()
 
@@ -101,4 +193,11 @@ def extract_memory(
     if negations:
         updates["negations"] = negations
 
+    # --------------------
+    # numeric ranges (capacity / size / price / stock)
+    # --------------------
+    numeric = extract_numeric_constraints(raw_message or user_message)
+    if numeric:
+        updates["constraints"] = numeric
+
     return updates
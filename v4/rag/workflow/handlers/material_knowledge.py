@@ -1,4 +1,5 @@
 from rag.llm.openai_client import openai_client
+from rag.workflow.events import generate_reply
 from typing import Dict
 
 from rag.workflow.prompts.material_knowledge_prompt import (
@@ -84,7 +85,11 @@ Message:
 
     try:
         result = (
-            openai_client.generate(prompt=prompt, temperature=0.0)
+            openai_client.generate(
+                prompt=prompt,
+                temperature=0.0,
+                call_site="classify_material_intent_with_llm",
+            )
             .strip()
             .lower()
         )
@@ -114,9 +119,11 @@ def handle_material_knowledge(question: str) -> str:
     prompt = build_material_knowledge_prompt(question)
 
     try:
-        answer = openai_client.generate(
-            prompt=prompt,
+        answer = generate_reply(
+            openai_client,
+            prompt,
             temperature=0.1,
+            call_site="handle_material_knowledge",
         )
 
         if not answer or not answer.strip():
@@ -1,17 +1,19 @@
 from rag.workflow.search_step import build_rag_query, call_rag
 from rag.workflow.explanation import generate_explanation
+from rag.workflow.relaxation_engine import expand_from_best_match
 from rag.workflow.result_validator import validate_results_against_memory
 from rag.workflow.smart_intro_builder import build_smart_mismatch_intro
+from rag.workflow.events import emit, emit_text
 
 
-def handle_product_search(user_message: str, memory):
+def handle_product_search(user_message: str, memory, offset: int = 0):
     """
     Product search handler with Smart Seller validation layer.
     Production-ready.
     """
 
     rag_query = build_rag_query(memory, user_message)
-    results = call_rag(rag_query, memory)
+    results = call_rag(rag_query, memory, session_id=memory.session_id, offset=offset)
 
     if not results:
         return (
@@ -23,7 +25,15 @@ def handle_product_search(user_message: str, memory):
     mismatches = validate_results_against_memory(results, memory)
 
     if mismatches:
+        # Neighbours of the best partial match may satisfy the request
+        similar = expand_from_best_match(results, memory)
+        if similar and not validate_results_against_memory(similar, memory):
+            # The reply describes these: replace the cards already streamed
+            emit("results", {"results": similar})
+            return generate_explanation(similar, memory)
+
         intro = build_smart_mismatch_intro(memory, mismatches)
+        emit_text(intro + "\n\n")
 
         # IMPORTANT: remove misleading attribute phrase
         explanation = generate_explanation(results, memory=None)
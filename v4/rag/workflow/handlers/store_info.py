@@ -1,4 +1,5 @@
 from rag.llm.openai_client  import openai_client
+from rag.workflow.events import generate_reply
 from rag.workflow.knowledge.store_info_data import STORE_INFO
 
 
@@ -19,7 +20,11 @@ User question:
 {question}
 """
 
-    response = openai_client.generate(prompt, temperature=0.0).strip().lower()
+    response = openai_client.generate(
+        prompt,
+        temperature=0.0,
+        call_site="classify_store_topic_with_llm",
+    ).strip().lower()
 
     if response in {"shipping", "returns", "payments", "contacts"}:
         return response
@@ -49,7 +54,7 @@ def generate_store_reply_with_llm(topic: str, data: dict) -> str:
     """
 
 
-    return openai_client.generate(prompt).strip()
+    return generate_reply(openai_client, prompt, call_site="generate_store_reply_with_llm").strip()
 
 def handle_store_info(question: str) -> str:
     text = question.lower()
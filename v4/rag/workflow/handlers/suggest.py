@@ -5,14 +5,15 @@ from rag.workflow.explanation import generate_explanation
 from rag.workflow.result_validator import validate_results_against_memory
 from rag.workflow.smart_intro_builder import build_smart_mismatch_intro
 from rag.workflow.attribute_reflection import generate_attribute_reflection
-def handle_suggest(user_message: str, memory):
+from rag.workflow.events import emit_text
+def handle_suggest(user_message: str, memory, offset: int = 0):
     """
     Suggest mode = guided broad retrieval.
     Now with Smart Seller validation layer (demo-ready).
     """
 
     rag_query = build_rag_query(memory, user_message)
-    results = call_rag(rag_query, memory)
+    results = call_rag(rag_query, memory, session_id=memory.session_id, offset=offset)
 
     if not results:
         return (
@@ -29,13 +30,11 @@ def handle_suggest(user_message: str, memory):
         # 🔥 LLM reflection
         llm_intro = generate_attribute_reflection(memory, results)
 
-        explanation = generate_explanation(results, memory=None)
-
-        if llm_intro:
-            return llm_intro + explanation
-
         # fallback
-        intro = build_smart_mismatch_intro(memory, mismatches)
+        intro = llm_intro or build_smart_mismatch_intro(memory, mismatches)
+        emit_text(intro)
+
+        explanation = generate_explanation(results, memory=None)
         return intro + explanation
 
     return generate_explanation(results, memory)
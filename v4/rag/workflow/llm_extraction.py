@@ -1,18 +1,32 @@
 import json
-import re
 from typing import Dict
 from rag.workflow.vocab import PRODUCT_SIGNAL_GROUPS
-from rag.llm.openai_client import openai_client
+from rag.llm.openai_client import async_openai_client, openai_client
 
-ALLOWED_KEYS = {
+# Product search fields (used only for product_search turns)
+PRODUCT_KEYS = {
     "product_type",
     "use_case",
     "attributes",
     "negations",
 }
 
+# Conversational soft signals
+SIGNAL_KEYS = {
+    "use_case",
+    "occasion",
+    "style",
+    "target",
+    "mood",
+}
+
+ATTRIBUTE_KEYS = {"color", "material", "size", "shape"}
+
+INTENT_HINTS = {"product_search", "store_info", "material_knowledge", "small_talk"}
+
+
 def canonicalize_value(value: str) -> str | None:
-    if not value:
+    if not value or not isinstance(value, str):
         return None
 
     value = value.lower()
@@ -25,58 +39,40 @@ def canonicalize_value(value: str) -> str | None:
 
 LLM_EXTRACTION_PROMPT = """
 You are an information extraction engine for an Italian tableware e-commerce assistant.
-
-Your task:
-Extract structured product search signals from the user's message.
-
-General rules:
-- Detect product types (e.g. piatto, bicchiere, tazza).
-- Detect use_case if present.
-- Detect attributes:
-  - color
-  - material
-  - size
-  - shape
+Read the user's message and return ONE JSON object with exactly these keys:
+
+{{
+  "domain_relevant": true | false,   // is it about kitchen or tableware products?
+  "intent_hint": "product_search" | "store_info" | "material_knowledge" | "small_talk",
+  "product_type": string | null,     // e.g. piatto, bicchiere, tazza
+  "use_case": string | null,
+  "attributes": {{"color": ..., "material": ..., "size": ..., "shape": ...}},
+  "negations": {{attribute: value}},   // values the user does NOT want
+  "occasion": string | null,
+  "style": string | null,
+  "target": string | null,
+  "mood": string | null
+}}
+
+Rules:
 - Convert plural to singular canonical form (e.g. arancioni -> arancione).
 - If the message contains ONLY an attribute (e.g. "arancioni", "in vetro", "quadrati"),
   still return it inside attributes.
-- Do NOT invent values not present in the message.
-- Do not hallucinate product types.
-
-Output rules:
-- Output ONLY valid JSON.
-- Allowed top-level keys:
-  product_type, use_case, attributes, negations.
-- attributes keys allowed:
-  color, material, size, shape.
-- Use null when unsure.
+- Do NOT invent values not present in the message; use null when unsure.
+- Do NOT translate.
 
 User message:
 {message}
 """.strip()
 
 
-
-
-def safe_json_parse(raw: str) -> Dict:
-    """
-    Extract first JSON object from LLM response safely.
-    """
-    match = re.search(r"\{.*\}", raw, re.DOTALL)
-    if not match:
-        return {}
-
-    try:
-        return json.loads(match.group())
-    except Exception:
-        return {}
-
-
-def filter_allowed_keys(data: Dict) -> Dict:
-    """
-    Keep only allowed top-level keys.
-    """
-    return {k: v for k, v in data.items() if k in ALLOWED_KEYS}
+def empty_extraction() -> Dict:
+    return {
+        "domain_relevant": None,
+        "intent_hint": None,
+        "attributes": {},
+        "negations": {},
+    }
 
 
 def canonicalize_output(data: Dict) -> Dict:
@@ -94,6 +90,8 @@ def canonicalize_output(data: Dict) -> Dict:
         new_attrs = {}
 
         for key, value in data["attributes"].items():
+            if key not in ATTRIBUTE_KEYS:
+                continue
             canonical = canonicalize_value(value)
             if canonical:
                 new_attrs[key] = canonical
@@ -103,26 +101,83 @@ def canonicalize_output(data: Dict) -> Dict:
     return data
 
 
+def normalize_extraction(parsed: Dict) -> Dict:
+    """
+    Schema-checked copy of the model output: unknown keys dropped,
+    wrong types replaced by the empty value.
+    """
+    data = empty_extraction()
+
+    if isinstance(parsed.get("domain_relevant"), bool):
+        data["domain_relevant"] = parsed["domain_relevant"]
+
+    if parsed.get("intent_hint") in INTENT_HINTS:
+        data["intent_hint"] = parsed["intent_hint"]
+
+    for key in ("product_type", *SIGNAL_KEYS):
+        value = parsed.get(key)
+        data[key] = value.strip() if isinstance(value, str) and value.strip() else None
+
+    for key in ("attributes", "negations"):
+        if isinstance(parsed.get(key), dict):
+            data[key] = {k: v for k, v in parsed[key].items() if isinstance(v, str) and v}
+
+    return canonicalize_output(data)
+
+
+def parse_extraction(raw: str) -> Dict:
+    parsed = json.loads(raw)
+
+    if not isinstance(parsed, dict):
+        return empty_extraction()
+
+    return normalize_extraction(parsed)
+
+
 def llm_extract(message: str) -> Dict:
+    """
+    One JSON-mode call per turn: domain relevance, intent hint,
+    product fields and soft signals. Empty extraction on error.
+    """
     print(">>> LLM EXTRACTION CALLED")
 
     prompt = LLM_EXTRACTION_PROMPT.format(message=message)
 
     try:
-        raw = openai_client.generate(prompt, temperature=0.0)
+        raw = openai_client.generate_json(prompt, temperature=0.0, call_site="llm_extract")
+        return parse_extraction(raw)
+
+    except Exception as e:
+        print("LLM extraction error:", e)
+        return empty_extraction()
+
 
-        parsed = safe_json_parse(raw)
+async def allm_extract(message: str) -> Dict:
+    """
+    llm_extract on the async client (handle_user_message_async).
+    """
+    print(">>> LLM EXTRACTION CALLED")
 
-        if not isinstance(parsed, dict):
-            return {}
+    prompt = LLM_EXTRACTION_PROMPT.format(message=message)
 
-        cleaned = filter_allowed_keys(parsed)
-        canonical = canonicalize_output(cleaned)
-        return canonical
-        
+    try:
+        raw = await async_openai_client.generate_json(prompt, temperature=0.0, call_site="llm_extract")
+        return parse_extraction(raw)
 
     except Exception as e:
         print("LLM extraction error:", e)
-        return {}
-    
+        return empty_extraction()
+
 
+def product_updates(extraction: Dict) -> Dict:
+    """
+    Product search fields of an extraction (merged on product_search turns).
+    """
+    return {k: v for k, v in extraction.items() if k in PRODUCT_KEYS and v}
+
+
+def signal_updates(extraction: Dict) -> Dict:
+    """
+    Soft signals of an extraction (use_case / occasion / style...).
+    """
+    return {k: v for k, v in extraction.items() if k in SIGNAL_KEYS and v}
@@ -31,6 +31,7 @@ def llm_intent_disambiguation(message: str) -> Optional[Intent]:
         raw = ollama_client.generate(
             prompt,
             temperature=0.0,
+            call_site="llm_intent_disambiguation",
         ).strip().lower()
 
         for intent in Intent:
@@ -2,10 +2,13 @@
 # LEGACY ORCHESTRATOR
 # Will be replaced by WorkflowEngine after full parity.
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from uuid import uuid4
 import os
+import time
 
-from rag.workflow.intent import Intent, detect_intent
+from rag.workflow.intent import Intent, detect_intent, rule_intent_stage
 from rag.workflow.memory import update_memory
 from rag.workflow.search_step import build_rag_query, call_rag
 from rag.workflow.explanation import generate_explanation
@@ -21,11 +24,18 @@ from rag.workflow.handlers.material_knowledge import handle_material_knowledge
 from rag.workflow.handlers.store_info import handle_store_info
 from rag.workflow.handlers.promotion import handle_promotion
 from rag.workflow.logging import log_event
+from rag.workflow.events import emit
 from rag.workflow.normalization import normalize_text
-from rag.workflow.llm_extraction import llm_extract
+from rag.workflow.llm_extraction import (
+    allm_extract,
+    llm_extract,
+    product_updates,
+    signal_updates,
+)
 from rag.workflow.merge_extraction import merge_extractions
 from rag.workflow.signals import (
     extract_product_signals,
+    has_search_signal,
     detect_item_mode,
     ItemMode,
     detect_attribute_mode,
@@ -38,7 +48,6 @@ from rag.workflow.constraint_engine import enforce_constraints
 from rag.workflow.relaxation_engine import relax_constraints
 from rag.workflow.non_search_reply import generate_non_search_reply
 from rag.workflow.handlers.suggest import handle_suggest
-from rag.workflow.llm_signal_extractor import extract_semantic_signals
 
 from rag.workflow.handlers.product_search import handle_product_search
 
@@ -118,12 +127,12 @@ def intent_stage(normalized: str, memory) -> Intent:
     return detect_intent(normalized,memory)
 
 
-def rule_extraction_stage(normalized: str, memory):
-    return extract_memory(normalized, memory)
+def rule_extraction_stage(normalized: str, memory, user_message: str | None = None):
+    return extract_memory(normalized, memory, raw_message=user_message)
 
 USE_LLM_FALLBACK = True  # toggle for testing LLM fallback impact on logs and performance
 
-def llm_fallback_stage(normalized: str, rule_updates: dict, intent):
+def llm_fallback_stage(extraction: dict, intent):
 
     if intent != "product_search":
         return {}
@@ -131,7 +140,7 @@ def llm_fallback_stage(normalized: str, rule_updates: dict, intent):
     if not USE_LLM_FALLBACK:
         return {}
 
-    return llm_extract(normalized)
+    return product_updates(extraction)
 
 
 
@@ -189,6 +198,114 @@ def execution_stage(intent: Intent, normalized: str, memory):
 
 
 
+# ---------------------------
+# Concurrent LLM stages
+# ---------------------------
+
+# LLM calls a turn can start up front (intent, llm_extract). Each turn
+# gets its own threads: a shared pool would queue the calls of
+# concurrent requests behind each other.
+LLM_STAGES = 2
+CONCURRENT_LLM_STAGES = os.getenv("CONCURRENT_LLM_STAGES", "true").lower() == "true"
+
+
+class LLMFanOut:
+    """
+    Starts the turn's independent LLM calls together and joins them
+    where the pipeline needs each result. Calls only needed for some
+    intents are started speculatively; take() runs a call that was not
+    started, so the outcome is the same as the sequential pipeline.
+    Each call runs at most once per turn, however many stages take it.
+
+    On the async path the calls are awaited up front with gather() and
+    the pipeline only reads their results.
+
+    The turn's executor (LLM_STAGES threads) is created on the first
+    start() and shut down by discard().
+    """
+
+    def __init__(self, concurrent: bool = CONCURRENT_LLM_STAGES):
+        self.concurrent = concurrent
+        self._pool = None
+        self._futures = {}
+        self._results = {}
+        self.timings = {}
+
+    def _timed(self, name: str, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.timings[f"{name}_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    async def gather(self, calls: dict):
+        """
+        Awaits {name: awaitable} concurrently on the running event loop.
+        """
+        async def timed(name: str, call):
+            started = time.perf_counter()
+            try:
+                self._results[name] = await call
+            finally:
+                self.timings[f"{name}_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+        await asyncio.gather(*(timed(name, call) for name, call in calls.items()))
+
+    def start(self, name: str, fn, *args):
+        if name in self._results:
+            return
+        if not self.concurrent:
+            return
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=LLM_STAGES,
+                thread_name_prefix="llm-stage",
+            )
+        self._futures[name] = self._pool.submit(self._timed, name, fn, *args)
+
+    def take(self, name: str, fn, *args):
+        if name not in self._results:
+            future = self._futures.pop(name, None)
+            if future is not None:
+                self._results[name] = future.result()
+            else:
+                self._results[name] = self._timed(name, fn, *args)
+        return self._results[name]
+
+    def discard(self) -> list[str]:
+        """
+        Drops speculative calls whose result is not needed and releases
+        the turn's threads (a call already running finishes first).
+        """
+        names = list(self._futures)
+        for future in self._futures.values():
+            future.cancel()
+        self._futures.clear()
+
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+        return names
+
+
+def needs_llm_extraction(rule_intent: Intent, rule_updates: dict, search_signal: bool) -> bool:
+    """
+    Whether to start the extraction call before intent detection.
+    Domain rescue and soft signals take it whenever their rule checks
+    hold; the product search fallback only when the rules already see
+    a product search. Other turns that end up in product search run it
+    on demand (LLMFanOut.take).
+    """
+    if rule_intent == Intent.SMALL_TALK and not search_signal:
+        return True
+
+    if should_call_llm_for_signals(rule_updates):
+        return True
+
+    return USE_LLM_FALLBACK and rule_intent == Intent.PRODUCT_SEARCH
+
+
 def should_call_llm_for_signals(rule_updates: dict) -> bool:
     # اگر product_type نداریم یا occasion نداریم
     if not rule_updates.get("product_type"):
@@ -201,11 +318,51 @@ def should_call_llm_for_signals(rule_updates: dict) -> bool:
 
 
 
+def plan_stage(normalized: str, memory, user_message: str | None = None):
+    """
+    Deterministic stages that decide which LLM calls the turn can need.
+    """
+    rule_updates = rule_extraction_stage(normalized, memory, user_message)
+    rule_intent, _ = rule_intent_stage(normalized, extract_product_signals(normalized))
+    search_signal = has_search_signal(normalized)
+    return rule_updates, rule_intent, search_signal
+
+
 # ===========================
 # Main orchestrator
 # ===========================
 
-def handle_user_message(user_message, memory):
+async def handle_user_message_async(user_message, memory, offset: int = 0):
+    """
+    Async entry point. The turn's LLM calls are awaited on the async
+    clients, so the event loop keeps other conversations moving while
+    they are in flight; the remaining pipeline runs in a worker thread.
+    """
+    normalized = normalize_stage(user_message)
+    plan = plan_stage(normalized, memory, user_message)
+    rule_updates, rule_intent, search_signal = plan
+
+    # detect_intent may call the sync material classifier
+    calls = {"intent": asyncio.to_thread(intent_stage, normalized, memory)}
+
+    if needs_llm_extraction(rule_intent, rule_updates, search_signal):
+        calls["llm_extract"] = allm_extract(normalized)
+
+    fanout = LLMFanOut(concurrent=False)
+    await fanout.gather(calls)
+
+    return await asyncio.to_thread(
+        handle_user_message, user_message, memory, fanout, offset, plan
+    )
+
+
+def handle_user_message(
+    user_message,
+    memory,
+    fanout: LLMFanOut | None = None,
+    offset: int = 0,
+    plan: tuple | None = None,
+):
     trace_id = str(uuid4())
 
     log_trace(trace_id, "00_start", {
@@ -222,8 +379,23 @@ def handle_user_message(user_message, memory):
     })
 
 
-    # 2. Intent detection
-    initial_intent = intent_stage(normalized, memory)
+    # 2. Rule extraction + LLM fan-out
+    # 2️⃣ Deterministic stages first: they decide which LLM calls this
+    # turn can need. Those calls only read the normalized text and the
+    # pre-turn memory, so they run together and are joined below.
+    # plan / fanout are already computed when called from the async path
+    if plan is None:
+        plan = plan_stage(normalized, memory, user_message)
+    rule_updates, rule_intent, search_signal = plan
+
+    fanout = fanout or LLMFanOut()
+    fanout.start("intent", intent_stage, normalized, memory)
+
+    if needs_llm_extraction(rule_intent, rule_updates, search_signal):
+        fanout.start("llm_extract", llm_extract, normalized)
+
+    # 2.1 Intent detection
+    initial_intent = fanout.take("intent", intent_stage, normalized, memory)
     intent = initial_intent
     debug_print("INTENT_INITIAL", intent.value)
     log_trace(trace_id, "02_intent_detection", {
@@ -234,62 +406,38 @@ def handle_user_message(user_message, memory):
     # --------------------------------------------------
     # 🔥 Domain Semantic Rescue (LLM fallback)
     # --------------------------------------------------
-    from rag.workflow.signals import has_search_signal
-
-    if intent == Intent.SMALL_TALK and not has_search_signal(normalized):
-
-        try:
-            from rag.llm.openai_client import openai_client
+    if intent == Intent.SMALL_TALK and not search_signal:
 
-            domain_prompt = f"""
-            Is this message related to kitchen or tableware products?
+        extraction = fanout.take("llm_extract", llm_extract, normalized)
 
-            Message: {normalized}
-
-            Answer only yes or no.
-            """
-
-            domain_answer = openai_client.generate(
-                domain_prompt,
-                temperature=0.0,
-            ).strip().lower()
-
-            if "yes" in domain_answer:
-                intent = Intent.PRODUCT_SEARCH
-                debug_print("INTENT_DOMAIN_RESCUE", intent.value)
-
-                log_trace(trace_id, "02.1_domain_rescue", {
-                    "rescued_intent": intent.value,
-                    "domain_answer": domain_answer
-                })
+        if extraction["domain_relevant"]:
+            intent = Intent.PRODUCT_SEARCH
+            debug_print("INTENT_DOMAIN_RESCUE", intent.value)
 
-        except Exception as e:
-            debug_print("DOMAIN_RESCUE_ERROR", str(e))
+            log_trace(trace_id, "02.1_domain_rescue", {
+                "rescued_intent": intent.value,
+                "intent_hint": extraction["intent_hint"],
+            })
 
     # 3. Rule extraction
-    # 3️⃣ Rule extraction (deterministic backbone)
-    rule_updates = rule_extraction_stage(normalized, memory)
-
     # 3.1️⃣ LLM semantic signal rescue (only if needed)
-    llm_updates = {}
+    signal_llm_updates = {}
 
     if should_call_llm_for_signals(rule_updates):
-        llm_updates = extract_semantic_signals(normalized)
+        signal_llm_updates = signal_updates(fanout.take("llm_extract", llm_extract, normalized))
 
-    # 3.2️⃣ Merge signals
-    merged_updates = merge_extractions(rule_updates, llm_updates)
     debug_print("RULE_UPDATES", rule_updates)
-    
+
     log_trace(trace_id, "03_rule_extraction", {
         "rule_updates": rule_updates,
-        "llm_updates": llm_updates,
-        "merged_updates": merged_updates,
+        "llm_updates": signal_llm_updates,
         "memory_before": memory.dict()
     })
 
     # 4. Item conflict
     intent, interrupt = item_conflict_stage(normalized, intent)
     if interrupt:
+        fanout.discard()
         log_system(
             trace_id,
             interrupt["question"],
@@ -315,7 +463,17 @@ def handle_user_message(user_message, memory):
     })  
 
     # 6. LLM fallback + merge
-    llm_updates = llm_fallback_stage(normalized, rule_updates, intent.value)
+    if intent == Intent.PRODUCT_SEARCH and USE_LLM_FALLBACK:
+        extraction = fanout.take("llm_extract", llm_extract, normalized)
+        llm_updates = llm_fallback_stage(extraction, intent.value)
+    else:
+        llm_updates = {}
+    llm_updates = {**signal_llm_updates, **llm_updates}
+
+    log_trace(trace_id, "06.0_llm_fanout", {
+        "timings": fanout.timings,
+        "discarded": fanout.discard(),
+    })
     debug_print("LLM_UPDATES", llm_updates)
     log_trace(trace_id, "06_llm_fallback", {
         "llm_updates": llm_updates,
@@ -389,11 +547,17 @@ def handle_user_message(user_message, memory):
         "intent": intent.value,
         "memory": memory.dict()
     })
+    emit("stage", {
+        "stage": "intent",
+        "intent": intent.value,
+        "goal": goal.value,
+        "memory": memory.dict(),
+    })
 
     # 🚫 HARD GATES — NOTHING PASSES BELOW 
     
     if goal == GoalDecision.SUGGEST:
-        reply = handle_suggest(normalized, memory)
+        reply = handle_suggest(normalized, memory, offset)
 
         log_system(
             trace_id,
@@ -477,7 +641,7 @@ def handle_user_message(user_message, memory):
 
     if intent == Intent.PRODUCT_SEARCH:
         from rag.workflow.handlers.product_search import handle_product_search
-        reply = handle_product_search(user_message, memory)
+        reply = handle_product_search(user_message, memory, offset)
         return reply, memory, {
             "intent": intent.value,
             "rag_called": True,
@@ -485,7 +649,7 @@ def handle_user_message(user_message, memory):
 
     if intent == Intent.SUGGEST:
         from rag.workflow.handlers.suggest import handle_suggest
-        reply = handle_suggest(user_message, memory)
+        reply = handle_suggest(user_message, memory, offset)
         return reply, memory, {
             "intent": intent.value,       
             "rag_called": True,
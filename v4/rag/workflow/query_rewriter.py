@@ -54,7 +54,7 @@ Query:
     try:
         print(">>> LLM QUERY REWRITE CALLED")
 
-        raw = openai_client.generate(prompt, temperature=0.0)
+        raw = openai_client.generate(prompt, temperature=0.0, call_site="rewrite_query_with_llm")
 
         if not raw:
             return base_query
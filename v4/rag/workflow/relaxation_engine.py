@@ -34,3 +34,24 @@ def relax_constraints(results: List[Dict], memory) -> Tuple[List[Dict], str | No
             return relaxed, key
 
     return [], None
+
+
+def expand_from_best_match(results: List[Dict], memory, top_k: int = 3) -> List[Dict]:
+    """
+    Fallback when dropping attributes recovers nothing: precomputed
+    neighbours of the best partial match, those inside the memory
+    filters first. One array lookup, no new search.
+    """
+    if not results:
+        return []
+
+    from rag.workflow.search_step import get_search_engine
+
+    engine = get_search_engine()
+    best = results[0]["product_id"]
+
+    matching = engine.similar_to(best, top_k=top_k, memory=memory)
+    if matching:
+        return matching
+
+    return engine.similar_to(best, top_k=top_k)
@@ -32,7 +32,11 @@ Decide:
 Return only one word: valid / partially_valid / invalid
 """
 
-    decision = openai_client.generate(prompt, temperature=0.0).strip().lower()
+    decision = openai_client.generate(
+        prompt,
+        temperature=0.0,
+        call_site="validate_results_with_llm",
+    ).strip().lower()
 
     if decision not in {"valid", "partially_valid", "invalid"}:
         return "partially_valid"
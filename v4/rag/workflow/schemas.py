@@ -13,6 +13,8 @@ class SearchMemory(BaseModel):
     constraints: Dict = Field(default_factory=dict)
     attributes: Dict = Field(default_factory=dict)
     exclusions: Dict = Field(default_factory=dict)
+    # Conversation key of the search candidate pools (set by the API)
+    session_id: Optional[str] = None
 
 
 
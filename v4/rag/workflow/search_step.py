@@ -2,6 +2,7 @@
 
 from rag.workflow.schemas import RAGQuery
 from rag.workflow.memory import memory_to_text
+from rag.workflow.events import emit
 from rag.retrieval.search_product import ProductSearchEngine
 from rag.workflow.schemas import RAGQuery
 
@@ -67,7 +68,7 @@ def build_rag_query(memory, user_message: str) -> RAGQuery:
 
 
 
-def call_rag(rag_query, memory=None):
+def call_rag(rag_query, memory=None, session_id=None, offset=0):
     engine = get_search_engine()
 
     print("\n===== CALL RAG =====")
@@ -75,9 +76,18 @@ def call_rag(rag_query, memory=None):
     print("[RAG] memory:", memory.dict() if memory else None)
     print("=====================\n")
 
-    return engine.search(
+    results = engine.search(
         rag_query.text,
         memory=memory,
         top_k=3,
+        offset=offset,
+        filters=rag_query.filters,
+        session_id=session_id,
     )
 
+    # Streamed turns show the product cards before the reply text
+    emit("stage", {"stage": "retrieval", "num_results": len(results)})
+    emit("results", {"results": results})
+
+    return results
+
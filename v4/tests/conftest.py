@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# tests import the app as `rag.*`, like the API does when started from v4/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,91 @@
+import numpy as np
+
+from rag.retrieval.candidate_pool import (
+    CandidatePool,
+    CandidatePoolCache,
+    decode_cursor,
+    encode_cursor,
+    query_fingerprint,
+)
+
+
+def make_pool():
+    return CandidatePool(query="piatti bianchi", selection=None, query_vec=None)
+
+
+def test_extend_appends_unseen_rows_only():
+    pool = make_pool()
+    pool.extend(np.array([0.9, 0.8, 0.7]), np.array([4, 2, -1]))
+    pool.extend(np.array([0.95, 0.6]), np.array([2, 7]))
+
+    assert pool.rows.tolist() == [4, 2, 7]
+    assert len(pool) == 3
+
+
+def test_extend_collapses_variant_groups():
+    pool = make_pool()
+    pool.extend(np.array([0.9, 0.8, 0.7]), np.array([1, 2, 3]), np.array([1, 1, 3]))
+    pool.extend(np.array([0.6, 0.5]), np.array([4, 5]), np.array([3, 5]))
+
+    assert pool.rows.tolist() == [1, 3, 5]
+
+
+def test_cursor_round_trip():
+    fingerprint = query_fingerprint("piatti bianchi", None, mode="hybrid")
+    cursor = encode_cursor(fingerprint, 6)
+
+    assert decode_cursor(cursor, fingerprint) == 6
+    assert decode_cursor(None, fingerprint) == 0
+
+
+def test_cursor_of_another_query_restarts():
+    first = query_fingerprint("piatti bianchi", None, mode="hybrid")
+    other = query_fingerprint("piatti bianchi", np.array([1, 2]), mode="hybrid")
+
+    assert first != other
+    assert decode_cursor(encode_cursor(first, 6), other) == 0
+
+
+def test_cursor_paging_over_pool():
+    pool = make_pool()
+    pool.extend(np.linspace(1, 0, 7), np.arange(10, 17))
+    fingerprint = query_fingerprint(pool.query, None)
+
+    pages, cursor = [], None
+    while True:
+        offset = decode_cursor(cursor, fingerprint)
+        page = pool.rows[offset:offset + 3].tolist()
+        pages.append(page)
+        if offset + len(page) >= len(pool):
+            break
+        cursor = encode_cursor(fingerprint, offset + len(page))
+
+    assert pages == [[10, 11, 12], [13, 14, 15], [16]]
+
+
+def test_cache_is_keyed_by_session():
+    cache = CandidatePoolCache(max_size=4)
+    pool = make_pool()
+    cache.put("a", "fp", pool)
+
+    assert cache.get("a", "fp") is pool
+    assert cache.get("b", "fp") is None
+
+    cache.drop_session("a")
+    assert cache.get("a", "fp") is None
+
+
+def test_cache_lru_and_ttl():
+    cache = CandidatePoolCache(max_size=2)
+    for name in ("x", "y"):
+        cache.put("s", name, make_pool())
+    cache.get("s", "x")
+    cache.put("s", "z", make_pool())
+
+    assert cache.get("s", "y") is None
+    assert cache.get("s", "x") is not None
+
+    expired = CandidatePoolCache(ttl_seconds=-1)
+    expired.put("s", "x", make_pool())
+    assert expired.get("s", "x") is None
+    assert expired.stats()["evictions"] == 1
@@ -0,0 +1,69 @@
+import numpy as np
+
+from rag.retrieval.catalog_columns import RangeIndex, build_columns, capacity_ml
+from rag.workflow.schemas import SearchMemory
+
+
+PRODUCTS = [
+    {"price": 12.0, "availability": 0, "attributes": {"capacity": {"value": 280, "unit": "cc"}}},
+    {"price": 5.5, "availability": 3, "attributes": {"capacity": {"value": 1.5, "unit": "lt"}}},
+    None,
+    {"price": 20.0, "availability": 10, "attributes": {"size": {"value": 27}}},
+    {"price": 12.0, "availability": 1, "attributes": {}},
+]
+
+
+def make_index():
+    return RangeIndex(build_columns(PRODUCTS))
+
+
+def test_capacity_ml():
+    assert capacity_ml({"value": 1.5, "unit": "lt"}) == 1500.0
+    assert capacity_ml({"value": 28, "unit": "cl"}) == 280.0
+    assert capacity_ml({"value": 3, "unit": "oz"}) is None
+    assert capacity_ml(None) is None
+
+
+def test_rows_inclusive_bounds():
+    index = make_index()
+
+    assert index.rows("price", 12.0, 20.0).tolist() == [0, 3, 4]
+    assert index.rows("price", high=12.0).tolist() == [0, 1, 4]
+    assert index.rows("price", low=13.0).tolist() == [3]
+
+
+def test_rows_skip_missing_values():
+    index = make_index()
+
+    assert index.rows("price").tolist() == [0, 1, 3, 4]
+    assert index.rows("capacity").tolist() == [0, 1]
+
+
+def test_select_intersects_conditions():
+    index = make_index()
+    memory = SearchMemory(constraints={"price": {"max": 15}, "availability": {"min": 1}})
+
+    assert index.select(memory).tolist() == [1, 4]
+
+
+def test_filters_override_memory():
+    index = make_index()
+    memory = SearchMemory(constraints={"price": {"max": 15}})
+
+    selection = index.select(memory, filters={"price": {"min": 15}})
+
+    assert selection.tolist() == [3]
+
+
+def test_select_without_conditions():
+    index = make_index()
+
+    assert index.select(SearchMemory()) is None
+    assert index.select(SearchMemory(constraints={"colore": {"min": 1}})) is None
+
+
+def test_out_of_stock_selection():
+    index = make_index()
+    memory = SearchMemory(constraints={"availability": {"max": 0}})
+
+    np.testing.assert_array_equal(index.select(memory), [0])
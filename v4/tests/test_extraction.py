@@ -0,0 +1,40 @@
+from rag.workflow.extraction import extract_memory, extract_numeric_constraints
+from rag.workflow.normalization import normalize_text
+from rag.workflow.schemas import SearchMemory
+
+
+def test_decimal_comma_capacity():
+    constraints = extract_numeric_constraints("set 6 bicchieri 1,5 lt")
+
+    assert constraints["capacity"] == {"min": 1275.0, "max": 1725.0}
+
+
+def test_decimal_comma_price():
+    assert extract_numeric_constraints("sotto i 10,50 euro")["price"] == {"max": 10.5}
+
+
+def test_price_between():
+    assert extract_numeric_constraints("tra 10 e 20 euro")["price"] == {"min": 10.0, "max": 20.0}
+
+
+def test_in_stock():
+    assert extract_numeric_constraints("bicchieri disponibili")["availability"] == {"min": 1}
+    assert extract_numeric_constraints("in pronta consegna")["availability"] == {"min": 1}
+
+
+def test_stock_negation():
+    for text in ("prodotti non disponibili", "indisponibili", "senza essere disponibili"):
+        assert extract_numeric_constraints(text)["availability"] == {"max": 0}, text
+
+
+def test_negation_of_other_words_is_not_stock_negation():
+    constraints = extract_numeric_constraints("piatti non troppo cari ma disponibili")
+
+    assert constraints["availability"] == {"min": 1}
+
+
+def test_extract_memory_reads_numbers_from_raw_message():
+    raw = "Bicchieri da 1,5 lt"
+    updates = extract_memory(normalize_text(raw), SearchMemory(), raw_message=raw)
+
+    assert updates["constraints"]["capacity"] == {"min": 1275.0, "max": 1725.0}
@@ -0,0 +1,69 @@
+import json
+
+from rag.workflow.llm_extraction import (
+    empty_extraction,
+    normalize_extraction,
+    parse_extraction,
+    product_updates,
+    signal_updates,
+)
+
+
+def test_normalize_valid_output():
+    data = normalize_extraction({
+        "domain_relevant": True,
+        "intent_hint": "product_search",
+        "product_type": "Bicchiere",
+        "attributes": {"color": "Rosso", "material": "vetro"},
+        "negations": {"color": "blu"},
+        "occasion": " matrimonio ",
+        "style": None,
+    })
+
+    assert data["domain_relevant"] is True
+    assert data["intent_hint"] == "product_search"
+    assert data["product_type"] == "bicchiere"
+    assert data["attributes"] == {"color": "rosso", "material": "vetro"}
+    assert data["negations"] == {"color": "blu"}
+    assert data["occasion"] == "matrimonio"
+    assert data["style"] is None
+
+
+def test_normalize_drops_wrong_types_and_unknown_values():
+    data = normalize_extraction({
+        "domain_relevant": "yes",
+        "intent_hint": "checkout",
+        "product_type": "astronave",
+        "attributes": {"color": 3, "weight": "leggero", "shape": "quadrato"},
+        "negations": ["blu"],
+        "mood": "",
+        "extra": "ignored",
+    })
+
+    assert data["domain_relevant"] is None
+    assert data["intent_hint"] is None
+    assert data["product_type"] is None
+    assert data["attributes"] == {"shape": "quadrato"}
+    assert data["negations"] == {}
+    assert data["mood"] is None
+    assert "extra" not in data
+
+
+def test_parse_non_object_is_empty():
+    assert parse_extraction(json.dumps(["piatto"])) == empty_extraction()
+
+
+def test_updates_split():
+    data = normalize_extraction({
+        "product_type": "piatto",
+        "use_case": "pizza",
+        "attributes": {"color": "bianco"},
+        "occasion": "compleanno",
+    })
+
+    assert product_updates(data) == {
+        "product_type": "piatto",
+        "use_case": "pizza",
+        "attributes": {"color": "bianco"},
+    }
+    assert signal_updates(data) == {"use_case": "pizza", "occasion": "compleanno"}
@@ -0,0 +1,51 @@
+import pytest
+
+from rag.retrieval.metadata_store import MetadataStore, write_metadata_store
+
+
+ROWS = [
+    {"product_id": 101, "category": "Piatti", "url": "https://x/101", "images": ["a.jpg"]},
+    {"product_id": 102, "category": "Piatti", "url": None, "images": []},
+    {"product_id": "B-7", "category": "Bicchieri", "url": "https://x/b7", "images": ["b.jpg", "c.jpg"]},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / "meta.bin"
+    write_metadata_store(path, ROWS)
+    return MetadataStore(path)
+
+
+def test_round_trip(store):
+    assert len(store) == len(ROWS)
+    assert list(store) == ROWS
+
+
+def test_value_and_missing_column(store, tmp_path):
+    assert store.value(2, "images") == ["b.jpg", "c.jpg"]
+    assert store.value(1, "url") is None
+
+    path = tmp_path / "sparse.bin"
+    write_metadata_store(path, [{"product_id": 1, "extra": "x"}, {"product_id": 2}])
+    assert MetadataStore(path)[1] == {"product_id": 2, "extra": None}
+
+
+def test_row_of(store):
+    assert store.row_of(102) == 1
+    assert store.row_of("102") == 1
+    assert store.row_of("B-7") == 2
+    assert store.row_of(999) is None
+
+
+def test_out_of_range(store):
+    with pytest.raises(IndexError):
+        store[len(ROWS)]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not a store at all")
+
+    with pytest.raises(ValueError):
+        MetadataStore(path)
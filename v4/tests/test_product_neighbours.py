@@ -0,0 +1,79 @@
+import numpy as np
+
+from rag.retrieval.product_neighbours import NEIGHBOURS, build_neighbours, update_neighbours
+from rag.retrieval.variant_groups import regrouped_rows
+
+
+def unit_vectors(rng, count, dim=16):
+    vectors = rng.normal(size=(count, dim)).astype("float32")
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def leaders(labels):
+    """Group id per row = first row with the same label."""
+    first = {}
+    return np.array([first.setdefault(label, row) for row, label in enumerate(labels)], dtype="int32")
+
+
+def make_update(rng, total=300):
+    """
+    Old catalog, then a new one: rows 0-4 removed, 5-9 with a new
+    vector, 10 new products in front, one product changing group.
+    """
+    old_vectors = unit_vectors(rng, total)
+    old_labels = rng.integers(0, total // 3, size=total)
+
+    kept = np.arange(5, total)
+    previous = np.concatenate([np.full(10, -1), kept])
+    vectors = np.concatenate([unit_vectors(rng, 10), old_vectors[kept]])
+    vectors[10:15] = unit_vectors(rng, 5)
+
+    labels = np.concatenate([rng.integers(0, total // 3, size=10), old_labels[kept]])
+    labels[50] = -1
+
+    changed = np.zeros(len(vectors), dtype=bool)
+    changed[:15] = True
+
+    return old_vectors, leaders(old_labels), vectors, leaders(labels), previous, changed
+
+
+def test_update_matches_full_build():
+    rng = np.random.default_rng(0)
+    old_vectors, _, vectors, _, previous, changed = make_update(rng)
+
+    old_rows, old_scores = build_neighbours(old_vectors)
+    rows, scores = update_neighbours(vectors, previous, old_rows, old_scores, changed)
+    full_rows, full_scores = build_neighbours(vectors)
+
+    assert rows.shape == (len(vectors), NEIGHBOURS)
+    assert np.array_equal(scores, full_scores)
+    assert np.array_equal(rows, full_rows)
+
+
+def test_update_with_variant_groups():
+    rng = np.random.default_rng(1)
+    old_vectors, old_groups, vectors, groups, previous, changed = make_update(rng)
+
+    regrouped = regrouped_rows(groups, old_groups, previous)
+    assert regrouped[50]
+
+    old_rows, old_scores = build_neighbours(old_vectors, old_groups)
+    rows, scores = update_neighbours(
+        vectors, previous, old_rows, old_scores, changed, groups, regrouped
+    )
+    full_rows, full_scores = build_neighbours(vectors, groups)
+
+    assert np.array_equal(scores, full_scores)
+    assert np.array_equal(rows, full_rows)
+
+
+def test_regrouped_rows_ignores_leader_renumbering():
+    old_groups = np.array([0, 0, 2, 2, 4])
+    previous = np.array([-1, 0, 1, 2, 3, 4])
+
+    # Same partition, shifted by the new product in front
+    assert not regrouped_rows(np.array([0, 1, 1, 3, 3, 5]), old_groups, previous).any()
+
+    # Row 3 (old row 2) leaves its group: both old members are marked
+    regrouped = regrouped_rows(np.array([0, 1, 1, 3, 4, 5]), old_groups, previous)
+    assert regrouped.tolist() == [False, False, False, True, True, False]
@@ -0,0 +1,53 @@
+import threading
+
+import numpy as np
+
+from rag.retrieval.query_cache import QueryEmbeddingCache
+
+
+def make_cache(path, model_name="m"):
+    return QueryEmbeddingCache(model_name, max_size=8, path=path)
+
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / "query_cache.npz"
+    cache = make_cache(path)
+    cache.put("Piatti  Bianchi", np.array([1.0, 0.0]))
+    cache.put("bicchieri", np.array([0.0, 1.0]))
+    cache.save()
+
+    loaded = make_cache(path)
+
+    np.testing.assert_array_equal(loaded.get("piatti bianchi"), [1.0, 0.0])
+    assert loaded.stats()["size"] == 2
+    assert make_cache(path, model_name="other").stats()["size"] == 0
+
+
+def test_concurrent_saves_leave_a_valid_file(tmp_path):
+    path = tmp_path / "query_cache.npz"
+    caches = []
+    for worker in range(4):
+        cache = make_cache(path)
+        cache.put(f"query {worker}", np.full(64, worker, dtype="float32"))
+        caches.append(cache)
+
+    threads = [threading.Thread(target=cache.save) for cache in caches for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    loaded = make_cache(path)
+    assert loaded.stats()["size"] == 1
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_save_async(tmp_path):
+    path = tmp_path / "query_cache.npz"
+    cache = make_cache(path)
+    cache.put("piatti", np.array([1.0, 0.0]))
+
+    cache.save_async()
+    cache._saver.join()
+
+    assert make_cache(path).get("piatti") is not None
@@ -0,0 +1,133 @@
+import asyncio
+import sqlite3
+
+from rag.llm import response_cache
+from rag.llm.response_cache import LLMResponseCache
+
+
+def make_cache(tmp_path, monkeypatch, **kwargs):
+    monkeypatch.setattr(response_cache, "LLM_CACHE_ENABLED", True)
+    return LLMResponseCache(path=tmp_path / "cache.sqlite3", **kwargs)
+
+
+def counting(response="risposta"):
+    calls = []
+
+    def generate():
+        calls.append(1)
+        return response
+
+    return generate, calls
+
+
+def test_hit_and_miss(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, monkeypatch)
+    generate, calls = counting()
+
+    first = cache.generate("openai", "m", "prompt", 0.0, "site", generate)
+    second = cache.generate("openai", "m", "prompt", 0.0, "site", generate)
+
+    assert first == second == "risposta"
+    assert len(calls) == 1
+    assert cache.stats()["sites"]["site"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_non_deterministic_calls_are_not_cached(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, monkeypatch)
+    generate, calls = counting()
+
+    cache.generate("openai", "m", "prompt", 0.7, "site", generate)
+    cache.generate("openai", "m", "prompt", 0.7, "site", generate)
+
+    assert len(calls) == 2
+    assert cache.stats()["entries"] is None
+
+
+def test_expired_entry_is_a_miss(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, monkeypatch, ttl_seconds=-1)
+    generate, calls = counting()
+
+    cache.generate("openai", "m", "prompt", 0.0, "site", generate)
+    cache.generate("openai", "m", "prompt", 0.0, "site", generate)
+
+    assert len(calls) == 2
+    assert cache.stats()["entries"] == 1
+
+
+def test_eviction_keeps_recently_used(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, monkeypatch, max_entries=10)
+
+    for i in range(10):
+        cache.put(f"k{i}", f"r{i}", "openai", "m")
+    assert cache.get("k0") == "r0"  # k0 is now the most recently used
+
+    cache.put("k10", "r10", "openai", "m")
+
+    assert cache.stats()["entries"] == 9
+    assert cache.get("k0") == "r0"
+    assert cache.get("k1") is None
+
+
+def test_hits_update_last_used_in_batches(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, monkeypatch)
+    cache.put("k", "r", "openai", "m")
+
+    def last_used():
+        return sqlite3.connect(str(cache.path)).execute(
+            "SELECT last_used FROM responses WHERE key = 'k'"
+        ).fetchone()[0]
+
+    before = last_used()
+    cache.get("k")
+    assert last_used() == before
+
+    cache.flush()
+    assert last_used() > before
+
+
+def test_entries_count_survives_reopen(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, monkeypatch)
+    cache.put("a", "1", "openai", "m")
+    cache.put("b", "2", "openai", "m")
+    cache.put("a", "3", "openai", "m")
+
+    reopened = make_cache(tmp_path, monkeypatch)
+    reopened.conn
+
+    assert cache.stats()["entries"] == 2
+    assert reopened.stats()["entries"] == 2
+    assert reopened.get("a") == "3"
+
+
+def test_stream_miss_then_hit(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, monkeypatch)
+    calls = []
+
+    def stream():
+        calls.append(1)
+        yield "Ciao "
+        yield "mondo "
+
+    first = list(cache.stream("ollama", "m", "prompt", 0.0, "site", stream))
+    second = list(cache.stream("ollama", "m", "prompt", 0.0, "site", stream))
+
+    assert first == ["Ciao ", "mondo "]
+    assert second == ["Ciao mondo"]
+    assert len(calls) == 1
+
+
+def test_agenerate(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, monkeypatch)
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        return "risposta"
+
+    async def run():
+        first = await cache.agenerate("openai", "m", "prompt", 0.0, "site", generate)
+        second = await cache.agenerate("openai", "m", "prompt", 0.0, "site", generate)
+        return first, second
+
+    assert asyncio.run(run()) == ("risposta", "risposta")
+    assert len(calls) == 1